@@ -0,0 +1,98 @@
+"""
+Benchmark: recall@k and latency of the LSH user index against the exact scan.
+
+Usage:
+    python bench_ann_recall.py
+    python bench_ann_recall.py --k 10 --queries 300 --synthetic-users 200000
+
+--synthetic-users appends perturbed copies of MovieLens users (random subset of
+each user's ratings) to see how lookup latency scales with the user base.
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from src.infrastructure.ratings_store import SparseRatingsStore
+from src.infrastructure.ann_index import ExactUserIndex, LSHUserIndex
+
+CONFIGS = [
+    {"n_tables": 4, "n_bits": 12, "n_probes": 0},
+    {"n_tables": 8, "n_bits": 12, "n_probes": 0},
+    {"n_tables": 8, "n_bits": 12, "n_probes": 1},
+    {"n_tables": 16, "n_bits": 14, "n_probes": 1},
+    {"n_tables": 24, "n_bits": 16, "n_probes": 1},
+]
+
+
+def load_store(synthetic_users: int, seed: int) -> SparseRatingsStore:
+    ratings = pd.read_csv(
+        'data/ml-latest-small/ratings.csv',
+        usecols=['userId', 'movieId', 'rating'],
+        dtype={'userId': np.int32, 'movieId': np.int32, 'rating': np.float32}
+    )
+    store = SparseRatingsStore.from_frame(ratings)
+    if synthetic_users <= 0:
+        return store
+    rng = np.random.default_rng(seed)
+    source = store.matrix[rng.integers(0, store.matrix.shape[0], synthetic_users)].tocoo()
+    keep = rng.random(source.nnz) < 0.7
+    synthetic = sparse.csr_matrix(
+        (source.data[keep], (source.row[keep], source.col[keep])), shape=source.shape, dtype=np.float32
+    )
+    matrix = sparse.vstack([store.matrix, synthetic], format='csr')
+    user_keys = store.user_keys + [f"synthetic_{i}" for i in range(synthetic_users)]
+    return SparseRatingsStore(matrix, user_keys, store.item_ids)
+
+
+def run(store: SparseRatingsStore, index, queries: np.ndarray, k: int, exact_results: list) -> dict:
+    latencies, recalls = [], []
+    for row, expected in zip(queries, exact_results):
+        vector = store.row_dense(int(row))
+        started = time.perf_counter()
+        found, _ = index.search(store, vector, k, exclude_row=int(row))
+        latencies.append(time.perf_counter() - started)
+        recalls.append(len(set(found.tolist()) & expected) / max(len(expected), 1))
+    return {
+        "recall": float(np.mean(recalls)),
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--synthetic-users", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    store = load_store(args.synthetic_users, args.seed)
+    print(f"Users: {store.n_users}, items: {store.n_items}, nnz: {store.nnz}")
+    rng = np.random.default_rng(args.seed)
+    queries = rng.choice(store.n_users, size=min(args.queries, store.n_users), replace=False)
+
+    exact = ExactUserIndex()
+    exact_results = []
+    for row in queries:
+        found, _ = exact.search(store, store.row_dense(int(row)), args.k, exclude_row=int(row))
+        exact_results.append(set(found.tolist()))
+    stats = run(store, exact, queries, args.k, exact_results)
+    print(f"{'exact':<40} recall@{args.k}={stats['recall']:.3f}  p50={stats['p50_ms']:.2f}ms  p95={stats['p95_ms']:.2f}ms")
+
+    for config in CONFIGS:
+        started = time.perf_counter()
+        index = LSHUserIndex(**config).fit(store)
+        build_seconds = time.perf_counter() - started
+        stats = run(store, index, queries, args.k, exact_results)
+        index_stats = index.get_stats()
+        label = "lsh " + " ".join(f"{key}={value}" for key, value in config.items())
+        print(f"{label:<40} recall@{args.k}={stats['recall']:.3f}  p50={stats['p50_ms']:.2f}ms  "
+              f"p95={stats['p95_ms']:.2f}ms  candidates={index_stats['avg_candidates']:.0f}  "
+              f"fallbacks={index_stats['total_fallbacks']}  build={build_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,53 +2,69 @@
 Application service for event queue operations.
 Keeps queue-related business logic out of the web layer.
 """
-from typing import Dict, Any
+from typing import Any, Callable, Dict, Optional
 from datetime import datetime
 import uuid
-from src.infrastructure.db import SessionLocal, EventModel
+from sqlalchemy import select
+from src.infrastructure.db import AsyncSessionLocal, EventModel, EventStatusCountModel, async_write_lock
 
 
 class EventQueueService:
-    """Service for enqueueing events and reading queue stats."""
+    """
+    Service for enqueueing events and reading queue stats.
+    Async: queries are awaited on the aiosqlite engine, so endpoints don't
+    hold a threadpool worker while SQLite does I/O.
+    """
 
-    def enqueue_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
-        db = SessionLocal()
-        try:
-            event_model = EventModel(
-                id=str(uuid.uuid4()),
-                user_id=event.get('user_id', 'unknown'),
-                user_name=event.get('name') or event.get('user_name'),
-                session_id=event.get('session_id', 'unknown'),
-                event_type=event.get('event_type', 'unknown'),
-                item_id=event.get('item_id', ''),
-                rating=event.get('rating'),
-                mood=event.get('mood'),
-                timestamp=datetime.now(),
-                context=str(event.get('context', {})),
-                status='pending'
-            )
-            db.add(event_model)
-            db.commit()
-            return {"status": "queued", "event_id": event_model.id}
-        except Exception as e:
-            db.rollback()
-            return {"error": str(e)}
-        finally:
-            db.close()
+    def __init__(self, notify: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            notify: called after an event is committed, e.g. BackgroundRunner.notify,
+                so the runner picks it up immediately instead of on its next poll
+        """
+        self.notify = notify
 
-    def get_queue_stats(self) -> Dict[str, Any]:
-        db = SessionLocal()
-        try:
-            pending_count = db.query(EventModel).filter(EventModel.status == 'pending').count()
-            processing_count = db.query(EventModel).filter(EventModel.status == 'processing').count()
-            processed_count = db.query(EventModel).filter(EventModel.status == 'processed').count()
-            failed_count = db.query(EventModel).filter(EventModel.status == 'failed').count()
-            return {
-                "pending": pending_count,
-                "processing": processing_count,
-                "processed": processed_count,
-                "failed": failed_count,
-                "total": pending_count + processing_count + processed_count + failed_count
-            }
-        finally:
-            db.close()
+    async def enqueue_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        async with async_write_lock(), AsyncSessionLocal() as db:
+            try:
+                event_model = EventModel(
+                    id=str(uuid.uuid4()),
+                    user_id=event.get('user_id', 'unknown'),
+                    user_name=event.get('name') or event.get('user_name'),
+                    session_id=event.get('session_id', 'unknown'),
+                    event_type=event.get('event_type', 'unknown'),
+                    item_id=event.get('item_id', ''),
+                    rating=event.get('rating'),
+                    mood=event.get('mood'),
+                    timestamp=datetime.now(),
+                    context=str(event.get('context', {})),
+                    status='pending'
+                )
+                db.add(event_model)
+                await db.commit()
+                if self.notify:
+                    self.notify()
+                return {"status": "queued", "event_id": event_model.id}
+            except Exception as e:
+                await db.rollback()
+                return {"error": str(e)}
+
+    async def get_queue_stats(self) -> Dict[str, Any]:
+        """Event counts per status from the trigger-maintained counters (one row per status, no table scan)."""
+        async with AsyncSessionLocal() as db:
+            counts = dict((await db.execute(
+                select(EventStatusCountModel.status, EventStatusCountModel.count)
+            )).all())
+        pending_count = counts.get('pending', 0)
+        processing_count = counts.get('processing', 0)
+        processed_count = counts.get('processed', 0)
+        failed_count = counts.get('failed', 0)
+        dead_count = counts.get('dead', 0)
+        return {
+            "pending": pending_count,
+            "processing": processing_count,
+            "processed": processed_count,
+            "failed": failed_count,
+            "dead": dead_count,
+            "total": pending_count + processing_count + processed_count + failed_count + dead_count
+        }
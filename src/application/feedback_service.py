@@ -2,25 +2,56 @@
 Application services for handling feedback and statistics.
 This layer contains business logic that was previously in the web layer.
 """
-from typing import Dict, Any, List
-from collections import Counter
-from src.infrastructure.db import SessionLocal, FeedbackModel
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+from datetime import datetime
+import asyncio
+import base64
+import binascii
+import json
+from sqlalchemy import and_, case, func, or_, select, tuple_
+from src.infrastructure.db import AsyncSessionLocal, FeedbackModel
 from src.domain.interfaces import Recommender, Learner
 
+# Stranica /ratings (keyset po (timestamp, id)); veće stranice se skraćuju na MAX
+RATINGS_PAGE_SIZE = 100
+RATINGS_MAX_PAGE_SIZE = 1000
+# Redovi koje NDJSON export drži u memoriji odjednom
+RATINGS_STREAM_CHUNK = 1000
+
+
+def encode_cursor(timestamp: Optional[datetime], feedback_id: str) -> str:
+    """Opaque cursor pointing after the row (timestamp, id)."""
+    key = [timestamp.isoformat() if timestamp else None, feedback_id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], str]:
+    """(timestamp, id) from encode_cursor(); ValueError if the cursor is malformed."""
+    try:
+        timestamp, feedback_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return (datetime.fromisoformat(timestamp) if timestamp else None), str(feedback_id)
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
 
 class FeedbackService:
     """
     Service for handling user feedback operations.
     Encapsulates business logic for feedback processing and statistics.
+    Async: reads are awaited on the aiosqlite engine; the learner (shared
+    with the background runner, sync) runs in a worker thread.
     """
     
     def __init__(self, recommender: Recommender, learner: Learner):
         self.recommender = recommender
         self.learner = learner
     
-    def process_feedback(self, feedback_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def process_feedback(self, feedback_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Process user feedback: save to database and trigger model update.
+        Process user feedback: save to database and hand it to the model.
+        The learner passes the new rating to the recommender as a delta;
+        with a background refresher it is applied with the next model version,
+        so this call costs one DB insert.
         
         Args:
             feedback_data: {"name": str, "item_id": str, "rating": int, "mood": str}
@@ -36,8 +67,8 @@ class FeedbackService:
         if 'rating' not in feedback_data:
             return {"error": "Rating is required"}
         
-        # Save feedback via learner
-        result = self.learner.learn(feedback_data)
+        # Save feedback via learner (sync upis + delta modela, van event loop-a)
+        result = await asyncio.to_thread(self.learner.learn, feedback_data)
         
         # Handle duplicate/error cases
         if result.get("status") == "exists":
@@ -45,17 +76,16 @@ class FeedbackService:
         if result.get("status") == "error":
             return {"error": result.get("error", "Unknown error")}
         
-        # Trigger model update (business logic)
-        self.recommender.update_model()
-        
         return {
-            "status": "Feedback recorded and model updated",
+            "status": "Feedback recorded, model update scheduled",
             "rating": result.get("rating")
         }
     
-    def get_user_statistics(self, user_name: str) -> Dict[str, Any]:
+    async def get_user_statistics(self, user_name: str) -> Dict[str, Any]:
         """
         Get aggregated statistics for a user.
+        One GROUP BY mood in the database, answered from the
+        (user_name, mood, rating) index without reading feedback rows.
         
         Args:
             user_name: Name of the user
@@ -63,73 +93,117 @@ class FeedbackService:
         Returns:
             Dictionary with user statistics
         """
-        db = SessionLocal()
-        try:
-            # Fetch all feedback for user
-            feedbacks = db.query(FeedbackModel).filter(
-                FeedbackModel.user_name == user_name
-            ).all()
-            
-            # No feedback case
-            if not feedbacks:
-                return {
-                    "user_name": user_name,
-                    "total_feedback": 0,
-                    "liked_count": 0,
-                    "disliked_count": 0,
-                    "favorite_mood": None,
-                    "moods": {}
-                }
-            
-            # Calculate aggregations (business logic)
-            liked = [f for f in feedbacks if f.rating >= 4]
-            disliked = [f for f in feedbacks if f.rating <= 2]
-            
-            # Count moods
-            mood_counts = Counter(f.mood for f in feedbacks)
-            favorite_mood = mood_counts.most_common(1)[0][0] if mood_counts else None
-            
+        async with AsyncSessionLocal() as db:
+            per_mood = (await db.execute(
+                select(
+                    FeedbackModel.mood,
+                    func.count(),
+                    func.sum(case((FeedbackModel.rating >= 4, 1), else_=0)),
+                    func.sum(case((FeedbackModel.rating <= 2, 1), else_=0)),
+                ).where(FeedbackModel.user_name == user_name)
+                .group_by(FeedbackModel.mood)
+                .order_by(FeedbackModel.mood)
+            )).all()
+        
+        # No feedback case
+        if not per_mood:
             return {
                 "user_name": user_name,
-                "total_feedback": len(feedbacks),
-                "liked_count": len(liked),
-                "disliked_count": len(disliked),
-                "favorite_mood": favorite_mood,
-                "moods": dict(mood_counts)
+                "total_feedback": 0,
+                "liked_count": 0,
+                "disliked_count": 0,
+                "favorite_mood": None,
+                "moods": {}
             }
-        finally:
-            db.close()
+        
+        mood_counts = {mood: count for mood, count, _, _ in per_mood}
+        # Najčešći mood; kod izjednačenja prvi po abecedi
+        favorite_mood = max(mood_counts, key=mood_counts.get)
+        
+        return {
+            "user_name": user_name,
+            "total_feedback": sum(mood_counts.values()),
+            "liked_count": sum(liked for _, _, liked, _ in per_mood),
+            "disliked_count": sum(disliked for _, _, _, disliked in per_mood),
+            "favorite_mood": favorite_mood,
+            "moods": mood_counts
+        }
     
-    def get_user_ratings(self, user_name: str, mood: str = None) -> Dict[str, Any]:
+    async def get_user_ratings(self, user_name: str, mood: str = None, limit: int = RATINGS_PAGE_SIZE,
+                               cursor: Optional[str] = None) -> Dict[str, Any]:
         """
-        Get user's ratings, optionally filtered by mood.
+        Get one page of the user's ratings, optionally filtered by mood,
+        ordered by (timestamp, id). Keyset pagination: the page starts right
+        after `cursor`, so every page costs the same regardless of how deep
+        into the history it is.
         
         Args:
             user_name: Name of the user
             mood: Optional mood filter
+            limit: Page size (1..RATINGS_MAX_PAGE_SIZE)
+            cursor: next_cursor of the previous page (None: first page)
         
         Returns:
-            Dictionary with ratings list
+            Dictionary with ratings list and next_cursor (None on the last page)
         """
-        db = SessionLocal()
+        limit = max(1, min(int(limit), RATINGS_MAX_PAGE_SIZE))
         try:
-            query = db.query(FeedbackModel).filter(FeedbackModel.user_name == user_name)
-            
-            if mood:
-                query = query.filter(FeedbackModel.mood == mood)
-            
-            feedbacks = query.all()
-            
-            return {
-                "ratings": [
-                    {
-                        "item_id": f.item_id,
-                        "rating": f.rating,
-                        "mood": f.mood,
-                        "timestamp": f.timestamp.isoformat() if f.timestamp else None,
-                    }
-                    for f in feedbacks
-                ]
-            }
-        finally:
-            db.close()
+            query = self._ratings_query(user_name, mood, decode_cursor(cursor) if cursor else None)
+        except ValueError as e:
+            return {"error": str(e)}
+        
+        async with AsyncSessionLocal() as db:
+            # Jedan red viška: postoji li sljedeća stranica
+            rows = (await db.execute(query.limit(limit + 1))).all()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id)
+        return {
+            "ratings": [self._rating_dict(row) for row in rows],
+            "next_cursor": next_cursor,
+        }
+    
+    async def stream_user_ratings(self, user_name: str, mood: str = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        All of the user's ratings in (timestamp, id) order, streamed from
+        the database RATINGS_STREAM_CHUNK rows at a time (plain rows, no ORM
+        objects), so memory stays constant for any history size.
+        """
+        query = self._ratings_query(user_name, mood).execution_options(yield_per=RATINGS_STREAM_CHUNK)
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(query)
+            async for row in result:
+                yield self._rating_dict(row)
+    
+    @staticmethod
+    def _ratings_query(user_name: str, mood: str = None, after: Optional[Tuple[Optional[datetime], str]] = None):
+        """Columns only (no ORM entities), on the (user_name, timestamp, id) index."""
+        query = select(
+            FeedbackModel.id, FeedbackModel.item_id, FeedbackModel.rating, FeedbackModel.mood, FeedbackModel.timestamp
+        ).where(FeedbackModel.user_name == user_name)
+        
+        if mood:
+            query = query.where(FeedbackModel.mood == mood)
+        
+        if after:
+            timestamp, feedback_id = after
+            if timestamp is None:
+                # NULL timestamp-i su prvi u ASC redoslijedu
+                query = query.where(or_(
+                    and_(FeedbackModel.timestamp.is_(None), FeedbackModel.id > feedback_id),
+                    FeedbackModel.timestamp.is_not(None),
+                ))
+            else:
+                query = query.where(tuple_(FeedbackModel.timestamp, FeedbackModel.id) > tuple_(timestamp, feedback_id))
+        return query.order_by(FeedbackModel.timestamp, FeedbackModel.id)
+    
+    @staticmethod
+    def _rating_dict(row) -> Dict[str, Any]:
+        return {
+            "item_id": row.item_id,
+            "rating": row.rating,
+            "mood": row.mood,
+            "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+        }
@@ -0,0 +1,204 @@
+"""
+Application service for bulk feedback import.
+Streams NDJSON or CSV rows into FeedbackModel in large chunks and rebuilds
+the model once at the end, instead of one learner call (and model update)
+per row.
+"""
+import csv
+import json
+import time
+from datetime import datetime
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy.dialects import sqlite
+from src.infrastructure.db import SessionLocal, FeedbackModel
+from src.domain.interfaces import Recommender
+
+IMPORT_FORMATS = ("ndjson", "csv")
+# Redovi idu direktno DB-API executemany-ju (bez ORM/Core obrade po redu)
+IMPORT_COLUMNS = ("id", "user_name", "item_id", "rating", "mood", "timestamp")
+INSERT_SQL = (f"INSERT OR IGNORE INTO {FeedbackModel.__tablename__} ({', '.join(IMPORT_COLUMNS)}) "
+              f"VALUES ({', '.join('?' * len(IMPORT_COLUMNS))})")
+# Timestamp u istom formatu u kojem ga SQLAlchemy sprema
+_store_timestamp = FeedbackModel.__table__.c.timestamp.type.dialect_impl(
+    sqlite.dialect()).bind_processor(sqlite.dialect())
+# Prihvaćena imena kolona po polju (prvo pronađeno se koristi)
+FIELD_ALIASES = {
+    "user_name": ("name", "user_name", "userId"),
+    "item_id": ("item_id", "movieId"),
+    "rating": ("rating",),
+    "mood": ("mood",),
+    "timestamp": ("timestamp",),
+}
+
+
+class FeedbackImportService:
+    """
+    Bulk import of feedback rows: {"name", "item_id", "rating", "mood"} plus
+    an optional ISO "timestamp" (default: the import's start time). Rows are
+    validated as they arrive and written with one executemany INSERT OR
+    IGNORE per chunk (one transaction each); rows that already exist for (user_name, mood, item_id) are
+    skipped by the unique index. finish() invalidates the recommender's
+    caches and triggers exactly one model rebuild; the report's
+    model_rebuild is "done" when the new model is already published and
+    "scheduled" when a background refresher will build it.
+
+    One instance handles one import.
+    """
+
+    def __init__(self, recommender: Optional[Recommender] = None, chunk_size: int = 50000, max_errors: int = 20):
+        """
+        Args:
+            recommender: model to rebuild once after the import (None: no rebuild)
+            chunk_size: rows per INSERT transaction
+            max_errors: invalid rows reported by line number (all are counted)
+        """
+        self.recommender = recommender
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.received = 0
+        self.inserted = 0
+        self.invalid = 0
+        self.errors: List[str] = []
+        self._pending: List[tuple] = []
+        self._csv_header: Optional[List[str]] = None
+        self._line = 0
+        self._started = time.perf_counter()
+        # Redovi bez timestamp-a dobiju vrijeme importa (formatirano jednom)
+        self._imported_at = datetime.now()
+        self._imported_at_iso = self._imported_at.isoformat()
+        self._imported_at_stored = _store_timestamp(self._imported_at)
+
+    def import_lines(self, lines: Iterable[str], format: str = "ndjson") -> Dict[str, Any]:
+        """Import a whole stream of lines and finish (CLI path)."""
+        self.add_lines(lines, format)
+        return self.finish()
+
+    def add_lines(self, lines: Iterable[str], format: str = "ndjson") -> None:
+        """Parse, validate and buffer lines; full chunks are written right away."""
+        if format not in IMPORT_FORMATS:
+            raise ValueError(f"Unknown import format: {format} (choose from {', '.join(IMPORT_FORMATS)})")
+        for line in lines:
+            self._line += 1
+            line = line.strip()
+            if not line:
+                continue
+            if format == "csv":
+                values = next(csv.reader([line]))
+                if self._csv_header is None:
+                    self._csv_header = [value.strip() for value in values]
+                    continue
+                raw = dict(zip(self._csv_header, values))
+            else:
+                try:
+                    raw = json.loads(line)
+                except ValueError:
+                    raw = None
+            self.add(raw)
+
+    def add(self, raw: Optional[Dict[str, Any]]) -> None:
+        """Validate and buffer one parsed row."""
+        self.received += 1
+        row, error = self._validate(raw)
+        if error:
+            self.invalid += 1
+            if len(self.errors) < self.max_errors:
+                self.errors.append(f"line {self._line or self.received}: {error}")
+            return
+        self._pending.append(row)
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered rows in one transaction."""
+        if not self._pending:
+            return
+        # Stabilno sortirano po korisniku: lokalnost u indeksima, redoslijed unutar korisnika ostaje
+        rows = sorted(self._pending, key=itemgetter(1))
+        self._pending = []
+        db = SessionLocal()
+        try:
+            result = db.connection().exec_driver_sql(INSERT_SQL, rows)
+            db.commit()
+            self.inserted += result.rowcount
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def finish(self) -> Dict[str, Any]:
+        """Flush the rest, refresh the recommender once and return the import report."""
+        self.flush()
+        seconds = time.perf_counter() - self._started
+        model_rebuild = None
+        if self.recommender and self.inserted:
+            # Jedan full rebuild za cijeli import (ne apply_feedback po redu)
+            for cache_name in ("profile_cache", "result_cache"):
+                cache = getattr(self.recommender, cache_name, None)
+                if cache:
+                    cache.invalidate()
+            # Sa background refresher-om rebuild je samo u redu čekanja
+            model_rebuild = "done" if self.recommender.update_model() else "scheduled"
+        valid = self.received - self.invalid
+        print(f"[IMPORT] {self.inserted} of {self.received} feedback rows imported in {seconds:.1f}s "
+              f"({self.received / seconds if seconds > 0 else 0:.0f} rows/s), "
+              f"{valid - self.inserted} duplicates, {self.invalid} invalid")
+        return {
+            "status": "imported",
+            "received": self.received,
+            "inserted": self.inserted,
+            "duplicates": valid - self.inserted,
+            "invalid": self.invalid,
+            "errors": self.errors,
+            "seconds": round(seconds, 3),
+            "rows_per_sec": round(self.received / seconds) if seconds > 0 else None,
+            "model_rebuild": model_rebuild,
+        }
+
+    @staticmethod
+    def _field(raw: Dict[str, Any], name: str):
+        for alias in FIELD_ALIASES[name]:
+            value = raw.get(alias)
+            if value is not None and value != "":
+                return value
+        return None
+
+    def _validate(self, raw: Optional[Dict[str, Any]]):
+        """(row tuple in IMPORT_COLUMNS order, None) or (None, error message)."""
+        if not isinstance(raw, dict):
+            return None, "not a JSON object"
+        field = self._field
+        user_name = field(raw, "user_name")
+        item_id = field(raw, "item_id")
+        rating = field(raw, "rating")
+        mood = field(raw, "mood")
+        if user_name is None or item_id is None or rating is None or mood is None:
+            return None, "name, item_id, rating and mood are required"
+        user_name, mood = str(user_name).strip(), str(mood).strip()
+        try:
+            # Model i profili čitaju item_id kao movieId (int)
+            item_id = str(item_id if type(item_id) is int else int(str(item_id).strip()))
+            rating = float(rating)
+        except (TypeError, ValueError):
+            return None, "item_id must be an integer movieId and rating a number"
+        # Kolona rating je Integer (1-5), kao i ocjene iz feedback-a
+        if not rating.is_integer() or not 1 <= rating <= 5:
+            return None, "rating must be a whole number between 1 and 5"
+        timestamp = field(raw, "timestamp")
+        if timestamp is None:
+            timestamp_iso, stored = self._imported_at_iso, self._imported_at_stored
+        else:
+            try:
+                timestamp = datetime.fromisoformat(str(timestamp))
+            except ValueError:
+                return None, "timestamp must be ISO 8601"
+            timestamp_iso, stored = timestamp.isoformat(), _store_timestamp(timestamp)
+        return (
+            f"{user_name}_{item_id}_{mood}_{timestamp_iso}",
+            user_name,
+            item_id,
+            int(rating),
+            mood,
+            stored,
+        ), None
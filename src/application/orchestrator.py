@@ -1,5 +1,5 @@
 from src.domain.interfaces import Recommender, Learner, Sensor, Actuator
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple
 
 class Orchestrator:
     def __init__(self, recommender: Recommender, learner: Learner, sensor: Actuator, actuator: Actuator):
@@ -14,6 +14,11 @@ class Orchestrator:
         recommendations = self.recommender.recommend(user_name, mood)
         return recommendations
 
+    def step_batch(self, requests: Iterable[Tuple[str, str]],
+                   n: int = 10) -> Iterator[Tuple[str, str, List[Dict[str, Any]]]]:
+        """Called by the batch endpoint - recommendations for many (user_name, mood) pairs"""
+        return self.recommender.recommend_batch(requests, n)
+
     def tick(self, event: Optional[Dict[str, Any]] = None) -> str:
         """
         Process one event from queue (called by background runner).
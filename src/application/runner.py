@@ -1,14 +1,30 @@
 """
 Background runner/worker for autonomous agent operation.
-Implements the tick loop: periodically processes events from queue.
+Implements the tick loop: processes events from queue as soon as
+`notify()` signals a new one, with a slow fallback poll every
+`tick_interval` for events written by other processes.
+
+All blocking work (claiming, orchestrator.tick, status updates) runs in an
+executor, so the event loop keeps serving HTTP requests while a batch is
+being processed.
+
+Events are claimed with a lease (worker_id + lease_expires_at), renewed by
+a heartbeat while the batch runs. If a runner dies, its leases expire and
+any runner sharing the database reclaims the events; an event that fails
+or is reclaimed `max_attempts` times is moved to the 'dead' (dead-letter)
+status instead of being retried forever.
 """
 import asyncio
 import logging
-from typing import Optional
-from datetime import datetime
+import os
+import socket
+import uuid
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Union
+from datetime import datetime, timedelta
 from src.application.orchestrator import Orchestrator
 from src.infrastructure.db import SessionLocal, EventModel
-from sqlalchemy import and_
+from sqlalchemy import DateTime, and_, bindparam, or_, text
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,93 +36,293 @@ class BackgroundRunner:
     Runs continuously and implements NoWork behavior when queue is empty.
     """
     
-    def __init__(self, orchestrator: Orchestrator, tick_interval: float = 5.0):
+    # Claim: jedan atomski UPDATE ... RETURNING preuzima do :limit najstarijih pending event-a pod lease-om
+    CLAIM_SQL = text(
+        "UPDATE events SET status = 'processing', worker_id = :worker_id, lease_expires_at = :lease_expires_at, "
+        "attempts = COALESCE(attempts, 0) + 1 WHERE id IN ("
+        "SELECT id FROM events WHERE status = 'pending' ORDER BY timestamp LIMIT :limit"
+        ") RETURNING id, user_id, user_name, session_id, event_type, item_id, rating, mood, timestamp, context"
+    ).bindparams(bindparam("lease_expires_at", type_=DateTime)).columns(
+        EventModel.id, EventModel.user_id, EventModel.user_name, EventModel.session_id, EventModel.event_type,
+        EventModel.item_id, EventModel.rating, EventModel.mood, EventModel.timestamp, EventModel.context
+    )
+
+    def __init__(self, orchestrator: Orchestrator, tick_interval: float = 5.0, batch_size: int = 100,
+                 busy_interval: float = 0.1, max_concurrency: int = 1, executor: Optional[Executor] = None,
+                 worker_id: Optional[str] = None, lease_seconds: float = 60.0, max_attempts: int = 3):
         """
         Args:
             orchestrator: The orchestrator to use for processing events
-            tick_interval: Seconds between ticks (default 5s)
+            tick_interval: Fallback poll interval when the queue is empty (default 5s);
+                in-process enqueues wake the runner immediately via notify()
+            batch_size: Max events claimed and processed per tick
+            busy_interval: Seconds to wait after a partial batch (the queue
+                just drained); after a full batch the next tick starts at once
+            max_concurrency: Max orchestrator ticks in flight; a batch is split
+                into this many lanes by user (one executor call per lane), so
+                events of one user are always processed in order
+            executor: Pool for blocking work (default: a private thread pool
+                with max_concurrency workers, shut down when run() exits)
+            worker_id: Lease owner id (default: host-pid-random, unique per runner)
+            lease_seconds: Lease length; renewed every lease_seconds / 3 while
+                the batch runs, reclaimable by other runners once expired
+            max_attempts: Claims per event before it is dead-lettered
         """
         self.orchestrator = orchestrator
         self.tick_interval = tick_interval
+        self.batch_size = batch_size
+        self.busy_interval = busy_interval
+        self.max_concurrency = max(1, max_concurrency)
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="runner"
+        )
+        self.in_flight = 0
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.total_retried = 0
+        self.total_dead = 0
+        self.total_reclaimed = 0
         self.running = False
         self.total_processed = 0
+        self.total_failed = 0
         self.total_no_work = 0
+        self.last_batch_size = 0
+        self.total_wakeups = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def notify(self) -> None:
+        """
+        Wake the runner because an event was enqueued. Safe to call from any
+        thread (sync endpoints run in a threadpool); no-op before run().
+        """
+        loop, wake = self._loop, self._wake
+        if loop is None or wake is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:
+            pass  # loop je upravo zatvoren
     
-    def get_next_event(self) -> Optional[dict]:
+    def claim_events(self, limit: int) -> List[dict]:
         """
-        Fetch the next pending event from the database queue.
-        Returns None if no events available.
+        Atomically claim up to `limit` pending events (oldest first) and mark
+        them 'processing' under this runner's lease. Expired leases of other
+        (dead) runners are released first. Returns [] if the queue is empty.
         """
         db = SessionLocal()
         try:
-            event = db.query(EventModel).filter(
-                EventModel.status == 'pending'
-            ).order_by(EventModel.timestamp).first()
-            
-            if event:
-                # Mark as processing
-                event.status = 'processing'
-                db.commit()
-                
-                # Convert to dict
-                return {
-                    'id': event.id,
-                    'user_id': event.user_id,
-                    'user_name': event.user_name or event.user_id,
-                    'session_id': event.session_id,
-                    'event_type': event.event_type,
-                    'item_id': event.item_id,
-                    'rating': event.rating,
-                    'mood': event.mood or 'neutral',
-                    'timestamp': event.timestamp,
-                    'context': event.context,
+            now = datetime.now()
+            self._release_expired_leases(db, now)
+            rows = db.execute(self.CLAIM_SQL, {
+                "limit": limit,
+                "worker_id": self.worker_id,
+                "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+            }).mappings().all()
+            db.commit()
+            events = [
+                {
+                    'id': row['id'],
+                    'user_id': row['user_id'],
+                    'user_name': row['user_name'] or row['user_id'],
+                    'session_id': row['session_id'],
+                    'event_type': row['event_type'],
+                    'item_id': row['item_id'],
+                    'rating': row['rating'],
+                    'mood': row['mood'] or 'neutral',
+                    'timestamp': row['timestamp'],
+                    'context': row['context'],
                 }
-            return None
+                for row in rows
+            ]
+            # RETURNING ne garantuje redoslijed
+            events.sort(key=lambda event: event['timestamp'] or datetime.min)
+            return events
         except Exception as e:
-            logger.error(f"Error fetching event: {e}")
+            logger.error(f"Error claiming events: {e}")
             db.rollback()
-            return None
+            return []
         finally:
             db.close()
+
+    def _release_expired_leases(self, db, now: datetime) -> None:
+        """Expired 'processing' events go back to 'pending', or to 'dead' once out of attempts."""
+        # NULL lease: event preuzet prije lease-ova (zaglavljen u 'processing')
+        expired = db.query(EventModel).filter(
+            EventModel.status == 'processing',
+            or_(EventModel.lease_expires_at.is_(None), EventModel.lease_expires_at < now),
+        )
+        dead = expired.filter(EventModel.attempts >= self.max_attempts).update(
+            {EventModel.status: 'dead', EventModel.lease_expires_at: None}, synchronize_session=False
+        )
+        reclaimed = expired.update(
+            {EventModel.status: 'pending', EventModel.worker_id: None, EventModel.lease_expires_at: None},
+            synchronize_session=False,
+        )
+        if dead or reclaimed:
+            self.total_dead += dead
+            self.total_reclaimed += reclaimed
+            logger.warning(f"Expired leases: {reclaimed} events back to pending, {dead} dead-lettered")
+
+    def renew_leases(self, event_ids: List[str]) -> int:
+        """Heartbeat: extend this runner's lease on events it still holds. Returns rows renewed."""
+        if not event_ids:
+            return 0
+        db = SessionLocal()
+        try:
+            renewed = self._owned(db.query(EventModel), event_ids).update(
+                {EventModel.lease_expires_at: datetime.now() + timedelta(seconds=self.lease_seconds)},
+                synchronize_session=False,
+            )
+            db.commit()
+            return renewed
+        except Exception as e:
+            logger.error(f"Error renewing leases of {len(event_ids)} events: {e}")
+            db.rollback()
+            return 0
+        finally:
+            db.close()
+
+    def _owned(self, query, event_ids: List[str]):
+        """Events of `event_ids` still leased by this runner (not reclaimed by another one)."""
+        return query.filter(
+            EventModel.id.in_(event_ids),
+            EventModel.status == 'processing',
+            EventModel.worker_id == self.worker_id,
+        )
+
+    def get_next_event(self) -> Optional[dict]:
+        """
+        Claim the next pending event from the database queue.
+        Returns None if no events available.
+        """
+        events = self.claim_events(1)
+        return events[0] if events else None
     
     async def tick(self):
         """
         Execute one tick of the agent cycle:
-        1. Get next event from queue
-        2. If no event → return NoWork
-        3. If event exists → process via orchestrator
+        1. Claim a batch of events from the queue
+        2. If none → return NoWork
+        3. Otherwise process each via orchestrator, then write statuses back in bulk
         """
-        event = self.get_next_event()
+        events = await self._offload(self.claim_events, self.batch_size)
+        self.last_batch_size = len(events)
         
-        if not event:
+        if not events:
             self.total_no_work += 1
             result = "NoWork"
             logger.debug(f"Tick: {result} (total no-work: {self.total_no_work})")
-        else:
+            return result
+
+        processed, failed = [], []
+        # Korisnici raspoređeni u max_concurrency lanaca; lanac redom (i korisnik redom), lanci paralelno
+        lanes: Dict[int, List[dict]] = {}
+        user_lanes: Dict[str, int] = {}
+        for event in events:
+            lane = user_lanes.setdefault(event['user_name'], len(user_lanes) % self.max_concurrency)
+            lanes.setdefault(lane, []).append(event)
+        heartbeat = asyncio.create_task(self._heartbeat([event['id'] for event in events]))
+        try:
+            for lane_processed, lane_failed in await asyncio.gather(*(
+                self._process_lane(lane_events) for lane_events in lanes.values()
+            )):
+                processed.extend(lane_processed)
+                failed.extend(lane_failed)
+        finally:
+            heartbeat.cancel()
+        await self._offload(self._mark_event_status, processed, 'processed')
+        await self._offload(self._fail_events, failed)
+        self.total_processed += len(processed)
+        self.total_failed += len(failed)
+        result = "Processed" if processed else "Failed"
+        logger.info(f"Tick: {len(processed)} processed, {len(failed)} failed "
+                    f"(total processed: {self.total_processed})")
+        return result
+
+    async def _process_lane(self, events: List[dict]):
+        """One lane in the executor; in_flight is only touched on the event loop (no lock needed)."""
+        self.in_flight += 1
+        try:
+            return await self._offload(self._process_events, events)
+        finally:
+            self.in_flight -= 1
+
+    def _process_events(self, events: List[dict]):
+        """Run orchestrator.tick for each event in order (in an executor thread); returns (processed, failed) ids."""
+        processed, failed = [], []
+        for event in events:
             try:
-                result = self.orchestrator.tick(event)
-                self._mark_event_status(event['id'], 'processed')
-                self.total_processed += 1
-                logger.info(f"Tick: {result} - Event {event['id']} (total processed: {self.total_processed})")
+                self.orchestrator.tick(event)
+                processed.append(event['id'])
             except Exception as e:
-                self._mark_event_status(event['id'], 'failed')
+                failed.append(event['id'])
                 logger.error(f"Error processing event {event['id']}: {e}")
-                result = "Failed"
-        
-        return result
+        return processed, failed
+
+    async def _heartbeat(self, event_ids: List[str]) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            # Van runner executor-a: ne smije čekati iza zauzetih orchestrator tick-ova
+            await asyncio.to_thread(self.renew_leases, event_ids)
+
+    async def _offload(self, func, *args):
+        """Run blocking `func(*args)` in the executor without blocking the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def _mark_event_status(self, event_ids: Union[str, Iterable[str]], status: str) -> None:
+        """
+        Set the status of one or many events in a single UPDATE and release
+        their lease. Events whose lease was reclaimed by another runner are
+        left alone.
+        """
+        event_ids = [event_ids] if isinstance(event_ids, str) else list(event_ids)
+        if not event_ids:
+            return
+        db = SessionLocal()
+        try:
+            self._owned(db.query(EventModel), event_ids).update(
+                {EventModel.status: status, EventModel.lease_expires_at: None}, synchronize_session=False
+            )
+            db.commit()
+        except Exception as e:
+            logger.error(f"Error updating status of {len(event_ids)} events -> {status}: {e}")
+            db.rollback()
+        finally:
+            db.close()
 
-    def _mark_event_status(self, event_id: str, status: str) -> None:
+    def _fail_events(self, event_ids: List[str]) -> None:
+        """Failed events are retried (back to 'pending') until max_attempts, then dead-lettered."""
+        if not event_ids:
+            return
         db = SessionLocal()
         try:
-            event = db.query(EventModel).filter(EventModel.id == event_id).first()
-            if event:
-                event.status = status
-                db.commit()
+            owned = self._owned(db.query(EventModel), event_ids)
+            dead = owned.filter(EventModel.attempts >= self.max_attempts).update(
+                {EventModel.status: 'dead', EventModel.lease_expires_at: None}, synchronize_session=False
+            )
+            retried = owned.update(
+                {EventModel.status: 'pending', EventModel.worker_id: None, EventModel.lease_expires_at: None},
+                synchronize_session=False,
+            )
+            db.commit()
+            self.total_dead += dead
+            self.total_retried += retried
         except Exception as e:
-            logger.error(f"Error updating event status {event_id} -> {status}: {e}")
+            logger.error(f"Error failing {len(event_ids)} events: {e}")
             db.rollback()
         finally:
             db.close()
+
+    def _next_sleep(self, result: str) -> float:
+        """Adaptive pause: none while batches come back full, short after a partial one, long when idle."""
+        if result == "NoWork":
+            return self.tick_interval
+        if self.last_batch_size >= self.batch_size:
+            return 0.0
+        return self.busy_interval
     
     async def run(self):
         """
@@ -114,33 +330,61 @@ class BackgroundRunner:
         Implements sleep during NoWork to avoid CPU waste.
         """
         self.running = True
-        logger.info(f"Background runner started (tick interval: {self.tick_interval}s)")
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        logger.info(f"Background runner started (fallback poll: {self.tick_interval}s)")
         
-        while self.running:
-            try:
-                result = await self.tick()
-                
-                # If NoWork, sleep longer to avoid wasting resources
-                if result == "NoWork":
+        try:
+            while self.running:
+                try:
+                    # Clear prije claim-a: notify() koji stigne tokom tick-a budi sljedeći wait odmah
+                    self._wake.clear()
+                    result = await self.tick()
+
+                    # NoWork → čekaj notify() ili fallback poll; pun batch → odmah dalje
+                    await self._wait(self._next_sleep(result))
+
+                except Exception as e:
+                    logger.error(f"Error in runner loop: {e}", exc_info=True)
                     await asyncio.sleep(self.tick_interval)
-                else:
-                    # If processing, shorter sleep for responsiveness
-                    await asyncio.sleep(1.0)
-                    
-            except Exception as e:
-                logger.error(f"Error in runner loop: {e}", exc_info=True)
-                await asyncio.sleep(self.tick_interval)
+        finally:
+            if self._owns_executor:
+                self.executor.shutdown(wait=False)
+
+    async def _wait(self, timeout: float) -> None:
+        """Sleep up to `timeout` seconds, returning early when notify() fires."""
+        if timeout <= 0:
+            await asyncio.sleep(0)
+            return
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+            self.total_wakeups += 1
+        except asyncio.TimeoutError:
+            pass
     
     def stop(self):
         """Stop the runner gracefully."""
         logger.info(f"Stopping runner (processed: {self.total_processed}, no-work: {self.total_no_work})")
         self.running = False
+        self.notify()
     
     def get_stats(self) -> dict:
         """Get runner statistics."""
         return {
             "running": self.running,
             "total_processed": self.total_processed,
+            "total_failed": self.total_failed,
             "total_no_work": self.total_no_work,
-            "tick_interval": self.tick_interval
+            "tick_interval": self.tick_interval,
+            "batch_size": self.batch_size,
+            "last_batch_size": self.last_batch_size,
+            "total_wakeups": self.total_wakeups,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "worker_id": self.worker_id,
+            "lease_seconds": self.lease_seconds,
+            "max_attempts": self.max_attempts,
+            "total_retried": self.total_retried,
+            "total_dead": self.total_dead,
+            "total_reclaimed": self.total_reclaimed
         }
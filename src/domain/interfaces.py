@@ -1,11 +1,17 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
 
 class Recommender(ABC):
     @abstractmethod
     def recommend(self, user_name: str, mood: str = "neutral", n: int = 10) -> List[Dict[str, Any]]:
         pass
 
+    def recommend_batch(self, requests: Iterable[Tuple[str, str]],
+                        n: int = 10) -> Iterator[Tuple[str, str, List[Dict[str, Any]]]]:
+        """(user_name, mood, recommendations) per (user_name, mood) request, in order."""
+        for user_name, mood in requests:
+            yield user_name, mood, self.recommend(user_name, mood, n)
+
 class Learner(ABC):
     @abstractmethod
     def learn(self, event: Dict[str, Any]) -> None:
@@ -0,0 +1,117 @@
+"""
+Explicit-feedback matrix factorization with alternating least squares.
+
+Ratings are modelled as `mean + user_factors[u] @ item_factors[i]`, fitted
+only on observed entries with weighted-lambda regularization (the ridge term
+is scaled by each row's number of ratings). Each half-step solves one small
+n_factors × n_factors system per user (or item): right-hand sides come from
+one sparse × dense product, and all systems are solved in one batched
+np.linalg.solve.
+
+A user who is not part of the fitted model is folded in with the same
+single least-squares solve against the fixed item factors, so new feedback
+never needs a retrain.
+"""
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+from scipy import sparse
+
+from src.infrastructure.ratings_store import SparseRatingsStore
+
+
+class ALSModel:
+    """
+    Args:
+        n_factors: embedding size
+        regularization: weighted-lambda ridge strength
+        iterations: alternating sweeps (users, then items)
+        seed: seed for the initial item factors
+    """
+
+    def __init__(self, n_factors: int = 32, regularization: float = 0.1, iterations: int = 10, seed: int = 42):
+        self.n_factors = n_factors
+        self.regularization = regularization
+        self.iterations = iterations
+        self.seed = seed
+        self.mean = 0.0
+        self.user_factors: Optional[np.ndarray] = None  # n_users × n_factors (float32)
+        self.item_factors: Optional[np.ndarray] = None  # n_items × n_factors (float32)
+        self.item_counts: Optional[np.ndarray] = None  # broj ocjena po koloni
+
+    def fit(self, ratings: SparseRatingsStore) -> "ALSModel":
+        store = ratings.compact() if ratings.overlay_rows else ratings
+        users = sparse.csr_matrix(store.matrix, dtype=np.float32)
+        items = users.T.tocsr()
+        self.mean = float(users.data.mean()) if users.nnz else 0.0
+        self.item_counts = np.diff(items.indptr)
+        rng = np.random.default_rng(self.seed)
+        self.item_factors = (rng.standard_normal((items.shape[0], self.n_factors)) * 0.1).astype(np.float32)
+        self.user_factors = np.zeros((users.shape[0], self.n_factors), dtype=np.float32)
+        for _ in range(self.iterations):
+            self.user_factors = self._solve_rows(users, self.item_factors)
+            self.item_factors = self._solve_rows(items, self.user_factors)
+        return self
+
+    def fold_in(self, cols: Iterable[int], values: Iterable[float]) -> np.ndarray:
+        """Factors for a user with the given (column, rating) history, item factors kept fixed."""
+        cols = np.fromiter(cols, dtype=np.int64)
+        values = np.fromiter(values, dtype=np.float32, count=len(cols))
+        if not len(cols):
+            return np.zeros(self.n_factors, dtype=np.float32)
+        row = sparse.csr_matrix((values, cols, [0, len(cols)]), shape=(1, len(self.item_factors)))
+        return self._solve_rows(row, self.item_factors)[0]
+
+    def fold_in_many(self, histories: List[Tuple[List[int], List[float]]]) -> np.ndarray:
+        """fold_in for many (cols, values) histories; all systems in one batched solve."""
+        indptr = np.zeros(len(histories) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(cols) for cols, _ in histories])
+        matrix = sparse.csr_matrix(
+            (np.fromiter((v for _, values in histories for v in values), dtype=np.float32, count=indptr[-1]),
+             np.fromiter((c for cols, _ in histories for c in cols), dtype=np.int64, count=indptr[-1]),
+             indptr),
+            shape=(len(histories), len(self.item_factors)),
+        )
+        return self._solve_rows(matrix, self.item_factors)
+
+    def predict(self, user_vector: np.ndarray) -> np.ndarray:
+        """Predicted rating for every item column."""
+        return self.item_factors @ user_vector + self.mean
+
+    def predict_many(self, user_vectors: np.ndarray) -> np.ndarray:
+        """len(user_vectors) × n_items predictions in one matrix-matrix product."""
+        return user_vectors @ self.item_factors.T + self.mean
+
+    def rmse(self, ratings: SparseRatingsStore) -> float:
+        """Training RMSE over the observed entries of the fitted rows."""
+        coo = ratings.matrix.tocoo()
+        if not coo.nnz:
+            return 0.0
+        predicted = np.einsum('ij,ij->i', self.user_factors[coo.row], self.item_factors[coo.col]) + self.mean
+        return float(np.sqrt(np.mean((predicted - coo.data) ** 2)))
+
+    def memory_bytes(self) -> int:
+        return self.user_factors.nbytes + self.item_factors.nbytes
+
+    def _solve_rows(self, matrix: sparse.csr_matrix, fixed: np.ndarray) -> np.ndarray:
+        """Ridge solution per row of `matrix` against the fixed factors (rows without ratings stay 0)."""
+        n_rows = matrix.shape[0]
+        solved = np.zeros((n_rows, self.n_factors), dtype=np.float32)
+        counts = np.diff(matrix.indptr)
+        rows = np.flatnonzero(counts)
+        if not len(rows):
+            return solved
+        fixed = fixed.astype(np.float64)
+        # Desne strane za sve redove odjednom: (R - mean) @ F
+        residuals = matrix.copy().astype(np.float64)
+        residuals.data -= self.mean
+        rhs = np.asarray(residuals[rows] @ fixed)
+        # Gram matrica po redu je jedan BLAS poziv (f × m @ m × f); brže od nnz × f × f outer produkata
+        gram = np.empty((len(rows), self.n_factors, self.n_factors))
+        indptr, indices = matrix.indptr, matrix.indices
+        for position, row in enumerate(rows):
+            factors = fixed[indices[indptr[row]:indptr[row + 1]]]
+            np.matmul(factors.T, factors, out=gram[position])
+        gram += self.regularization * counts[rows][:, None, None] * np.eye(self.n_factors)
+        # Svi f × f sistemi u jednom batched solve
+        solved[rows] = np.linalg.solve(gram, rhs[:, :, None])[:, :, 0]
+        return solved
@@ -0,0 +1,167 @@
+from typing import Optional
+import numpy as np
+
+from src.infrastructure.recommender_impl import MLRecommender, ModelSnapshot
+from src.infrastructure.als import ALSModel
+from src.infrastructure.ann_index import top_k
+
+
+class ALSRecommender(MLRecommender):
+    """
+    Latent-factor recommender (matrix factorization with ALS).
+
+    User and item embeddings are learned from ratings.csv plus FeedbackModel
+    on full rebuilds. At request time the user's feedback history is folded
+    in against the fixed item factors (one f × f solve), and scoring is one
+    dense n_items × f mat-vec instead of a scan over the user × item matrix.
+    Feedback deltas between rebuilds need no retrain: the next request folds
+    the new ratings in. Data loading, snapshots, the background refresher and
+    the popularity fallback are shared with MLRecommender.
+    """
+
+    def __init__(self, refresh_window: Optional[float] = None, n_factors: int = 32,
+                 regularization: float = 0.1, iterations: int = 10, min_item_ratings: int = 10,
+                 min_predicted_rating: float = 3.5, **kwargs):
+        """
+        Args:
+            refresh_window: see MLRecommender
+            n_factors: embedding size
+            regularization: ALS ridge strength (scaled by ratings per row)
+            iterations: ALS sweeps per rebuild
+            min_item_ratings: items with fewer ratings are never recommended
+                (their factors are mostly regularization noise)
+            min_predicted_rating: predictions below this are not recommended
+            **kwargs: passed to MLRecommender
+        """
+        self.n_factors = n_factors
+        self.regularization = regularization
+        self.iterations = iterations
+        self.min_item_ratings = min_item_ratings
+        self.min_predicted_rating = min_predicted_rating
+        super().__init__(refresh_window=refresh_window, **kwargs)
+
+    def _build_snapshot(self, deltas: list, full_reload: bool = False) -> ModelSnapshot:
+        """
+        Same as MLRecommender, plus the factor model. Factors are only
+        retrained on full rebuilds; deltas are folded in per request.
+        """
+        current = self._snapshot
+        snapshot = super()._build_snapshot(deltas, full_reload)
+        if full_reload or current is None:
+            snapshot.factors = ALSModel(
+                self.n_factors, self.regularization, self.iterations
+            ).fit(snapshot.ratings)
+            print(f"[ML] ALS trained: {self.n_factors} factors, "
+                  f"train RMSE {snapshot.factors.rmse(snapshot.ratings.compact()):.3f}, "
+                  f"{snapshot.factors.memory_bytes() / 1e6:.1f} MB")
+        else:
+            snapshot.factors = current.factors
+        return snapshot
+
+    def _snapshot_config(self) -> dict:
+        return {**super()._snapshot_config(), "n_factors": self.n_factors,
+                "regularization": self.regularization, "iterations": self.iterations}
+
+    def _snapshot_arrays(self, snapshot: ModelSnapshot) -> dict:
+        factors = snapshot.factors
+        return {
+            "als_user_factors": factors.user_factors,
+            "als_item_factors": factors.item_factors,
+            "als_item_counts": factors.item_counts,
+            "als_mean": np.array([factors.mean]),
+        }
+
+    def _restore_snapshot_arrays(self, snapshot: ModelSnapshot, arrays: dict) -> None:
+        factors = ALSModel(self.n_factors, self.regularization, self.iterations)
+        factors.user_factors = arrays["als_user_factors"]
+        factors.item_factors = arrays["als_item_factors"]
+        factors.item_counts = arrays["als_item_counts"]
+        factors.mean = float(arrays["als_mean"][0])
+        snapshot.factors = factors
+
+    def _get_collaborative_recommendations(self, user_name: str, liked: list, disliked: list, count: int, mood: str,
+                                           snapshot: Optional[ModelSnapshot] = None) -> list[dict]:
+        """Fold-in korisnika iz feedback historije pa skor = item_factors @ user_vector."""
+        try:
+            snapshot = snapshot or self._snapshot
+            factors = snapshot.factors
+            cols, values = self._history(user_name, liked, disliked, snapshot)
+            if not cols:
+                return []
+            scores = factors.predict(factors.fold_in(cols, values))
+        except Exception as e:
+            print(f"[ML] Error in ALS recommendations: {e}")
+            return []
+        return self._rank(scores, cols, count, mood, snapshot)
+
+    def _get_collaborative_batch(self, queries: list, snapshot: ModelSnapshot) -> list[list[dict]]:
+        """Fold-in svih korisnika jednim batched solve-om, skorovi jednim mat-mat proizvodom."""
+        results = [[] for _ in queries]
+        try:
+            factors = snapshot.factors
+            histories = [self._history(user_name, liked, disliked, snapshot)
+                         for user_name, liked, disliked, _, _ in queries]
+            active = [i for i, (cols, _) in enumerate(histories) if cols]
+            if not active:
+                return results
+            scores = factors.predict_many(factors.fold_in_many([histories[i] for i in active]))
+        except Exception as e:
+            print(f"[ML] Error in ALS recommendations: {e}")
+            return results
+        for position, i in enumerate(active):
+            _, _, _, count, mood = queries[i]
+            results[i] = self._rank(scores[position], histories[i][0], count, mood, snapshot)
+        return results
+
+    def _history(self, user_name: str, liked: list, disliked: list, snapshot: ModelSnapshot):
+        """(cols, values): sav feedback korisnika + liked/disliked za ovaj mood (kao 5 / 1)."""
+        ratings = snapshot.ratings
+        history = dict(snapshot.user_ratings.get(user_name, {}))
+        history.update({item: 5.0 for item in liked})
+        history.update({item: 1.0 for item in disliked})
+        cols, values = [], []
+        for item_id, rating in history.items():
+            col = ratings.col_of(item_id)
+            if col is not None:
+                cols.append(col)
+                values.append(rating)
+        return cols, values
+
+    def _rank(self, scores: np.ndarray, cols: list, count: int, mood: str, snapshot: ModelSnapshot) -> list[dict]:
+        recommendations = []
+        try:
+            ratings = snapshot.ratings
+            factors = snapshot.factors
+
+            # Isključi ocijenjene i rijetke filmove, primijeni mood masku prije top-k
+            candidate = (factors.item_counts >= self.min_item_ratings) & (scores >= self.min_predicted_rating)
+            candidate[cols] = False
+            candidate_cols = np.flatnonzero(candidate)
+            candidate_cols = candidate_cols[self.genre_index.matches(candidate_cols, mood)]
+            top_cols = candidate_cols[top_k(scores[candidate_cols], count)]
+
+            for col in top_cols:
+                movie_id = int(ratings.item_ids[col])
+                recommendations.append({
+                    "item_id": str(movie_id),
+                    "title": self.catalog.title(movie_id),
+                    "year": self.catalog.year(movie_id),
+                    "genres": self.catalog.genres_of(movie_id),
+                    "score": float(min(scores[col], 5.0)),
+                    "reason": "Predicted from your taste profile",
+                    "llm_description": self.get_llm_description(self.catalog.title(movie_id), self.catalog.genres_of(movie_id)),
+                    "agent_mood": "⭐ Based on your taste!"
+                })
+        except Exception as e:
+            print(f"[ML] Error in ALS recommendations: {e}")
+
+        return recommendations[:count]
+
+    def get_model_stats(self) -> dict:
+        stats = super().get_model_stats()
+        factors = getattr(self._snapshot, "factors", None)
+        stats["factors"] = {
+            "n_factors": factors.n_factors,
+            "memory_bytes": factors.memory_bytes(),
+        } if factors is not None else None
+        return stats
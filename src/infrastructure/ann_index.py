@@ -0,0 +1,326 @@
+"""
+Similar-user lookup indexes.
+
+`ExactUserIndex` is the brute-force cosine scan over all rows.
+`LSHUserIndex` is a random-hyperplane (SimHash) LSH index: every user row is
+hashed into one bucket per table, a query only re-ranks the users that share
+a bucket (or a bucket within `n_probes` bit flips) with it, so lookups touch
+a small fraction of the user base. Re-ranking is exact cosine on the
+candidates, so the index only affects recall, never the scores.
+
+Indexes are fitted on a full model build and then kept current with
+`update(ratings, rows)` for rows touched by feedback. `update` never modifies
+the index it is called on (an older model snapshot may still be searching
+it): it returns a new index that shares every untouched bucket shard and
+row-code block with the old one, so its cost depends on the changed rows,
+not on the number of users.
+"""
+from abc import ABC, abstractmethod
+import copy
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+from src.infrastructure.block_array import BlockArray
+from src.infrastructure.ratings_store import SparseRatingsStore
+
+
+class UserIndex(ABC):
+    """Finds the rows most cosine-similar to a query vector."""
+
+    @abstractmethod
+    def fit(self, ratings: SparseRatingsStore) -> "UserIndex":
+        pass
+
+    @abstractmethod
+    def update(self, ratings: SparseRatingsStore, rows: Iterable[int]) -> "UserIndex":
+        """Index with new rows inserted / changed rows re-hashed; this index is left unchanged."""
+        pass
+
+    @abstractmethod
+    def search(self, ratings: SparseRatingsStore, vector: np.ndarray, k: int,
+               exclude_row: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, similarities) of the k most similar rows, best first."""
+        pass
+
+    def search_many(self, ratings: SparseRatingsStore, vectors: np.ndarray, k: int,
+                    exclude_rows: Optional[List[Optional[int]]] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """`search` for each of many query vectors (one search per query unless overridden)."""
+        exclude_rows = exclude_rows or [None] * len(vectors)
+        return [self.search(ratings, vector, k, exclude_row) for vector, exclude_row in zip(vectors, exclude_rows)]
+
+    def get_stats(self) -> dict:
+        return {"type": type(self).__name__}
+
+
+def top_k(values: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest values, sorted descending (ties by index), via argpartition."""
+    k = min(k, len(values))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(values):
+        top = np.argpartition(-values, k - 1)[:k]
+    else:
+        top = np.arange(len(values))
+    return top[np.lexsort((top, -values[top]))]
+
+
+class ExactUserIndex(UserIndex):
+    """Brute force: one cosine mat-vec over every row."""
+
+    def fit(self, ratings: SparseRatingsStore) -> "ExactUserIndex":
+        return self
+
+    def update(self, ratings: SparseRatingsStore, rows: Iterable[int]) -> "ExactUserIndex":
+        # Nema stanja: svaka pretraga skenira store koji dobije
+        return self
+
+    def search(self, ratings, vector, k, exclude_row=None):
+        similarities = ratings.cosine(vector)
+        if exclude_row is not None:
+            similarities[exclude_row] = -np.inf
+        return self._top(similarities, k)
+
+    def search_many(self, ratings, vectors, k, exclude_rows=None):
+        """All queries in one sparse matrix-matrix product."""
+        exclude_rows = exclude_rows or [None] * len(vectors)
+        similarities = ratings.cosine_many(vectors)
+        results = []
+        for i, exclude_row in enumerate(exclude_rows):
+            column = similarities[:, i].copy()
+            if exclude_row is not None:
+                column[exclude_row] = -np.inf
+            results.append(self._top(column, k))
+        return results
+
+    @staticmethod
+    def _top(similarities: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        rows = top_k(similarities, k)
+        rows = rows[np.isfinite(similarities[rows])]
+        return rows, similarities[rows]
+
+
+class _Buckets:
+    """
+    code -> rows (int64 array) of one LSH table, split into shards by the low
+    code bits. A copy shares every shard; changing a bucket copies only its
+    shard dict and replaces the bucket array (bucket arrays are never
+    modified in place).
+    """
+
+    def __init__(self, shard_bits: int):
+        self.mask = (1 << shard_bits) - 1
+        self.shards: List[Dict[int, np.ndarray]] = [{} for _ in range(1 << shard_bits)]
+        self._owned = set(range(len(self.shards)))
+
+    @classmethod
+    def from_codes(cls, codes: np.ndarray, shard_bits: int) -> "_Buckets":
+        """Buckets of rows 0..len(codes)-1 (one grouping sort instead of a Python loop per row)."""
+        buckets = cls(shard_bits)
+        order = np.argsort(codes, kind='stable')
+        unique, starts = np.unique(codes[order], return_index=True)
+        for code, rows in zip(unique.tolist(), np.split(order.astype(np.int64), starts[1:])):
+            buckets.shards[code & buckets.mask][code] = rows
+        return buckets
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+    def get(self, code: int) -> Optional[np.ndarray]:
+        return self.shards[code & self.mask].get(code)
+
+    def copy(self) -> "_Buckets":
+        clone = _Buckets.__new__(_Buckets)
+        clone.mask = self.mask
+        clone.shards = list(self.shards)
+        clone._owned = set()
+        self._owned = set()
+        return clone
+
+    def add(self, code: int, row: int) -> None:
+        shard = self._own(code)
+        bucket = shard.get(code)
+        shard[code] = np.array([row], dtype=np.int64) if bucket is None else np.append(bucket, row)
+
+    def remove(self, code: int, row: int) -> None:
+        shard = self._own(code)
+        bucket = shard.get(code)
+        if bucket is None:
+            return
+        bucket = bucket[bucket != row]
+        if len(bucket):
+            shard[code] = bucket
+        else:
+            del shard[code]
+
+    def _own(self, code: int) -> Dict[int, np.ndarray]:
+        shard = code & self.mask
+        if shard not in self._owned:
+            self.shards[shard] = dict(self.shards[shard])
+            self._owned.add(shard)
+        return self.shards[shard]
+
+
+class LSHUserIndex(UserIndex):
+    """
+    Random-hyperplane LSH over user rows.
+
+    Args:
+        n_tables: number of hash tables (more = higher recall, more candidates)
+        n_bits: hyperplanes per table (more = smaller buckets, lower recall)
+        n_probes: also probe buckets whose code differs in up to this many
+            bits (0 or 1); raises recall without more tables
+        min_candidates: if fewer candidates than max(k, min_candidates) are
+            found, fall back to the exact scan so results are never short
+        seed: seed for the hyperplanes
+    """
+
+    def __init__(self, n_tables: int = 16, n_bits: int = 14, n_probes: int = 1,
+                 min_candidates: int = 0, seed: int = 42):
+        if n_bits > 62:
+            raise ValueError("n_bits must be <= 62")
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.n_probes = n_probes
+        self.min_candidates = min_candidates
+        self.seed = seed
+        self.planes: Optional[np.ndarray] = None  # n_items × (n_tables * n_bits)
+        self.offsets: Optional[np.ndarray] = None  # prag po hiperravni (medijan projekcija)
+        self.tables: List[_Buckets] = []
+        # Kod reda po tabeli na poziciji row * n_tables + table (-1: red nije hash-iran)
+        self.row_codes = BlockArray(dtype=np.int64)
+        self._bit_weights = (1 << np.arange(n_bits, dtype=np.int64))
+        # Brojači pretraga; dijele ih sve verzije indeksa nastale iz update()
+        self._counters = {"searches": 0, "candidates": 0, "fallbacks": 0}
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.row_codes) // self.n_tables
+
+    def fit(self, ratings: SparseRatingsStore, chunk_size: int = 65536) -> "LSHUserIndex":
+        rng = np.random.default_rng(self.seed)
+        self.planes = rng.standard_normal((ratings.n_items, self.n_tables * self.n_bits)).astype(np.float32)
+        # Ocjene su nenegativne pa su projekcije pristrasne; prag = medijan projekcija
+        # normalizovanih redova daje balansirane bucket-e
+        n_base = ratings.matrix.shape[0]
+        sample = np.arange(0, n_base, max(1, n_base // 10000))
+        self.offsets = np.zeros(self.planes.shape[1], dtype=np.float32)
+        if len(sample):
+            self.offsets = np.median(self._project(ratings, ratings.matrix[sample], sample), axis=0).astype(np.float32)
+        # CSR dio u blokovima (projekcija je gusta n_rows × n_tables*n_bits), pa redovi iza CSR-a
+        codes = np.empty((ratings.n_users, self.n_tables), dtype=np.int64)
+        for start in range(0, n_base, chunk_size):
+            rows = np.arange(start, min(start + chunk_size, n_base))
+            codes[rows] = self._codes(self._project(ratings, ratings.matrix[rows], rows)).T
+        rows = np.arange(n_base, ratings.n_users)
+        if len(rows):
+            codes[rows] = self._codes(self._project(ratings, ratings.rows_matrix(rows), rows)).T
+        self.tables = [_Buckets.from_codes(codes[:, table], self.n_bits // 2) for table in range(self.n_tables)]
+        self.row_codes = BlockArray(codes.ravel(), dtype=np.int64)
+        return self
+
+    def update(self, ratings: SparseRatingsStore, rows: Iterable[int]) -> "LSHUserIndex":
+        """
+        New index with new rows inserted and changed rows re-hashed (overlay
+        rows included). Only the bucket shards and row-code blocks of the
+        changed rows are copied; this index is left unchanged.
+        """
+        rows = np.fromiter(rows, dtype=np.int64)
+        if not len(rows) or self.planes is None:
+            return self
+        new_codes = self._codes(self._project(ratings, ratings.rows_matrix(rows), rows)).T.ravel()
+        slots = (rows[:, None] * self.n_tables + np.arange(self.n_tables)).ravel()
+        old_codes = np.full(len(slots), -1, dtype=np.int64)
+        known = slots < len(self.row_codes)
+        old_codes[known] = self.row_codes.take(slots[known])
+
+        index = copy.copy(self)  # hiperravni, pragovi i brojači su zajednički
+        index.tables = [buckets.copy() for buckets in self.tables]
+        index.row_codes = self.row_codes.copy()
+        if slots.max() >= len(index.row_codes):
+            index.row_codes.put(np.arange(len(index.row_codes), slots.max() + 1), -1)
+        for i in np.flatnonzero(old_codes != new_codes).tolist():
+            row, table = int(rows[i // self.n_tables]), i % self.n_tables
+            if old_codes[i] >= 0:
+                index.tables[table].remove(int(old_codes[i]), row)
+            index.tables[table].add(int(new_codes[i]), row)
+        index.row_codes.put(slots, new_codes)
+        return index
+
+    def search(self, ratings, vector, k, exclude_row=None):
+        counters = self._counters
+        counters["searches"] += 1
+        vector_norm = float(np.linalg.norm(vector))
+        if vector_norm == 0.0:
+            # Prazan vektor nema smjer; exact put vraća sve sličnosti 0 bez mat-vec-a
+            counters["fallbacks"] += 1
+            return ExactUserIndex().search(ratings, vector, k, exclude_row)
+        candidates = self.candidates(vector)
+        candidates = candidates[candidates < ratings.n_users]
+        if exclude_row is not None:
+            candidates = candidates[candidates != exclude_row]
+        if len(candidates) < max(k, self.min_candidates):
+            counters["fallbacks"] += 1
+            return ExactUserIndex().search(ratings, vector, k, exclude_row)
+        counters["candidates"] += len(candidates)
+
+        # Exact cosine re-rank samo nad kandidatima
+        query = (vector / vector_norm).astype(np.float32, copy=False)
+        similarities = (ratings.rows_matrix(candidates) @ query) * ratings.inv_norms[candidates]
+        order = top_k(similarities, k)
+        return candidates[order], similarities[order]
+
+    def candidates(self, vector: np.ndarray) -> np.ndarray:
+        """Rows sharing a (probed) bucket with the query in any table."""
+        vector = np.asarray(vector, dtype=np.float32)
+        vector_norm = float(np.linalg.norm(vector))
+        projection = (vector @ self.planes) * (1.0 / vector_norm if vector_norm else 0.0)
+        codes = self._codes(projection[None, :])[:, 0]
+        found = []
+        for table, buckets in enumerate(self.tables):
+            code = int(codes[table])
+            probes = [code]
+            if self.n_probes >= 1:
+                probes.extend(code ^ (1 << bit) for bit in range(self.n_bits))
+            for probe in probes:
+                bucket = buckets.get(probe)
+                if bucket is not None:
+                    found.append(bucket)
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def get_stats(self) -> dict:
+        counters = self._counters
+        return {
+            "type": type(self).__name__,
+            "n_tables": self.n_tables,
+            "n_bits": self.n_bits,
+            "n_probes": self.n_probes,
+            "rows": self.n_rows,
+            "buckets": sum(len(buckets) for buckets in self.tables),
+            "total_searches": counters["searches"],
+            "avg_candidates": counters["candidates"] / max(counters["searches"] - counters["fallbacks"], 1),
+            "total_fallbacks": counters["fallbacks"],
+        }
+
+    def _project(self, ratings: SparseRatingsStore, block, rows: np.ndarray) -> np.ndarray:
+        """Projections of L2-normalized rows onto the hyperplanes."""
+        return np.asarray(block @ self.planes) * ratings.inv_norms[rows][:, None]
+
+    def _codes(self, projections) -> np.ndarray:
+        """n_tables × n_rows integer bucket codes from the projections' side of each hyperplane."""
+        projections = np.asarray(projections)
+        bits = (projections > self.offsets).reshape(len(projections), self.n_tables, self.n_bits)
+        return (bits.astype(np.int64) @ self._bit_weights).T
+
+
+USER_INDEXES = {
+    "exact": ExactUserIndex,
+    "lsh": LSHUserIndex,
+}
+
+
+def create_user_index(kind: str = "exact", **params) -> UserIndex:
+    if kind not in USER_INDEXES:
+        raise ValueError(f"Unknown user index: {kind} (choose from {', '.join(USER_INDEXES)})")
+    return USER_INDEXES[kind](**params)
@@ -0,0 +1,124 @@
+"""
+Copy-on-write numeric array shared between model snapshots.
+
+Every model refresh copies the published ratings store and patches a few
+entries of its per-column and per-row caches. Copying a whole float array
+per rating costs O(items + users); a BlockArray keeps the values in
+fixed-size blocks instead, so a copy only duplicates the list of block
+references and a write copies just the block it touches.
+"""
+from typing import List, Optional
+import numpy as np
+
+
+class BlockArray:
+    """
+    1-D array stored as fixed-size blocks that copies share.
+
+    A block is written in place only by the copy that owns it: `copy()`
+    takes ownership away from both sides, and the next write to a shared
+    block copies that block first. `array()` returns the values as one
+    read-only ndarray (concatenated once, cached until the next write).
+    """
+
+    block_size = 1024
+
+    def __init__(self, values=(), dtype=np.float64):
+        values = np.asarray(values, dtype=dtype).ravel()
+        self.dtype = values.dtype
+        self.size = len(values)
+        n_blocks = -(-self.size // self.block_size)
+        padded = np.zeros(n_blocks * self.block_size, dtype=self.dtype)
+        padded[:self.size] = values
+        self._blocks: List[np.ndarray] = [padded[start:start + self.block_size]
+                                          for start in range(0, len(padded), self.block_size)]
+        self._owned = set(range(n_blocks))
+        self._dense: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._blocks) * self.block_size * self.dtype.itemsize
+
+    def copy(self) -> "BlockArray":
+        """Copy that shares every block (O(number of blocks), values are not copied)."""
+        clone = BlockArray.__new__(BlockArray)
+        clone.dtype = self.dtype
+        clone.size = self.size
+        clone._blocks = list(self._blocks)
+        clone._owned = set()
+        clone._dense = self._dense
+        # Blokovi su sada dijeljeni: ni original ih više ne mijenja u mjestu
+        self._owned = set()
+        return clone
+
+    def array(self) -> np.ndarray:
+        """All values as one read-only ndarray."""
+        dense = self._dense
+        if dense is None:
+            if self._blocks:
+                dense = np.concatenate(self._blocks)[:self.size]
+            else:
+                dense = np.empty(0, dtype=self.dtype)
+            dense.flags.writeable = False
+            self._dense = dense
+        return dense
+
+    def get(self, index: int):
+        return self._blocks[index // self.block_size][index % self.block_size]
+
+    def set(self, index: int, value) -> None:
+        self._own(index // self.block_size)[index % self.block_size] = value
+        self._dense = None
+
+    def add(self, index: int, delta) -> None:
+        self._own(index // self.block_size)[index % self.block_size] += delta
+        self._dense = None
+
+    def take(self, indices) -> np.ndarray:
+        """Values at the given indices (a copy)."""
+        indices = np.asarray(indices, dtype=np.int64)
+        if self._dense is not None:
+            return self._dense[indices]
+        out = np.empty(len(indices), dtype=self.dtype)
+        blocks = indices // self.block_size
+        for block in np.unique(blocks):
+            selected = blocks == block
+            out[selected] = self._blocks[block][indices[selected] - block * self.block_size]
+        return out
+
+    def put(self, indices, values) -> None:
+        """Set many values; indices past the end grow the array (gaps are 0)."""
+        indices = np.asarray(indices, dtype=np.int64)
+        if not len(indices):
+            return
+        values = np.broadcast_to(np.asarray(values, dtype=self.dtype), indices.shape)
+        self.resize(max(self.size, int(indices.max()) + 1))
+        blocks = indices // self.block_size
+        for block in np.unique(blocks):
+            selected = blocks == block
+            self._own(int(block))[indices[selected] - block * self.block_size] = values[selected]
+        self._dense = None
+
+    def append(self, value) -> None:
+        self.resize(self.size + 1)
+        self.set(self.size - 1, value)
+
+    def resize(self, size: int) -> None:
+        """Grow to `size` values (new values are 0); never shrinks."""
+        if size <= self.size:
+            return
+        while len(self._blocks) * self.block_size < size:
+            self._owned.add(len(self._blocks))
+            self._blocks.append(np.zeros(self.block_size, dtype=self.dtype))
+        self.size = size
+        self._dense = None
+
+    def _own(self, block: int) -> np.ndarray:
+        """The block, copied first if another copy may still read it."""
+        if block not in self._owned:
+            self._blocks[block] = self._blocks[block].copy()
+            self._owned.add(block)
+        return self._blocks[block]
@@ -1,12 +1,27 @@
-from sqlalchemy import create_engine, Column, String, DateTime, Text, Integer
+from sqlalchemy import create_engine, event, inspect, text, Column, String, DateTime, Text, Integer, Index, DDL
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import asyncio
 import os
+import weakref
+from typing import Optional
 
 Base = declarative_base()
 
+DATABASE_URL = 'sqlite:///data/feedback.db'
+# Ista baza preko aiosqlite-a za async endpoint-e
+ASYNC_DATABASE_URL = 'sqlite+aiosqlite:///data/feedback.db'
+# SQLite čita stranice preko mmap-a do ove veličine (bajtovi)
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+
 class EventModel(Base):
     __tablename__ = 'events'
+    __table_args__ = (
+        # Runner uzima najstariji pending event: WHERE status = ? ORDER BY timestamp
+        Index('ix_events_status_timestamp', 'status', 'timestamp'),
+    )
     id = Column(String, primary_key=True)
     user_id = Column(String)
     user_name = Column(String)
@@ -17,10 +32,45 @@ class EventModel(Base):
     mood = Column(String)
     timestamp = Column(DateTime)
     context = Column(Text)
-    status = Column(String, default='pending')  # pending, processing, processed, failed
+    status = Column(String, default='pending')  # pending, processing, processed, dead (failed: prije lease-ova)
+    # Lease: runner koji je preuzeo event i do kada; istekao lease → event se preuzima ponovo
+    worker_id = Column(String)
+    lease_expires_at = Column(DateTime)
+    attempts = Column(Integer, default=0, server_default='0')
+
+class EventStatusCountModel(Base):
+    """Broj event-a po statusu; održavaju ga trigeri na events (queue stats bez skeniranja tabele)."""
+    __tablename__ = 'event_status_counts'
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+_COUNT_UP = (
+    "INSERT INTO event_status_counts (status, count) SELECT NEW.status, 1 WHERE NEW.status IS NOT NULL "
+    "ON CONFLICT(status) DO UPDATE SET count = count + 1;"
+)
+_COUNT_DOWN = "UPDATE event_status_counts SET count = count - 1 WHERE status = OLD.status;"
+# Svaki upis u events (enqueue, claim/lease UPDATE-i runner-a, brisanje) ažurira brojače u istoj transakciji
+EVENT_COUNT_TRIGGERS = {
+    "trg_events_count_insert": f"AFTER INSERT ON events BEGIN {_COUNT_UP} END",
+    "trg_events_count_update": (f"AFTER UPDATE OF status ON events WHEN OLD.status IS NOT NEW.status "
+                                f"BEGIN {_COUNT_DOWN} {_COUNT_UP} END"),
+    "trg_events_count_delete": f"AFTER DELETE ON events BEGIN {_COUNT_DOWN} END",
+}
+for _name, _body in EVENT_COUNT_TRIGGERS.items():
+    event.listen(EventModel.__table__, "after_create", DDL(f"CREATE TRIGGER IF NOT EXISTS {_name} {_body}"))
+
 
 class FeedbackModel(Base):
     __tablename__ = 'feedback'
+    __table_args__ = (
+        # Dedup u learner-u (i prefiks za upite po user_name / user_name + mood)
+        Index('uq_feedback_user_mood_item', 'user_name', 'mood', 'item_id', unique=True),
+        # Liked/disliked upiti: user_name + mood + raspon ocjene
+        Index('ix_feedback_user_mood_rating', 'user_name', 'mood', 'rating'),
+        # Keyset paginacija /ratings: user_name, pa (timestamp, id) redom
+        Index('ix_feedback_user_timestamp_id', 'user_name', 'timestamp', 'id'),
+    )
     id = Column(String, primary_key=True)
     user_name = Column(String)  # Ime korisnika (npr "Adi")
     item_id = Column(String)
@@ -28,13 +78,137 @@ class FeedbackModel(Base):
     mood = Column(String)  # happy, sad, angry, etc.
     timestamp = Column(DateTime)
 
-engine = create_engine('sqlite:///data/feedback.db')
-Base.metadata.create_all(engine)
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def create_sqlite_engine(url: str = DATABASE_URL) -> Engine:
+    """
+    SQLite engine for concurrent readers next to one writer: WAL journal
+    (readers don't block on the writer), synchronous=NORMAL (fsync only at
+    checkpoints, safe in WAL mode), memory-mapped reads and a busy timeout
+    instead of immediate "database is locked" errors.
+    """
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": 30},
+        pool_size=10,
+        max_overflow=20,
+    )
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+
+def create_async_sqlite_engine(url: str = ASYNC_DATABASE_URL) -> AsyncEngine:
+    """
+    Async engine over aiosqlite with the same pragmas as create_sqlite_engine.
+    Async endpoints await queries on it instead of holding a threadpool
+    worker while SQLite does I/O.
+    """
+    engine = create_async_engine(
+        url,
+        connect_args={"timeout": 30},
+        pool_size=10,
+        max_overflow=20,
+    )
+    event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+
+# Po event loop-u: asyncio.Lock se veže za loop na kojem se prvi put koristi
+_async_write_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+
+def async_write_lock() -> asyncio.Lock:
+    """
+    Serializes async writers: SQLite has one writer at a time, so writers
+    queue on the event loop instead of each holding a pooled connection in
+    busy_timeout, and readers keep getting connections meanwhile.
+    """
+    loop = asyncio.get_running_loop()
+    lock = _async_write_locks.get(loop)
+    if lock is None:
+        lock = _async_write_locks[loop] = asyncio.Lock()
+    return lock
+
+
+def migrate_schema(bind: Engine) -> None:
+    """
+    Bring an existing database up to the current schema: create_all() only
+    creates missing tables, so columns and indexes declared later are added
+    here (ALTER TABLE ... ADD COLUMN, with the column's server default). Before
+    the unique feedback index is created, duplicate (user_name, mood,
+    item_id) rows are removed, keeping the first one written. Missing event
+    counter triggers are created and the counters filled from the existing
+    rows. Idempotent.
+    """
+    with bind.begin() as conn:
+        Base.metadata.create_all(conn)
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=conn.dialect)}"
+                if column.server_default is not None:
+                    ddl += f" DEFAULT {getattr(column.server_default.arg, 'text', column.server_default.arg)}"
+                conn.execute(text(ddl))
+                print(f"[DB] Added column {table.name}.{column.name}")
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+                if index.unique:
+                    columns = ", ".join(column.name for column in index.columns)
+                    removed = conn.execute(text(
+                        f"DELETE FROM {table.name} WHERE rowid NOT IN "
+                        f"(SELECT MIN(rowid) FROM {table.name} GROUP BY {columns})"
+                    )).rowcount
+                    if removed:
+                        print(f"[DB] Removed {removed} duplicate rows from {table.name} before {index.name}")
+                index.create(conn)
+                print(f"[DB] Created index {index.name}")
+        triggers = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars())
+        missing = [name for name in EVENT_COUNT_TRIGGERS if name not in triggers]
+        if missing:
+            for name in missing:
+                conn.execute(text(f"CREATE TRIGGER {name} {EVENT_COUNT_TRIGGERS[name]}"))
+            # Trigeri broje samo buduće promjene; postojeći redovi se prebroje jednom
+            conn.execute(text("DELETE FROM event_status_counts"))
+            conn.execute(text(
+                "INSERT INTO event_status_counts (status, count) "
+                "SELECT status, COUNT(*) FROM events WHERE status IS NOT NULL GROUP BY status"
+            ))
+            print(f"[DB] Created event counter triggers: {', '.join(missing)}")
+
+
+# Engine-i se spajaju tek pri prvom upitu; shemu priprema init_db()
+engine = create_sqlite_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_sqlite_engine()
+# expire_on_commit=False: atributi nakon commit-a se ne učitavaju ponovo (lazy load nije moguć u async)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def init_db(bind: Optional[Engine] = None) -> None:
+    """
+    Create and migrate the schema of the application database (default:
+    `engine`). Entry points (API startup, CLI) call it once before using the
+    database; importing this module never touches the database file.
+    """
+    migrate_schema(bind or engine)
+
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
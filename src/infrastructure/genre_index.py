@@ -0,0 +1,81 @@
+"""
+Genre bitmask index.
+
+Each item's "Adventure|Comedy|..." string is encoded once into an integer
+bitmask, and each mood's genre list into a mood mask. Mood filtering then
+becomes a single vectorized AND over an array of candidate columns instead
+of splitting genre strings per candidate per request.
+"""
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+
+
+class GenreIndex:
+    """
+    Args:
+        item_genres: pipe-separated genre string per column ("" if unknown)
+        mood_genres: mood -> list of genres; an empty list means "all genres"
+            for the neutral mood and "no genres" for any other mood, same as
+            MLRecommender._matches_mood always did
+    """
+
+    def __init__(self, item_genres: Iterable[str], mood_genres: Dict[str, List[str]]):
+        item_genres = list(item_genres)
+        vocabulary = sorted({g for genres in item_genres for g in genres.split("|") if g}
+                            | {g for genres in mood_genres.values() for g in genres})
+        if len(vocabulary) > 64:
+            raise ValueError(f"Too many genres for a 64-bit mask: {len(vocabulary)}")
+        self.dtype = np.uint32 if len(vocabulary) <= 32 else np.uint64
+        self.genre_bits = {genre: 1 << i for i, genre in enumerate(vocabulary)}
+        self.item_masks = np.fromiter(
+            (self.mask_for(genres.split("|")) for genres in item_genres),
+            dtype=self.dtype,
+            count=len(item_genres),
+        )
+        # None = bez filtera (neutral)
+        self.mood_masks: Dict[str, Optional[int]] = {
+            mood: None if mood == "neutral" else self.mask_for(genres)
+            for mood, genres in mood_genres.items()
+        }
+
+    @classmethod
+    def from_masks(cls, item_masks: np.ndarray, vocabulary: List[str],
+                   mood_genres: Dict[str, List[str]]) -> "GenreIndex":
+        """Restore from saved item masks; `vocabulary` lists the genre of each bit in order."""
+        index = cls.__new__(cls)
+        index.dtype = item_masks.dtype.type
+        index.genre_bits = {genre: 1 << i for i, genre in enumerate(vocabulary)}
+        index.item_masks = item_masks
+        index.mood_masks = {
+            mood: None if mood == "neutral" else index.mask_for(genres)
+            for mood, genres in mood_genres.items()
+        }
+        return index
+
+    def take(self, rows: np.ndarray) -> "GenreIndex":
+        """Index over the given rows (e.g. catalog rows of the matrix columns); row -1 = no genres."""
+        rows = np.asarray(rows, dtype=np.int64)
+        index = GenreIndex.__new__(GenreIndex)
+        index.dtype = self.dtype
+        index.genre_bits = self.genre_bits
+        index.mood_masks = self.mood_masks
+        index.item_masks = np.where(rows >= 0, self.item_masks[np.maximum(rows, 0)], 0).astype(self.dtype)
+        return index
+
+    def mask_for(self, genres: Iterable[str]) -> int:
+        mask = 0
+        for genre in genres:
+            mask |= self.genre_bits.get(genre, 0)
+        return mask
+
+    def matches(self, cols: np.ndarray, mood: str) -> np.ndarray:
+        """Boolean mask: which of the given columns fit the mood."""
+        cols = np.asarray(cols, dtype=np.int64)
+        mood_mask = self.mood_masks.get(mood, 0)
+        if mood_mask is None:
+            return np.ones(len(cols), dtype=bool)
+        return (self.item_masks[cols] & self.dtype(mood_mask)) != 0
+
+    def mood_columns(self, mood: str) -> np.ndarray:
+        """All columns that fit the mood."""
+        return np.flatnonzero(self.matches(np.arange(len(self.item_masks)), mood)).astype(np.int32)
@@ -0,0 +1,157 @@
+"""
+Columnar item catalog.
+
+Movie metadata is kept as a handful of contiguous arrays instead of three
+per-movie Python dicts: movieId (int64), release year (int32, 0 = unknown),
+genre bitmask (see GenreIndex) and two string tables for titles and genre
+strings (one UTF-8 byte buffer + offsets each). A movieId -> catalog row
+hash index gives O(1) scalar lookups; `rows_of` maps whole id arrays with
+one searchsorted.
+
+Every array is plain NumPy, so the catalog can be saved into the model
+snapshot and memory-mapped back.
+"""
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+
+from src.infrastructure.genre_index import GenreIndex
+
+# Godina je zadnja zagrada u naslovu, npr. "Heat (1995)"
+YEAR_PATTERN = r'\(\s*(\d+)\s*\)+$'
+
+
+class StringTable:
+    """Immutable list of strings stored as one UTF-8 buffer plus n + 1 offsets."""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[str]) -> "StringTable":
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(s) for s in encoded])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+    def to_list(self) -> List[str]:
+        data = self.blob.tobytes()
+        offsets = self.offsets.tolist()
+        return [data[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+
+    def memory_bytes(self) -> int:
+        return self.blob.nbytes + self.offsets.nbytes
+
+
+class ItemCatalog:
+    """
+    Args:
+        movie_ids: int64 movieId per catalog row
+        years: int32 release year per row (0 = unknown)
+        titles: title per row
+        genres: pipe-separated genre string per row
+        mood_genres: mood -> genres, for the genre bitmask index
+        genre_index: prebuilt bitmask index over the rows (built from `genres` if omitted)
+    """
+
+    def __init__(self, movie_ids: np.ndarray, years: np.ndarray, titles: StringTable, genres: StringTable,
+                 mood_genres: Dict[str, List[str]], genre_index: Optional[GenreIndex] = None):
+        self.movie_ids = movie_ids
+        self.years = years
+        self.titles = titles
+        self.genres = genres
+        self.index = {movie_id: row for row, movie_id in enumerate(movie_ids.tolist())}
+        self._sorted = np.argsort(movie_ids, kind='stable')
+        # Bitmaske žanrova po redu kataloga
+        self.genre_index = genre_index or GenreIndex(genres.to_list(), mood_genres)
+
+    @classmethod
+    def from_frame(cls, movies: pd.DataFrame, mood_genres: Dict[str, List[str]]) -> "ItemCatalog":
+        """Build from a movies.csv frame (movieId, title, genres); years are regex-extracted in one pass."""
+        years = pd.to_numeric(movies['title'].str.extract(YEAR_PATTERN)[0], errors='coerce')
+        return cls(
+            movies['movieId'].to_numpy(dtype=np.int64),
+            years.fillna(0).to_numpy(dtype=np.int32),
+            StringTable.from_strings(movies['title'].tolist()),
+            StringTable.from_strings(movies['genres'].fillna("").tolist()),
+            mood_genres,
+        )
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], mood_genres: Dict[str, List[str]]) -> "ItemCatalog":
+        """Inverse of `to_arrays` (arrays may be memory-mapped)."""
+        return cls(
+            arrays["catalog_movie_ids"],
+            arrays["catalog_years"],
+            StringTable(arrays["catalog_titles"], arrays["catalog_title_offsets"]),
+            StringTable(arrays["catalog_genres"], arrays["catalog_genre_offsets"]),
+            mood_genres,
+            GenreIndex.from_masks(
+                arrays["catalog_genre_masks"],
+                StringTable(arrays["catalog_genre_names"], arrays["catalog_genre_name_offsets"]).to_list(),
+                mood_genres,
+            ),
+        )
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        vocabulary = StringTable.from_strings(self.genre_index.genre_bits)
+        return {
+            "catalog_genre_masks": self.genre_masks,
+            "catalog_genre_names": vocabulary.blob,
+            "catalog_genre_name_offsets": vocabulary.offsets,
+            "catalog_movie_ids": self.movie_ids,
+            "catalog_years": self.years,
+            "catalog_titles": self.titles.blob,
+            "catalog_title_offsets": self.titles.offsets,
+            "catalog_genres": self.genres.blob,
+            "catalog_genre_offsets": self.genres.offsets,
+        }
+
+    def __len__(self) -> int:
+        return len(self.movie_ids)
+
+    @property
+    def genre_masks(self) -> np.ndarray:
+        return self.genre_index.item_masks
+
+    def row_of(self, movie_id) -> Optional[int]:
+        try:
+            return self.index.get(int(movie_id))
+        except (TypeError, ValueError):
+            return None
+
+    def rows_of(self, movie_ids) -> np.ndarray:
+        """Catalog row per movieId (-1 if unknown), vectorized."""
+        movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        if not len(self.movie_ids):
+            return np.full(len(movie_ids), -1, dtype=np.int64)
+        positions = np.searchsorted(self.movie_ids, movie_ids, sorter=self._sorted)
+        positions = np.minimum(positions, len(self.movie_ids) - 1)
+        rows = self._sorted[positions]
+        return np.where(self.movie_ids[rows] == movie_ids, rows, -1)
+
+    def title(self, movie_id) -> str:
+        row = self.row_of(movie_id)
+        return self.titles[row] if row is not None else f"Movie {movie_id}"
+
+    def genres_of(self, movie_id) -> str:
+        row = self.row_of(movie_id)
+        return self.genres[row] if row is not None else ""
+
+    def year(self, movie_id):
+        """Release year, None if the title has none, "Unknown" for movies outside the catalog."""
+        row = self.row_of(movie_id)
+        if row is None:
+            return "Unknown"
+        return int(self.years[row]) or None
+
+    def memory_bytes(self) -> int:
+        return (self.movie_ids.nbytes + self.years.nbytes + self.genre_masks.nbytes
+                + self.titles.memory_bytes() + self.genres.memory_bytes())
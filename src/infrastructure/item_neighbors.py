@@ -0,0 +1,88 @@
+"""
+Precomputed item-item neighbor table.
+
+For every item column the `k` most cosine-similar item columns (over the
+user × item ratings matrix) are stored as two compact n_items × k arrays:
+int32 column ids and float32 similarities. The table is built in column
+chunks so the dense similarity block never exceeds chunk_size × n_items.
+
+Item neighborhoods drift slowly, so the table is only rebuilt on full model
+rebuilds; scoring a user then costs O(len(history) * k), independent of the
+number of users.
+"""
+from typing import Iterable, Tuple
+import numpy as np
+from scipy import sparse
+
+from src.infrastructure.ratings_store import SparseRatingsStore
+
+
+class ItemNeighbors:
+    """
+    Args:
+        neighbors: n_items × k column ids, best first (-1 = no neighbor)
+        similarities: n_items × k cosine similarities matching `neighbors`
+    """
+
+    def __init__(self, neighbors: np.ndarray, similarities: np.ndarray):
+        self.neighbors = neighbors
+        self.similarities = similarities
+
+    @classmethod
+    def build(cls, ratings: SparseRatingsStore, k: int = 50, chunk_size: int = 512) -> "ItemNeighbors":
+        """Top-k cosine neighbors of every item column (an item is never its own neighbor)."""
+        store = ratings.compact() if ratings.overlay_rows else ratings
+        # item × user, redovi L2-normalizovani -> cosine = skalarni proizvod
+        items = sparse.csr_matrix(store.matrix.T, dtype=np.float32)
+        norms = np.sqrt(np.asarray(items.multiply(items).sum(axis=1)).ravel())
+        inv_norms = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        items = sparse.diags(inv_norms.astype(np.float32)) @ items
+        items_t = items.T.tocsr()
+
+        n_items = items.shape[0]
+        k = max(0, min(k, n_items - 1))
+        neighbors = np.full((n_items, k), -1, dtype=np.int32)
+        similarities = np.zeros((n_items, k), dtype=np.float32)
+        if k == 0:
+            return cls(neighbors, similarities)
+        for start in range(0, n_items, chunk_size):
+            stop = min(start + chunk_size, n_items)
+            block = (items[start:stop] @ items_t).toarray()
+            block[np.arange(stop - start), np.arange(start, stop)] = -np.inf  # bez samog sebe
+            top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+            top_sims = np.take_along_axis(block, top, axis=1)
+            order = np.lexsort((top, -top_sims), axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_sims = np.take_along_axis(top_sims, order, axis=1)
+            # Kolone bez ijedne zajedničke ocjene nisu susjedi
+            valid = top_sims > 0
+            neighbors[start:stop] = np.where(valid, top, -1)
+            similarities[start:stop] = np.where(valid, top_sims, 0)
+        return cls(neighbors, similarities)
+
+    @property
+    def k(self) -> int:
+        return self.neighbors.shape[1]
+
+    def memory_bytes(self) -> int:
+        return self.neighbors.nbytes + self.similarities.nbytes
+
+    def score(self, cols: Iterable[int], weights: Iterable[float], n_items: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Aggregate the neighbor lists of the given history columns.
+
+        Returns (scores, support): per item column the weighted sum of
+        similarities to the history, and how many history items list it as
+        a neighbor.
+        """
+        cols = np.fromiter(cols, dtype=np.int64)
+        weights = np.fromiter(weights, dtype=np.float32, count=len(cols))
+        if not len(cols):
+            return np.zeros(n_items, dtype=np.float64), np.zeros(n_items, dtype=np.int64)
+        neighbors = self.neighbors[cols].ravel()
+        contributions = (self.similarities[cols] * weights[:, None]).ravel()
+        valid = neighbors >= 0
+        neighbors = neighbors[valid]
+        scores = np.bincount(neighbors, weights=contributions[valid], minlength=n_items)
+        support = np.bincount(neighbors, minlength=n_items)
+        return scores, support
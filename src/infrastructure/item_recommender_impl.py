@@ -0,0 +1,132 @@
+from typing import Optional
+import numpy as np
+
+from src.infrastructure.recommender_impl import MLRecommender, ModelSnapshot
+from src.infrastructure.item_neighbors import ItemNeighbors
+from src.infrastructure.ann_index import top_k
+
+
+class ItemKNNRecommender(MLRecommender):
+    """
+    Item-item collaborative filtering.
+
+    Instead of searching similar users per request, every item's top-K most
+    similar items are precomputed at build time (ItemNeighbors). A user is
+    scored by summing the neighbor lists of the items they rated in
+    FeedbackModel, so the per-request cost depends on the length of the
+    user's history, not on the number of users. Data loading, snapshots,
+    the background refresher and the popularity fallback are shared with
+    MLRecommender.
+    """
+
+    def __init__(self, refresh_window: Optional[float] = None, item_neighbors: int = 50,
+                 like_threshold: float = 4.0, dislike_threshold: float = 2.0, **kwargs):
+        """
+        Args:
+            refresh_window: see MLRecommender
+            item_neighbors: neighbors stored per item (K)
+            like_threshold: ratings at or above this pull their neighbors up
+            dislike_threshold: ratings at or below this push their neighbors down
+            **kwargs: passed to MLRecommender
+        """
+        self.item_neighbors = item_neighbors
+        self.like_threshold = like_threshold
+        self.dislike_threshold = dislike_threshold
+        super().__init__(refresh_window=refresh_window, **kwargs)
+
+    def _build_snapshot(self, deltas: list, full_reload: bool = False) -> ModelSnapshot:
+        """
+        Same as MLRecommender, plus the item neighbor table. The table is only
+        rebuilt on full rebuilds; feedback deltas reuse the current one.
+        """
+        current = self._snapshot
+        snapshot = super()._build_snapshot(deltas, full_reload)
+        if full_reload or current is None:
+            snapshot.item_neighbors = ItemNeighbors.build(snapshot.ratings, k=self.item_neighbors)
+            print(f"[ML] Item neighbors built: {snapshot.item_neighbors.k} per item, "
+                  f"{snapshot.item_neighbors.memory_bytes() / 1e6:.1f} MB")
+        else:
+            snapshot.item_neighbors = current.item_neighbors
+        return snapshot
+
+    def _snapshot_config(self) -> dict:
+        return {**super()._snapshot_config(), "item_neighbors": self.item_neighbors}
+
+    def _snapshot_arrays(self, snapshot: ModelSnapshot) -> dict:
+        return {
+            "item_neighbors": snapshot.item_neighbors.neighbors,
+            "item_similarities": snapshot.item_neighbors.similarities,
+        }
+
+    def _restore_snapshot_arrays(self, snapshot: ModelSnapshot, arrays: dict) -> None:
+        snapshot.item_neighbors = ItemNeighbors(arrays["item_neighbors"], arrays["item_similarities"])
+
+    def _get_collaborative_batch(self, queries: list, snapshot: ModelSnapshot) -> list[list[dict]]:
+        """Nema pretrage sličnih korisnika; po korisniku samo sumiranje precomputed susjeda."""
+        return [
+            self._get_collaborative_recommendations(user_name, liked, disliked, count, mood, snapshot=snapshot)
+            for user_name, liked, disliked, count, mood in queries
+        ]
+
+    def _get_collaborative_recommendations(self, user_name: str, liked: list, disliked: list, count: int, mood: str,
+                                           snapshot: Optional[ModelSnapshot] = None) -> list[dict]:
+        """Sumira precomputed susjede filmova koje je korisnik ocijenio."""
+        recommendations = []
+        try:
+            snapshot = snapshot or self._snapshot
+            ratings = snapshot.ratings
+
+            # Historija: sav feedback korisnika (svi mood-ovi) + liked/disliked za ovaj mood
+            rated = snapshot.user_ratings.get(user_name, {})
+            history = {}
+            for item_id, rating in rated.items():
+                if rating >= self.like_threshold:
+                    history[item_id] = 1.0
+                elif rating <= self.dislike_threshold:
+                    history[item_id] = -1.0
+            history.update({item: 1.0 for item in liked})
+            history.update({item: -1.0 for item in disliked})
+            cols, weights = [], []
+            for item_id, weight in history.items():
+                col = ratings.col_of(item_id)
+                if col is not None:
+                    cols.append(col)
+                    weights.append(weight)
+            if not cols:
+                return recommendations
+
+            scores, support = snapshot.item_neighbors.score(cols, weights, ratings.n_items)
+
+            # Isključi sve već ocijenjene (i neutralne ocjene) i primijeni mood masku prije top-k
+            candidate_cols = np.flatnonzero((support > 0) & (scores > 0))
+            excluded_cols = [col for col in map(ratings.col_of, list(rated) + liked + disliked) if col is not None]
+            candidate_cols = candidate_cols[~np.isin(candidate_cols, excluded_cols)]
+            candidate_cols = candidate_cols[self.genre_index.matches(candidate_cols, mood)]
+            top_cols = candidate_cols[top_k(scores[candidate_cols], count)]
+
+            for col in top_cols:
+                movie_id = int(ratings.item_ids[col])
+                recommendations.append({
+                    "item_id": str(movie_id),
+                    "title": self.catalog.title(movie_id),
+                    "year": self.catalog.year(movie_id),
+                    "genres": self.catalog.genres_of(movie_id),
+                    "score": float(scores[col]),
+                    "reason": "Similar to movies you liked",
+                    "llm_description": self.get_llm_description(self.catalog.title(movie_id), self.catalog.genres_of(movie_id)),
+                    "agent_mood": "⭐ Based on your taste!"
+                })
+        except Exception as e:
+            print(f"[ML] Error in item-item recommendations: {e}")
+
+        return recommendations[:count]
+
+    def get_model_stats(self) -> dict:
+        stats = super().get_model_stats()
+        snapshot = self._snapshot
+        neighbors = getattr(snapshot, "item_neighbors", None)
+        stats["item_neighbors"] = {
+            "k": neighbors.k,
+            "memory_bytes": neighbors.memory_bytes(),
+        } if neighbors is not None else None
+        return stats
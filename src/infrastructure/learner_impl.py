@@ -1,14 +1,22 @@
 from src.domain.interfaces import Learner
 from src.infrastructure.db import SessionLocal, FeedbackModel
 from typing import Dict, Any
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 
 class DummyLearner(Learner):
-    def __init__(self, recommender=None):
+    def __init__(self, recommender=None, profile_cache=None, result_cache=None):
         """
         Initialize learner with optional recommender reference for model updates.
+        profile_cache (default: the recommender's) receives every new feedback
+        write-through, so cached user profiles never miss it; the user's
+        cached recommendation lists in result_cache (default: the
+        recommender's) are invalidated.
         """
         self.recommender = recommender
+        self.profile_cache = profile_cache or getattr(recommender, "profile_cache", None)
+        self.result_cache = result_cache or getattr(recommender, "result_cache", None)
     
     def learn(self, event: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -45,14 +53,29 @@ class DummyLearner(Learner):
             )
             db.add(feedback)
             db.commit()
+            # Rowid novog reda pomjera watermark snapshot-a (restore ga ne ponavlja)
+            rowid = db.execute(text("SELECT rowid FROM feedback WHERE id = :id"), {"id": feedback.id}).scalar()
             print(f"[LEARN] Learned from feedback: {user_name} + {mood} → item {item_id} (rating {rating})")
+            if self.profile_cache:
+                self.profile_cache.record(user_name, mood, item_id, rating)
+            if self.result_cache:
+                self.result_cache.invalidate(user_name)
             
-            # ⭐ REAL LEARNING: Ažurat ML model sa novim feedback-om
+            # ⭐ REAL LEARNING: Ažuriraj ML model samo sa novim feedback-om (delta, bez reload-a)
             if self.recommender:
-                self.recommender.update_model()
+                self.recommender.apply_feedback(user_name, item_id, rating, rowid=rowid)
                 print(f"[LEARN] Model updated after feedback")
             
             return {"status": "created", "rating": rating}
+        except IntegrityError:
+            # Paralelni upis istog (user, mood, item) je odbio unique index
+            db.rollback()
+            existing = db.query(FeedbackModel).filter(
+                FeedbackModel.user_name == user_name,
+                FeedbackModel.mood == mood,
+                FeedbackModel.item_id == item_id
+            ).first()
+            return {"status": "exists", "rating": existing.rating if existing else rating}
         except Exception as e:
             print(f"[LEARN] Error saving feedback: {e}")
             db.rollback()
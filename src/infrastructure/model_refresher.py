@@ -0,0 +1,125 @@
+"""
+Background model refresher.
+
+Feedback handlers only submit deltas here; a single daemon thread merges
+everything that arrives within `window` seconds into one rebuild, builds the
+new model off to the side and hands it to `swap`. Readers keep using the
+previous model until the swap, which is a single reference assignment.
+"""
+import threading
+import time
+import logging
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRefresher:
+    """
+    Coalescing, debounced refresher.
+
+    Args:
+        build: build(deltas, full_reload) -> new model, runs on the refresher thread
+        swap: swap(model) publishes the new model
+        window: seconds to keep collecting deltas after the first one arrives
+    """
+
+    def __init__(self, build: Callable[[List[Any], bool], Any], swap: Callable[[Any], None], window: float = 0.5):
+        self.build = build
+        self.swap = swap
+        self.window = window
+        self._pending: List[Any] = []
+        self._full_reload = False
+        self._condition = threading.Condition()
+        self._running = False
+        self._building = False
+        self._thread: Optional[threading.Thread] = None
+        self.total_submitted = 0
+        self.total_rebuilds = 0
+        self.last_build_seconds = 0.0
+
+    def start(self) -> None:
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="model-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def submit(self, delta: Any) -> None:
+        """Queue one delta; returns immediately."""
+        with self._condition:
+            self._pending.append(delta)
+            self.total_submitted += 1
+            self._condition.notify()
+
+    def request_rebuild(self) -> None:
+        """Queue a full rebuild; pending deltas are folded into it."""
+        with self._condition:
+            self._full_reload = True
+            self._condition.notify()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Block until everything submitted so far has been swapped in."""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            if not self._running:
+                return False
+            self._condition.notify()
+            while self._pending or self._full_reload or self._building:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def get_stats(self) -> dict:
+        with self._condition:
+            return {
+                "running": self._running,
+                "window": self.window,
+                "pending": len(self._pending),
+                "total_submitted": self.total_submitted,
+                "total_rebuilds": self.total_rebuilds,
+                "last_build_seconds": self.last_build_seconds,
+            }
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._running and not self._pending and not self._full_reload:
+                    self._condition.wait()
+                if not self._running:
+                    return
+            # Debounce: skupi sve što stigne unutar prozora u jedan rebuild
+            if self.window > 0:
+                time.sleep(self.window)
+            with self._condition:
+                deltas, self._pending = self._pending, []
+                full_reload, self._full_reload = self._full_reload, False
+                self._building = True
+            try:
+                started = time.perf_counter()
+                model = self.build(deltas, full_reload)
+                self.swap(model)
+                self.last_build_seconds = time.perf_counter() - started
+                self.total_rebuilds += 1
+                logger.info(f"Model refreshed ({len(deltas)} deltas, full={full_reload}) "
+                            f"in {self.last_build_seconds * 1000:.1f}ms")
+            except Exception as e:
+                logger.error(f"Model refresh failed: {e}", exc_info=True)
+            finally:
+                with self._condition:
+                    self._building = False
+                    self._condition.notify_all()
@@ -0,0 +1,85 @@
+"""
+Precomputed per-mood popularity rankings for the fallback recommendations.
+
+Popularity is the column mean of the ratings matrix (missing = 0). Every
+mean shares the same denominator (number of users), so rankings are kept
+by column sum and only divided at read time; adding a user never reorders
+them. Feedback changes a handful of column sums, and `updated()` moves just
+those columns inside each ranking instead of re-sorting everything.
+"""
+from typing import Dict, Iterable, Tuple
+import numpy as np
+
+
+class MoodPopularity:
+    """
+    Columns of each mood ranked by descending column sum (ties by column).
+
+    Args:
+        col_sums: per-column rating sums of the ratings store
+        mood_columns: mood -> columns whose genres match that mood
+    """
+
+    def __init__(self, col_sums: np.ndarray, mood_columns: Dict[str, np.ndarray]):
+        self.col_sums = np.array(col_sums, dtype=np.float64)
+        self.rankings: Dict[str, np.ndarray] = {}
+        self.members: Dict[str, np.ndarray] = {}  # mood -> bool po koloni
+        for mood, cols in mood_columns.items():
+            cols = np.asarray(cols, dtype=np.int32)
+            # cols su rastući pa stabilni sort čuva redoslijed kolona kod jednakih suma
+            self.rankings[mood] = cols[np.argsort(-self.col_sums[cols], kind='stable')]
+            members = np.zeros(len(self.col_sums), dtype=bool)
+            members[cols] = True
+            self.members[mood] = members
+
+    @classmethod
+    def from_rankings(cls, col_sums: np.ndarray, rankings: Dict[str, np.ndarray]) -> "MoodPopularity":
+        """Restore precomputed rankings (e.g. from a model snapshot) without re-sorting."""
+        popularity = cls.__new__(cls)
+        popularity.col_sums = np.array(col_sums, dtype=np.float64)
+        popularity.rankings = {}
+        popularity.members = {}
+        for mood, ranking in rankings.items():
+            popularity.rankings[mood] = np.asarray(ranking, dtype=np.int32)
+            members = np.zeros(len(popularity.col_sums), dtype=bool)
+            members[ranking] = True
+            popularity.members[mood] = members
+        return popularity
+
+    def updated(self, col_sums: np.ndarray, changed_cols: Iterable[int]) -> "MoodPopularity":
+        """New rankings after the given columns changed their sums (the old object is untouched)."""
+        changed = np.unique(np.fromiter(changed_cols, dtype=np.int32))
+        popularity = MoodPopularity.__new__(MoodPopularity)
+        popularity.col_sums = np.array(col_sums, dtype=np.float64)
+        popularity.members = self.members
+        popularity.rankings = {}
+        for mood, ranking in self.rankings.items():
+            moved = changed[self.members[mood][changed]]
+            if not len(moved):
+                popularity.rankings[mood] = ranking
+                continue
+            ranking = ranking[~np.isin(ranking, moved)]
+            for col in moved:
+                ranking = popularity._insert(ranking, int(col))
+            popularity.rankings[mood] = ranking
+        return popularity
+
+    def top(self, mood: str, count: int, excluded_cols: np.ndarray, n_users: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(columns, mean ratings) of the `count` most popular items for a mood, skipping excluded columns."""
+        ranking = self.rankings.get(mood)
+        if ranking is None or count <= 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+        # Dovoljno je pogledati count + len(excluded) kolona sa vrha
+        head = ranking[:count + len(excluded_cols)]
+        if len(excluded_cols):
+            head = head[~np.isin(head, excluded_cols)]
+        head = head[:count]
+        return head, self.col_sums[head] / max(n_users, 1)
+
+    def _insert(self, ranking: np.ndarray, col: int) -> np.ndarray:
+        keys = -self.col_sums[ranking]
+        key = -self.col_sums[col]
+        low = np.searchsorted(keys, key, side='left')
+        high = np.searchsorted(keys, key, side='right')
+        position = low + np.searchsorted(ranking[low:high], col)
+        return np.insert(ranking, position, col)
@@ -0,0 +1,186 @@
+"""
+In-memory per-user profile cache.
+
+A profile is one user's liked / disliked movieIds per mood, loaded from
+FeedbackModel with a single query. Profiles are kept in a bounded LRU with
+a TTL, so hot users are served without touching the database. The learner
+writes every new feedback through to the cached profile; the TTL only
+bounds staleness for writes made by other processes.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+
+class UserProfile:
+    """
+    Liked movieIds per mood (newest first) and disliked movieIds per mood
+    (insertion order).
+    """
+
+    def __init__(self, liked: Optional[Dict[str, List[int]]] = None,
+                 disliked: Optional[Dict[str, List[int]]] = None):
+        self.liked = liked or {}
+        self.disliked = disliked or {}
+
+    def liked_for(self, mood: str) -> List[int]:
+        return list(self.liked.get(mood, ()))
+
+    def disliked_for(self, mood: str) -> List[int]:
+        return list(self.disliked.get(mood, ()))
+
+    def record(self, mood: str, item_id: int, rating: float, like_threshold: float = 4,
+               dislike_threshold: float = 2) -> None:
+        if rating >= like_threshold:
+            self.liked.setdefault(mood, []).insert(0, item_id)
+        elif rating <= dislike_threshold:
+            self.disliked.setdefault(mood, []).append(item_id)
+
+
+class UserProfileCache:
+    """
+    Bounded LRU + TTL cache of UserProfile objects.
+
+    Args:
+        loader: loader(user_name) -> UserProfile, called on a miss
+        max_users: profiles kept before the least recently used is evicted
+            (0 disables caching, every get is a load)
+        ttl: seconds a loaded profile stays valid
+        bulk_loader: bulk_loader(user_names) -> {user_name: UserProfile}, used
+            by get_many to load all misses with one query (default: loader per user)
+        async_bulk_loader: awaitable bulk_loader, used by get_many_async so
+            async callers load misses without blocking the event loop
+    """
+
+    def __init__(self, loader: Callable[[str], UserProfile], max_users: int = 10000, ttl: float = 300.0,
+                 bulk_loader: Optional[Callable[[List[str]], Dict[str, UserProfile]]] = None,
+                 async_bulk_loader: Optional[Callable[[List[str]], Awaitable[Dict[str, UserProfile]]]] = None):
+        self.loader = loader
+        self.bulk_loader = bulk_loader
+        self.async_bulk_loader = async_bulk_loader
+        self.max_users = max_users
+        self.ttl = ttl
+        self._profiles: "OrderedDict[str, tuple]" = OrderedDict()  # user -> (profile, loaded_at)
+        self._lock = threading.Lock()
+        self._writes = 0  # broji write-through upise; load tokom upisa se ne kešira
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, user_name: str) -> UserProfile:
+        now = time.monotonic()
+        profile, writes = self._lookup(user_name, now)
+        if profile is None:
+            # DB upit van lock-a
+            profile = self.loader(user_name)
+            self._store({user_name: profile}, now, writes)
+        return profile
+
+    def _lookup(self, user_name: str, now: float):
+        """(cached profile or None on a miss, write counter at lookup time)."""
+        with self._lock:
+            entry = self._profiles.get(user_name)
+            if entry is not None:
+                profile, loaded_at = entry
+                if now - loaded_at < self.ttl:
+                    self._profiles.move_to_end(user_name)
+                    self.hits += 1
+                    return profile, self._writes
+                del self._profiles[user_name]
+                self.expirations += 1
+            self.misses += 1
+            return None, self._writes
+
+    def get_many(self, user_names: Iterable[str]) -> Dict[str, UserProfile]:
+        """Profiles of many users; all misses are loaded together (one bulk_loader call)."""
+        now = time.monotonic()
+        profiles, missing, writes = self._lookup_many(user_names, now)
+        if missing:
+            if self.bulk_loader:
+                loaded = self.bulk_loader(missing)
+            else:
+                loaded = {user_name: self.loader(user_name) for user_name in missing}
+            self._store(loaded, now, writes)
+            profiles.update(loaded)
+        return profiles
+
+    async def get_many_async(self, user_names: Iterable[str]) -> Dict[str, UserProfile]:
+        """get_many() for async callers: misses are awaited (async_bulk_loader, else get_many's loader in a thread)."""
+        now = time.monotonic()
+        profiles, missing, writes = self._lookup_many(user_names, now)
+        if missing:
+            if self.async_bulk_loader:
+                loaded = await self.async_bulk_loader(missing)
+            elif self.bulk_loader:
+                loaded = await asyncio.to_thread(self.bulk_loader, missing)
+            else:
+                loaded = await asyncio.to_thread(lambda: {user_name: self.loader(user_name) for user_name in missing})
+            self._store(loaded, now, writes)
+            profiles.update(loaded)
+        return profiles
+
+    def _lookup_many(self, user_names: Iterable[str], now: float):
+        """(cached profiles, missing user names, write counter at lookup time)."""
+        profiles, missing = {}, []
+        with self._lock:
+            for user_name in dict.fromkeys(user_names):
+                entry = self._profiles.get(user_name)
+                if entry is not None:
+                    if now - entry[1] < self.ttl:
+                        self._profiles.move_to_end(user_name)
+                        self.hits += 1
+                        profiles[user_name] = entry[0]
+                        continue
+                    del self._profiles[user_name]
+                    self.expirations += 1
+                self.misses += 1
+                missing.append(user_name)
+            return profiles, missing, self._writes
+
+    def _store(self, profiles: Dict[str, UserProfile], loaded_at: float, writes: int) -> None:
+        with self._lock:
+            if self.max_users > 0 and writes == self._writes:
+                for user_name, profile in profiles.items():
+                    self._profiles[user_name] = (profile, loaded_at)
+                    self._profiles.move_to_end(user_name)
+                while len(self._profiles) > self.max_users:
+                    self._profiles.popitem(last=False)
+                    self.evictions += 1
+
+    def record(self, user_name: str, mood: str, item_id, rating: float) -> None:
+        """Write-through of one new feedback row into the cached profile (if cached)."""
+        try:
+            item_id = int(item_id)
+        except (TypeError, ValueError):
+            return  # ne-numerički id ne ulazi u profil
+        with self._lock:
+            self._writes += 1
+            entry = self._profiles.get(user_name)
+            if entry is not None:
+                entry[0].record(mood, item_id, rating)
+
+    def invalidate(self, user_name: Optional[str] = None) -> None:
+        """Drop one user's profile, or every profile."""
+        with self._lock:
+            self._writes += 1
+            if user_name is None:
+                self._profiles.clear()
+            else:
+                self._profiles.pop(user_name, None)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._profiles),
+                "max_users": self.max_users,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
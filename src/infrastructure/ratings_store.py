@@ -0,0 +1,406 @@
+"""
+Sparse user × item ratings store used by the ML recommender.
+
+MovieLens ratings are >98% empty, so keeping them in a dense pandas pivot
+wastes memory quadratically. The store keeps ratings in a CSR matrix
+(float32 values, int32 indices) together with the row/column id mappings.
+
+The CSR part is never modified in place. Single-rating updates from feedback
+go into a small per-row overlay that shadows the CSR row. Column sums,
+squared row norms and float32 inverse row norms are cached and patched on
+every update; `compact()` folds the overlay back into a fresh CSR matrix.
+
+Model snapshots are built with `copy()` + `set_rating()`. A copy shares
+everything with its source: the CSR arrays, the user key list and key ->
+row map (append-only), the overlay rows, and the cached sums/norms (as
+BlockArrays). A write copies only what it touches (that user's overlay row
+and one block of each cache), so applying one rating to a copy costs O(1)
+plus that user's row, however many users and items the model has.
+
+Cosine similarity against all users is one float32 mat-vec with the
+L2-normalized query, scaled by the cached inverse row norms. The row scaling
+is applied to the result vector instead of materializing a second,
+normalized copy of the CSR data array.
+"""
+from typing import Dict, Hashable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from src.infrastructure.block_array import BlockArray
+
+
+class SparseRatingsStore:
+    """
+    CSR-backed ratings matrix with an incremental row overlay.
+
+    Rows are users (MovieLens userId or "user_<name>" for feedback users),
+    columns are movieIds from ratings.csv. Column set is fixed at build time;
+    ratings for unknown items are ignored, same as the old dense pivot.
+    """
+
+    def __init__(self, matrix: sparse.csr_matrix, user_keys: List[Hashable], item_ids: np.ndarray):
+        col_sums = np.asarray(matrix.sum(axis=0, dtype=np.float64)).ravel()
+        row_sq_norms = np.asarray(matrix.multiply(matrix).sum(axis=1, dtype=np.float64)).ravel()
+        self._init(matrix, user_keys, item_ids, col_sums, row_sq_norms)
+
+    @classmethod
+    def from_frame(cls, ratings: pd.DataFrame) -> "SparseRatingsStore":
+        """Build the store from a (userId, movieId, rating) frame without pivoting."""
+        user_codes, user_keys = pd.factorize(ratings['userId'], sort=True)
+        item_codes, item_ids = pd.factorize(ratings['movieId'], sort=True)
+        matrix = sparse.csr_matrix(
+            (ratings['rating'].to_numpy(dtype=np.float32), (user_codes, item_codes)),
+            shape=(len(user_keys), len(item_ids)),
+            dtype=np.float32,
+        )
+        # Duplicate (user, movie) pairs would be summed by the COO -> CSR conversion
+        matrix.sum_duplicates()
+        return cls(matrix, user_keys.tolist(), np.asarray(item_ids, dtype=np.int64))
+
+    @classmethod
+    def from_arrays(cls, matrix: sparse.csr_matrix, user_keys: List[Hashable], item_ids: np.ndarray,
+                    col_sums: np.ndarray, row_sq_norms: np.ndarray) -> "SparseRatingsStore":
+        """
+        Wrap prebuilt (possibly memory-mapped, read-only) CSR arrays and their
+        cached sums/norms without another pass over the ratings. Caches are
+        copied, the CSR arrays are shared.
+        """
+        store = cls.__new__(cls)
+        store._init(matrix, user_keys, item_ids, col_sums, row_sq_norms)
+        return store
+
+    def _init(self, matrix, user_keys, item_ids, col_sums, row_sq_norms) -> None:
+        self.matrix = matrix
+        # Append-only, dijele ih kopije; red ključa je validan samo ispod n_users ove kopije
+        self._user_keys = list(user_keys)
+        self._n_users = len(self._user_keys)
+        self._user_rows = {key: row for row, key in enumerate(self._user_keys)}
+        self.item_ids = np.asarray(item_ids)
+        self.item_index = {int(item_id): col for col, item_id in enumerate(self.item_ids)}
+        # row -> {col: rating}; zasjenjuje cijeli CSR red (ili je novi red iza CSR-a)
+        self._overlay: Dict[int, Dict[int, float]] = {}
+        self._owned_rows = set()  # overlay redovi koje samo ova kopija vidi (smije ih mijenjati u mjestu)
+        self._col_sums = BlockArray(col_sums, dtype=np.float64)
+        self._row_sq_norms = BlockArray(row_sq_norms, dtype=np.float64)
+        self._inv_norms = BlockArray(self._inverse_norm(row_sq_norms), dtype=np.float32)
+
+    @property
+    def shape(self):
+        return (self.n_users, self.n_items)
+
+    @property
+    def n_users(self) -> int:
+        return self._n_users
+
+    @property
+    def user_keys(self) -> List[Hashable]:
+        return self._user_keys[:self._n_users]
+
+    @property
+    def n_items(self) -> int:
+        return self.matrix.shape[1]
+
+    @property
+    def nnz(self) -> int:
+        shadowed = sum(self._base_row_nnz(row) for row in self._overlay)
+        return self.matrix.nnz - shadowed + sum(len(entries) for entries in self._overlay.values())
+
+    @property
+    def overlay_rows(self) -> int:
+        return len(self._overlay)
+
+    @property
+    def col_sums(self) -> np.ndarray:
+        """Cached rating sum of every item column (read-only)."""
+        return self._col_sums.array()
+
+    @property
+    def row_sq_norms(self) -> np.ndarray:
+        """Cached squared L2 norm of every user row (read-only)."""
+        return self._row_sq_norms.array()
+
+    @property
+    def inv_norms(self) -> np.ndarray:
+        """Cached 1 / L2 norm of every user row (0 for empty rows), float32, read-only."""
+        return self._inv_norms.array()
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the CSR arrays and caches."""
+        return (self.matrix.data.nbytes + self.matrix.indices.nbytes + self.matrix.indptr.nbytes
+                + self._col_sums.nbytes + self._row_sq_norms.nbytes + self._inv_norms.nbytes)
+
+    def row_of(self, user_key: Hashable) -> Optional[int]:
+        row = self._user_rows.get(user_key)
+        # Mapu dijele kopije: red koji je dodala novija kopija ovdje ne postoji
+        return row if row is not None and row < self._n_users else None
+
+    def col_of(self, item_id) -> Optional[int]:
+        try:
+            return self.item_index.get(int(item_id))
+        except (TypeError, ValueError):
+            return None
+
+    def row_entries(self, row: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(cols, ratings) of the non-zero entries of a row."""
+        entries = self._overlay.get(row)
+        if entries is not None:
+            cols = np.fromiter(entries.keys(), dtype=np.int32, count=len(entries))
+            values = np.fromiter(entries.values(), dtype=np.float32, count=len(entries))
+            # Isti redoslijed kolona kao u CSR redu
+            order = np.argsort(cols)
+            return cols[order], values[order]
+        start, end = self.matrix.indptr[row], self.matrix.indptr[row + 1]
+        return self.matrix.indices[start:end], self.matrix.data[start:end]
+
+    def row_dense(self, row: int) -> np.ndarray:
+        vector = np.zeros(self.n_items, dtype=np.float32)
+        cols, values = self.row_entries(row)
+        vector[cols] = values
+        return vector
+
+    def rows_matrix(self, rows) -> sparse.csr_matrix:
+        """len(rows) × n_items CSR block of the given rows (overlay rows included), in order."""
+        rows = np.asarray(rows, dtype=np.int64)
+        overlay = self._overlay
+        in_overlay = np.fromiter((int(row) in overlay for row in rows), dtype=bool, count=len(rows))
+        if not in_overlay.any():
+            # Brzi put: CSR fancy indexing u C-u
+            return self.matrix[rows]
+        parts = [self.row_entries(int(row)) for row in rows[in_overlay]]
+        indptr = np.zeros(len(parts) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(cols) for cols, _ in parts])
+        overlay_block = sparse.csr_matrix(
+            (np.concatenate([values for _, values in parts]), np.concatenate([cols for cols, _ in parts]), indptr),
+            shape=(len(parts), self.n_items),
+        )
+        block = sparse.vstack([self.matrix[rows[~in_overlay]], overlay_block], format='csr')
+        # Vrati redove u traženi redoslijed
+        order = np.concatenate([np.flatnonzero(~in_overlay), np.flatnonzero(in_overlay)])
+        return block[np.argsort(order, kind='stable')]
+
+    def user_row(self, user_key: Hashable) -> Optional[sparse.csr_matrix]:
+        """1 × n_items sparse row for a known user, None otherwise."""
+        row = self.row_of(user_key)
+        if row is None:
+            return None
+        cols, values = self.row_entries(row)
+        return sparse.csr_matrix(
+            (values, (np.zeros(len(cols), dtype=np.int32), cols)),
+            shape=(1, self.n_items),
+            dtype=np.float32,
+        )
+
+    def vector_from_ratings(self, item_ratings: Dict[int, float]) -> sparse.csr_matrix:
+        """1 × n_items sparse row from {movieId: rating}; unknown movieIds are skipped."""
+        cols, values = self._to_columns(item_ratings)
+        return sparse.csr_matrix(
+            (values, (np.zeros(len(cols), dtype=np.int32), cols)),
+            shape=(1, self.n_items),
+            dtype=np.float32,
+        )
+
+    def dot(self, vector: np.ndarray) -> np.ndarray:
+        """Inner product of a dense item vector with every user row."""
+        out = np.zeros(self.n_users, dtype=np.float64)
+        out[:self.matrix.shape[0]] = self.matrix @ vector
+        for row, entries in self._overlay.items():
+            out[row] = sum(rating * vector[col] for col, rating in entries.items())
+        return out
+
+    def cosine(self, vector: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of a dense item vector with every user row.
+        Empty rows and an empty vector give 0, like sklearn's cosine_similarity.
+        """
+        vector_norm = float(np.linalg.norm(vector))
+        if vector_norm == 0.0:
+            return np.zeros(self.n_users, dtype=np.float32)
+        query = (vector * (1.0 / vector_norm)).astype(np.float32, copy=False)
+        out = np.empty(self.n_users, dtype=np.float32)
+        out[:self.matrix.shape[0]] = self.matrix @ query
+        for row, entries in self._overlay.items():
+            out[row] = sum(rating * query[col] for col, rating in entries.items())
+        out *= self.inv_norms
+        return out
+
+    def cosine_many(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        n_users × len(vectors) cosine similarities of many dense item vectors
+        at once: one sparse matrix-matrix product instead of a mat-vec per
+        vector. Column i equals `cosine(vectors[i])`.
+        """
+        queries = np.zeros((len(vectors), self.n_items), dtype=np.float32)
+        for i, vector in enumerate(vectors):
+            # Normiranje red po red, isto kao cosine() (bit-identični rezultati)
+            vector_norm = float(np.linalg.norm(vector))
+            if vector_norm != 0.0:
+                queries[i] = vector * (1.0 / vector_norm)
+        out = np.empty((self.n_users, len(queries)), dtype=np.float32)
+        out[:self.matrix.shape[0]] = self.matrix @ queries.T
+        for row, entries in self._overlay.items():
+            out[row] = [sum(rating * query[col] for col, rating in entries.items()) for query in queries]
+        out *= self.inv_norms[:, None]
+        return out
+
+    def set_rating(self, user_key: Hashable, item_id, rating: float) -> bool:
+        """
+        Set one rating. Cost does not depend on the number of users, items or
+        stored feedback rows (on a copy, the user's overlay row and one cache
+        block per array are copied first). Returns False for items outside
+        the model columns.
+        """
+        col = self.col_of(item_id)
+        if col is None:
+            return False
+        row = self.row_of(user_key)
+        if row is None:
+            row = self._append_user(user_key)
+        entries = self._own_row(row)
+        old = entries.get(col, 0.0)
+        rating = float(rating)
+        entries[col] = rating
+        self._col_sums.add(col, rating - old)
+        sq_norm = self._row_sq_norms.get(row) + rating * rating - old * old
+        self._row_sq_norms.set(row, sq_norm)
+        self._inv_norms.set(row, self._inverse_norm(sq_norm))
+        return True
+
+    def set_user_row(self, user_key: Hashable, item_ratings: Dict[int, float]) -> None:
+        """Replace a user's row (or append a new user) with {movieId: rating}."""
+        row = self.row_of(user_key)
+        if row is None:
+            row = self._append_user(user_key)
+        old_cols, old_values = self.row_entries(row)
+        new_cols, new_values = self._to_columns(item_ratings)
+        entries = {int(c): float(v) for c, v in zip(new_cols, new_values)}
+        # Stare ocjene reda se oduzmu, nove dodaju (jedan take/put po koloni)
+        cols, inverse = np.unique(np.concatenate([old_cols, new_cols]), return_inverse=True)
+        deltas = np.bincount(inverse, weights=np.concatenate([-old_values.astype(np.float64),
+                                                              new_values.astype(np.float64)]),
+                             minlength=len(cols))
+        self._col_sums.put(cols, self._col_sums.take(cols) + deltas)
+        self._overlay[row] = entries
+        self._owned_rows.add(row)
+        sq_norm = sum(v * v for v in entries.values())
+        self._row_sq_norms.set(row, sq_norm)
+        self._inv_norms.set(row, self._inverse_norm(sq_norm))
+
+    def with_user_rows(self, rows: Dict[Hashable, Dict[int, float]]) -> "SparseRatingsStore":
+        """Return a compacted copy with the given user rows set (replaced or appended)."""
+        store = self.copy()
+        for user_key, item_ratings in rows.items():
+            store.set_user_row(user_key, item_ratings)
+        return store.compact()
+
+    def copy(self) -> "SparseRatingsStore":
+        """
+        Copy for building the next model version. Shares the CSR arrays, user
+        keys, overlay rows and caches with this store; writes to either side
+        copy only the overlay row / cache block they touch.
+        """
+        store = SparseRatingsStore.__new__(SparseRatingsStore)
+        store.matrix = self.matrix
+        store._user_keys = self._user_keys
+        store._n_users = self._n_users
+        store._user_rows = self._user_rows
+        store.item_ids = self.item_ids
+        store.item_index = self.item_index
+        # Vanjski dict je mali (najviše compact_threshold redova), redovi se dijele
+        store._overlay = dict(self._overlay)
+        store._owned_rows = set()
+        self._owned_rows = set()
+        store._col_sums = self._col_sums.copy()
+        store._row_sq_norms = self._row_sq_norms.copy()
+        store._inv_norms = self._inv_norms.copy()
+        return store
+
+    def compact(self) -> "SparseRatingsStore":
+        """Return a store whose CSR matrix contains the overlay rows (overlay empty)."""
+        if not self._overlay:
+            return self.copy()
+        base = self.matrix
+        n_base = base.shape[0]
+        shadowed = [row for row in self._overlay if row < n_base]
+        if shadowed:
+            # Obriši CSR redove koje overlay zamjenjuje
+            keep = np.ones(n_base, dtype=np.float32)
+            keep[shadowed] = 0
+            base = sparse.diags(keep, format='csr') @ base
+            base.eliminate_zeros()
+        base = sparse.vstack(
+            [base, sparse.csr_matrix((self.n_users - n_base, self.n_items), dtype=np.float32)],
+            format='csr',
+        )
+        row_ids, col_ids, values = [], [], []
+        for row, entries in self._overlay.items():
+            row_ids.append(np.full(len(entries), row, dtype=np.int32))
+            col_ids.append(np.fromiter(entries.keys(), dtype=np.int32, count=len(entries)))
+            values.append(np.fromiter(entries.values(), dtype=np.float32, count=len(entries)))
+        update = sparse.csr_matrix(
+            (np.concatenate(values), (np.concatenate(row_ids), np.concatenate(col_ids))),
+            shape=(self.n_users, self.n_items),
+            dtype=np.float32,
+        )
+        merged = (base + update).tocsr()
+        merged.eliminate_zeros()
+        merged.sort_indices()
+        return SparseRatingsStore(merged, self.user_keys, self.item_ids)
+
+    def column_means(self) -> np.ndarray:
+        """Mean rating per item with missing ratings counted as 0 (same as the dense pivot)."""
+        if self.n_users == 0:
+            return np.zeros(self.n_items, dtype=np.float64)
+        return self.col_sums / self.n_users
+
+    def _append_user(self, user_key: Hashable) -> int:
+        row = self._n_users
+        if len(self._user_keys) != row:
+            # Dijeljenu listu je već produžila druga kopija (npr. ranije rebuild-an
+            # base store): ova kopija dobija svoju listu i mapu
+            self._user_keys = self._user_keys[:row]
+            self._user_rows = {key: i for i, key in enumerate(self._user_keys)}
+        self._user_keys.append(user_key)
+        self._user_rows[user_key] = row
+        self._n_users = row + 1
+        self._row_sq_norms.append(0.0)
+        self._inv_norms.append(0.0)
+        self._overlay[row] = {}
+        self._owned_rows.add(row)
+        return row
+
+    def _own_row(self, row: int) -> Dict[int, float]:
+        """Overlay entries of a row that this store may modify (copied first if shared)."""
+        entries = self._overlay.get(row)
+        if entries is None:
+            # Prvi update CSR reda: kopiraj ga u overlay
+            cols, values = self.row_entries(row)
+            entries = {int(c): float(v) for c, v in zip(cols, values)}
+        elif row not in self._owned_rows:
+            entries = dict(entries)
+        else:
+            return entries
+        self._overlay[row] = entries
+        self._owned_rows.add(row)
+        return entries
+
+    @staticmethod
+    def _inverse_norm(sq_norms):
+        sq_norms = np.asarray(sq_norms, dtype=np.float64)
+        norms = np.sqrt(np.maximum(sq_norms, 0.0))
+        # Zaokruženje inkrementalnih update-a može ostaviti ~1e-12 umjesto 0
+        return np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 1e-6).astype(np.float32)
+
+    def _base_row_nnz(self, row: int) -> int:
+        if row >= self.matrix.shape[0]:
+            return 0
+        return int(self.matrix.indptr[row + 1] - self.matrix.indptr[row])
+
+    def _to_columns(self, item_ratings: Dict[int, float]):
+        cols, vals = [], []
+        for item_id, rating in item_ratings.items():
+            col = self.col_of(item_id)
+            if col is not None:
+                cols.append(col)
+                vals.append(rating)
+        return np.asarray(cols, dtype=np.int32), np.asarray(vals, dtype=np.float32)
@@ -0,0 +1,32 @@
+"""
+Recommender engine selection, shared by the API and the command line tools.
+
+Importing this module only imports the engine classes: no app, no static
+mount, no model is built until create_recommender() is called.
+"""
+import os
+from typing import Optional
+
+from src.infrastructure.recommender_impl import MLRecommender
+from src.infrastructure.item_recommender_impl import ItemKNNRecommender
+from src.infrastructure.als_recommender_impl import ALSRecommender
+
+# Recommender engine, bira se pri startu: RECOMMENDER_ENGINE=item_knn uvicorn ...
+RECOMMENDER_ENGINES = {
+    "user_knn": MLRecommender,
+    "item_knn": ItemKNNRecommender,
+    "als": ALSRecommender,
+}
+RECOMMENDER_ENGINE = os.environ.get("RECOMMENDER_ENGINE", "user_knn")
+
+# Binarni snapshot modela (mmap) za brz start; prazno = bez snapshot-a
+MODEL_SNAPSHOT_DIR = os.environ.get("MODEL_SNAPSHOT_DIR", "data/model_snapshot") or None
+
+
+def create_recommender(engine: Optional[str] = None, **kwargs) -> MLRecommender:
+    """Instantiate the given recommender engine (default: RECOMMENDER_ENGINE)."""
+    engine = engine or RECOMMENDER_ENGINE
+    if engine not in RECOMMENDER_ENGINES:
+        raise ValueError(f"Unknown RECOMMENDER_ENGINE: {engine} "
+                         f"(choose from {', '.join(RECOMMENDER_ENGINES)})")
+    return RECOMMENDER_ENGINES[engine](**kwargs)
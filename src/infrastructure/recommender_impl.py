@@ -1,20 +1,110 @@
 from src.domain.interfaces import Recommender
-from sklearn.neighbors import NearestNeighbors
-from sklearn.metrics.pairwise import cosine_similarity
 import pandas as pd
 import numpy as np
 import os
-from src.infrastructure.db import SessionLocal, FeedbackModel
+import json
+import time
+import threading
+import itertools
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from scipy import sparse
+from sqlalchemy import func, text, literal_column, select
+from src.infrastructure.db import SessionLocal, AsyncSessionLocal, FeedbackModel
+from src.infrastructure.ratings_store import SparseRatingsStore
+from src.infrastructure.model_refresher import ModelRefresher
+from src.infrastructure.popularity import MoodPopularity
+from src.infrastructure.item_catalog import ItemCatalog
+from src.infrastructure.ann_index import UserIndex, create_user_index, top_k
+from src.infrastructure.snapshot_store import SnapshotStore, source_fingerprint
+from src.infrastructure.profile_cache import UserProfile, UserProfileCache
+from src.infrastructure.result_cache import RecommendationCache
+
+
+class ModelSnapshot:
+    """
+    One published version of the model. Readers take a reference once per
+    request; refreshes build a new snapshot and swap the reference, so a
+    published snapshot is never modified. Feedback deltas build the next
+    snapshot copy-on-write: ratings store and user index share everything
+    the delta does not touch with the published one.
+    """
+
+    def __init__(self, ratings: SparseRatingsStore, user_ratings: dict, popularity: MoodPopularity,
+                 user_index: UserIndex, version: int = 0):
+        self.ratings = ratings  # base_ratings + redovi feedback korisnika
+        self.user_ratings = user_ratings  # user_name -> {item_id: rating}
+        self.popularity = popularity  # mood -> kolone sortirane po popularnosti
+        self.user_index = user_index  # pretraga sličnih korisnika (exact ili ANN)
+        self.version = version
+        self.feedback_watermark = (0, 0)  # (max rowid, broj redova) feedback tabele uključene u model
+
 
 class MLRecommender(Recommender):
-    def __init__(self):
-        self.model = None
-        self.ratings_matrix = None
+    # Kada overlay naraste preko ovoliko redova, rebuild ga spaja nazad u CSR
+    compact_threshold = 256
+    # Više novih feedback redova od ovoga nakon snapshot-a → full reload umjesto replay-a
+    catch_up_limit = 10000
+
+    def __init__(self, refresh_window: Optional[float] = None, n_neighbors: int = 4,
+                 neighbor_weighting: str = "uniform", min_neighbor_rating: float = 4.0,
+                 user_index: str = "exact", user_index_params: Optional[dict] = None,
+                 snapshot_dir: Optional[str] = None, profile_cache_size: int = 10000,
+                 profile_cache_ttl: float = 300.0, result_cache_size: int = 10000,
+                 result_cache_ttl: float = 300.0, catch_up_limit: Optional[int] = None):
+        """
+        Args:
+            refresh_window: if set, model refreshes run on a background thread
+                that merges all feedback arriving within this many seconds into
+                one rebuild. None keeps refreshes synchronous.
+            n_neighbors: number of most similar users used for collaborative scoring
+            neighbor_weighting: "uniform" (plain mean of neighbor ratings) or
+                "similarity" (mean weighted by cosine similarity)
+            min_neighbor_rating: neighbor ratings below this are ignored
+            user_index: similar-user search, "exact" (brute force) or "lsh"
+                (approximate, see src.infrastructure.ann_index)
+            user_index_params: keyword arguments for the user index, e.g.
+                {"n_tables": 16, "n_bits": 14, "n_probes": 1}
+            snapshot_dir: if set, the model is restored from a memory-mapped
+                binary snapshot in this directory when the source CSVs and
+                engine config are unchanged (only newer feedback is replayed),
+                and a snapshot is written after every cold build or full reload
+            profile_cache_size: users whose liked/disliked sets are cached
+                (LRU, 0 disables the cache)
+            profile_cache_ttl: seconds before a cached profile is reloaded
+            result_cache_size: finished recommendation lists cached per
+                (user, mood, n, model version) (LRU, 0 disables the cache)
+            result_cache_ttl: seconds before a cached list is recomputed
+            catch_up_limit: new feedback rows replayed on a restored snapshot
+                before a full reload is cheaper (default: the class attribute;
+                0 = any new row forces a full reload)
+        """
+        if neighbor_weighting not in ("uniform", "similarity"):
+            raise ValueError(f"Unknown neighbor_weighting: {neighbor_weighting}")
+        self.n_neighbors = n_neighbors
+        self.neighbor_weighting = neighbor_weighting
+        self.min_neighbor_rating = min_neighbor_rating
+        self.user_index = user_index
+        self.user_index_params = dict(user_index_params or {})
+        create_user_index(self.user_index, **self.user_index_params)  # rano odbij pogrešnu konfiguraciju
+        self.base_ratings = None  # SparseRatingsStore samo iz ratings.csv (konstantno)
+        self._snapshot: Optional[ModelSnapshot] = None
+        self._write_lock = threading.RLock()
+        self.snapshot_store = SnapshotStore(snapshot_dir) if snapshot_dir else None
+        if catch_up_limit is not None:
+            self.catch_up_limit = catch_up_limit
+        # Liked/disliked po mood-u; learner upisuje novi feedback direktno (write-through)
+        self.profile_cache = UserProfileCache(self._load_user_profile, profile_cache_size, profile_cache_ttl,
+                                              bulk_loader=self._load_user_profiles,
+                                              async_bulk_loader=self._load_user_profiles_async)
+        # Gotove liste preporuka; learner invalidira korisnika nakon feedback-a
+        self.result_cache = RecommendationCache(result_cache_size, result_cache_ttl)
+        self.refresher: Optional[ModelRefresher] = None
         self.model_item_ids = None  # Čuva item_ids koji su korišteni pri treniranju modela
-        self.user_ratings = {}  # user_name -> {item_id: rating}
         self.item_ids = None
-        self.movies = None
-        self.genres = None
+        self.genre_index = None  # GenreIndex poravnat sa kolonama matrice
+        self.catalog: Optional[ItemCatalog] = None  # naslovi, godine, žanrovi (kolonarno)
+        self._mood_columns = {}  # mood -> kolone matrice čiji žanrovi odgovaraju mood-u
         self.mood_genres = {
             "happy": ["Comedy", "Animation", "Musical"],
             "sad": ["Drama", "Romance"],
@@ -25,81 +115,306 @@ class MLRecommender(Recommender):
             "neutral": []  # All genres
         }
         self._load_data()
+        if refresh_window is not None:
+            self.refresher = ModelRefresher(self._build_snapshot, self._swap_snapshot, window=refresh_window)
+            self.refresher.start()
+
+    @property
+    def ratings(self) -> Optional[SparseRatingsStore]:
+        snapshot = self._snapshot
+        return snapshot.ratings if snapshot else None
+
+    @property
+    def user_ratings(self) -> dict:
+        snapshot = self._snapshot
+        return snapshot.user_ratings if snapshot else {}
+
+    @property
+    def model_version(self) -> int:
+        """Monotonically increasing version of the published model."""
+        snapshot = self._snapshot
+        return snapshot.version if snapshot else 0
 
     def _load_data(self):
         data_path = 'data/ml-latest-small'
         if os.path.exists(data_path):
-            ratings = pd.read_csv(f'{data_path}/ratings.csv')
-            movies = pd.read_csv(f'{data_path}/movies.csv')
-            self.movies = movies.set_index('movieId')['title'].to_dict()
-            self.genres = movies.set_index('movieId')['genres'].to_dict()
-            self.years = {}
-            for _, row in movies.iterrows():
-                title = row['title']
-                if '(' in title and title.endswith(')'):
-                    try:
-                        year = int(title.split('(')[-1].strip(')'))
-                        self.years[row['movieId']] = year
-                    except:
-                        self.years[row['movieId']] = None
-                else:
-                    self.years[row['movieId']] = None
-            self.ratings_matrix = ratings.pivot(index='userId', columns='movieId', values='rating').fillna(0)
+            if self._restore_snapshot(data_path):
+                return
+            ratings = pd.read_csv(
+                f'{data_path}/ratings.csv',
+                usecols=['userId', 'movieId', 'rating'],
+                dtype={'userId': np.int32, 'movieId': np.int32, 'rating': np.float32}
+            )
+            movies = pd.read_csv(f'{data_path}/movies.csv', dtype={'movieId': np.int64})
+            self.catalog = ItemCatalog.from_frame(movies, self.mood_genres)
+            del movies
+            # Sparse CSR umjesto dense pivot-a (pivot raste kvadratno sa users × movies)
+            self.base_ratings = SparseRatingsStore.from_frame(ratings)
+            del ratings
             # Sačuva item_ids samo iz ratings CSV-a (KONSTANTNO)
             if self.item_ids is None:
-                self.item_ids = self.ratings_matrix.columns.tolist()
+                self.item_ids = self.base_ratings.item_ids.tolist()
                 self.model_item_ids = list(self.item_ids)  # Inicijalni model koristi iste item_ids
+            # Žanrovi kao bitmaske po koloni (jednom), mood filter je onda jedan vektorizovani AND
+            self.genre_index = self.catalog.genre_index.take(self.catalog.rows_of(self.model_item_ids))
+            self._mood_columns = {mood: self.genre_index.mood_columns(mood) for mood in self.mood_genres}
             
-            # Učitaj feedback-e iz baze i dodaj kao nove redove
-            self._load_feedback_ratings()
-            
-            # Retrain KNN sa feedback rows ali sa ISTIM columns kao originalni ratings_matrix
-            if not self.ratings_matrix.empty and len(self.ratings_matrix) > 0:
-                # KNN radi sa transponiranom matricom (movies kao features, users kao data points)
-                self.model = NearestNeighbors(
-                    n_neighbors=min(3, max(1, len(self.ratings_matrix) - 1)), 
-                    algorithm='brute', 
-                    metric='cosine'
-                )
-                # Transpose jer trebamo movies kao kolone (features)
-                self.model.fit(self.ratings_matrix.T.values)
-                print(f"[ML] Model initialized. Matrix shape: {self.ratings_matrix.shape}, Features: {len(self.model_item_ids)}")
+            # Učitaj feedback-e iz baze i dodaj kao nove redove; user index se gradi uz model
+            self._swap_snapshot(self._build_snapshot([], full_reload=True))
+            print(f"[ML] Model initialized. Matrix shape: {self.ratings.shape}, nnz: {self.ratings.nnz}, "
+                  f"{self.ratings.memory_bytes() / 1e6:.1f} MB, Features: {len(self.model_item_ids)}, "
+                  f"user index: {self.user_index}")
+            self.save_snapshot()
         else:
             pass
     
     def _load_feedback_ratings(self):
-        """Učitaj sve feedback-e iz baze i dodaj kao nove redove u rating matricu."""
+        """
+        Učitaj sve feedback-e iz baze i dodaj kao nove redove u rating matricu.
+        Returns (ratings store, user_ratings, feedback watermark) without
+        touching the published model.
+        """
         db = SessionLocal()
+        feedback_by_user = {}
         try:
-            feedbacks = db.query(FeedbackModel).all()
-            feedback_by_user = {}
-            for fb in feedbacks:
-                if fb.user_name not in feedback_by_user:
-                    feedback_by_user[fb.user_name] = {}
-                feedback_by_user[fb.user_name][int(fb.item_id)] = fb.rating
-                if fb.user_name not in self.user_ratings:
-                    self.user_ratings[fb.user_name] = {}
-                self.user_ratings[fb.user_name][int(fb.item_id)] = fb.rating
+            # Watermark prije čitanja: red upisan u međuvremenu se samo ponovo primijeni
+            watermark = self._feedback_watermark(db)
+            # Samo kolone (bez ORM objekata), redom upisa: kasniji red pobjeđuje
+            feedbacks = db.query(
+                FeedbackModel.user_name, FeedbackModel.item_id, FeedbackModel.rating
+            ).order_by(literal_column("feedback.rowid"))
+            for user_name, item_id, rating in feedbacks:
+                if user_name not in feedback_by_user:
+                    feedback_by_user[user_name] = {}
+                feedback_by_user[user_name][int(item_id)] = rating
             
-            # Dodaj user feedback-e kao nove redove u matricu
-            for user_name, ratings_dict in feedback_by_user.items():
-                # Koristi SAMO item_ids koji su u ratings_matrix (ne pravi nove kolone)
-                user_vector = [ratings_dict.get(item_id, 0) for item_id in self.item_ids]
-                # Koristi unique index (ne user_name koji može biti dupliciran)
-                unique_index = f"user_{user_name}"
-                if unique_index not in self.ratings_matrix.index:
-                    # Kreiraj novi red sa eksplicitnom listom kolona
-                    self.ratings_matrix.loc[unique_index] = 0  # Inicijalizuj sa 0
-                    for i, item_id in enumerate(self.item_ids):
-                        self.ratings_matrix.loc[unique_index, item_id] = user_vector[i]
-                else:
-                    for i, item_id in enumerate(self.item_ids):
-                        self.ratings_matrix.loc[unique_index, item_id] = user_vector[i]
+            # Dodaj user feedback-e kao nove redove u matricu (jedan CSR rebuild za sve korisnike).
+            # Koristi unique index (ne user_name koji može biti dupliciran) i SAMO postojeće kolone.
+            ratings = self.base_ratings.with_user_rows({
+                f"user_{user_name}": ratings_dict
+                for user_name, ratings_dict in feedback_by_user.items()
+            })
+            return ratings, feedback_by_user, watermark
         except Exception as e:
             print(f"[ML] Error loading feedback ratings: {e}")
+            current = self._snapshot
+            if current is not None:
+                return current.ratings, current.user_ratings, current.feedback_watermark
+            return self.base_ratings, {}, (0, 0)
+        finally:
+            db.close()
+
+    def _build_snapshot(self, deltas: list, full_reload: bool = False) -> ModelSnapshot:
+        """
+        Build a new model next to the published one. Deltas are
+        (user_name, item_id, rating, rowid) tuples applied on top of the
+        current model (or on top of a fresh feedback reload when full_reload
+        is set). A delta with the feedback rowid advances the feedback
+        watermark past its row, so a snapshot saved later doesn't replay it.
+        """
+        current = self._snapshot
+        rebuild = full_reload or current is None
+        if rebuild:
+            ratings, user_ratings, watermark = self._load_feedback_ratings()
+            ratings = ratings.copy()
+        else:
+            ratings = current.ratings.copy()
+            user_ratings = dict(current.user_ratings)
+            watermark = current.feedback_watermark
+        changed_cols = set()
+        changed_rows = set()
+        for user_name, item_id, rating, rowid in deltas:
+            user_ratings[user_name] = {**user_ratings.get(user_name, {}), item_id: rating}
+            # Red ispod watermark-a je već u modelu (reload ga je pročitao); redovi van redoslijeda
+            # ostave broj ispod stvarnog, pa restore radi full reload umjesto pogrešnog replay-a
+            if rowid is not None and rowid > watermark[0]:
+                watermark = (rowid, watermark[1] + 1)
+            if ratings.set_rating(f"user_{user_name}", item_id, rating):
+                changed_cols.add(ratings.col_of(item_id))
+                changed_rows.add(ratings.row_of(f"user_{user_name}"))
+        if ratings.overlay_rows > self.compact_threshold:
+            ratings = ratings.compact()
+        if rebuild:
+            popularity = MoodPopularity(ratings.col_sums, self._mood_columns)
+            user_index = create_user_index(self.user_index, **self.user_index_params).fit(ratings)
+        else:
+            popularity = current.popularity.updated(ratings.col_sums, changed_cols)
+            # Inkrementalni insert/re-hash samo promijenjenih redova (novi indeks, objavljeni ostaje isti)
+            user_index = current.user_index.update(ratings, sorted(changed_rows))
+        snapshot = ModelSnapshot(ratings, user_ratings, popularity, user_index)
+        snapshot.feedback_watermark = watermark
+        return snapshot
+
+    def _swap_snapshot(self, snapshot: ModelSnapshot) -> None:
+        """Publish a new snapshot atomically with the next model version."""
+        with self._write_lock:
+            snapshot.version = self.model_version + 1
+            self._snapshot = snapshot
+
+    @staticmethod
+    def _feedback_watermark(db) -> Tuple[int, int]:
+        """(max rowid, row count) of the feedback table; feedback is append-only."""
+        max_rowid, count = db.execute(text("SELECT COALESCE(MAX(rowid), 0), COUNT(*) FROM feedback")).one()
+        return int(max_rowid), int(count)
+
+    def _feedback_since(self, watermark: Tuple[int, int], limit: Optional[int] = None):
+        """
+        Feedback rows added after the watermark as (user_name, item_id,
+        rating, rowid) deltas in insertion order, plus the new watermark. Deltas are None if
+        rows were removed since or more than `limit` rows were added (the
+        snapshot can't be caught up, or a full reload is cheaper).
+        """
+        db = SessionLocal()
+        try:
+            current = self._feedback_watermark(db)
+            if limit is not None and current[1] - watermark[1] > limit:
+                return None, current
+            rowid = literal_column("feedback.rowid")
+            feedbacks = db.query(FeedbackModel, rowid).filter(
+                rowid > watermark[0], rowid <= current[0]
+            ).order_by(rowid).all()
+            if watermark[1] + len(feedbacks) != current[1]:
+                return None, current
+            deltas = []
+            for fb, fb_rowid in feedbacks:
+                try:
+                    deltas.append((fb.user_name, int(fb.item_id), fb.rating, fb_rowid))
+                except (TypeError, ValueError):
+                    continue
+            return deltas, current
         finally:
             db.close()
 
+    def _source_files(self, data_path: str) -> list:
+        return [f'{data_path}/ratings.csv', f'{data_path}/movies.csv']
+
+    def _snapshot_config(self) -> dict:
+        """Settings baked into the snapshot arrays; a snapshot saved with different ones is rebuilt."""
+        return {"engine": type(self).__name__, "mood_genres": self.mood_genres}
+
+    def _snapshot_arrays(self, snapshot: ModelSnapshot) -> dict:
+        """Extra engine arrays to persist with the snapshot (subclass hook)."""
+        return {}
+
+    def _restore_snapshot_arrays(self, snapshot: ModelSnapshot, arrays: dict) -> None:
+        """Attach the extra engine arrays from a loaded snapshot (subclass hook)."""
+        pass
+
+    def save_snapshot(self) -> bool:
+        """Persist the published model as a binary snapshot (no-op without snapshot_dir)."""
+        snapshot = self._snapshot
+        if self.snapshot_store is None or snapshot is None:
+            return False
+        try:
+            started = time.perf_counter()
+            ratings = snapshot.ratings.compact() if snapshot.ratings.overlay_rows else snapshot.ratings
+            arrays = {
+                "ratings_data": ratings.matrix.data,
+                "ratings_indices": ratings.matrix.indices,
+                "ratings_indptr": ratings.matrix.indptr,
+                "item_ids": ratings.item_ids,
+                "col_sums": ratings.col_sums,
+                "row_sq_norms": ratings.row_sq_norms,
+                "base_col_sums": self.base_ratings.col_sums,
+                **self.catalog.to_arrays(),
+            }
+            for mood, ranking in snapshot.popularity.rankings.items():
+                arrays[f"popularity_{mood}"] = ranking
+            arrays.update(self._snapshot_arrays(snapshot))
+            manifest = {
+                "sources": source_fingerprint(self._source_files('data/ml-latest-small')),
+                "config": self._snapshot_config(),
+                "n_base_users": self.base_ratings.n_users,
+                "user_keys": [key if isinstance(key, str) else int(key) for key in ratings.user_keys],
+                "user_ratings": {
+                    user_name: [[int(item_id), rating] for item_id, rating in item_ratings.items()]
+                    for user_name, item_ratings in snapshot.user_ratings.items()
+                },
+                "feedback_watermark": list(snapshot.feedback_watermark),
+            }
+            path = self.snapshot_store.save(arrays, manifest)
+            print(f"[ML] Model snapshot saved to {path} in {(time.perf_counter() - started) * 1000:.0f}ms")
+            return True
+        except Exception as e:
+            print(f"[ML] Error saving model snapshot: {e}")
+            return False
+
+    def _restore_snapshot(self, data_path: str) -> bool:
+        """
+        Restore the model from the current binary snapshot (arrays stay
+        memory-mapped) and replay feedback newer than its watermark.
+        Returns False if there is no snapshot or it is stale.
+        """
+        if self.snapshot_store is None:
+            return False
+        started = time.perf_counter()
+        loaded = self.snapshot_store.load()
+        if loaded is None:
+            return False
+        arrays, manifest = loaded
+        try:
+            if (manifest.get("sources") != source_fingerprint(self._source_files(data_path))
+                    or manifest.get("config") != json.loads(json.dumps(self._snapshot_config()))):
+                print("[ML] Model snapshot is stale, rebuilding from CSV")
+                return False
+            self.catalog = ItemCatalog.from_arrays(arrays, self.mood_genres)
+
+            # CSR direktno nad mmap nizovima (bez kopije); bazni redovi su prefiks matrice
+            item_ids = arrays["item_ids"]
+            indptr = arrays["ratings_indptr"]
+            user_keys = manifest["user_keys"]
+            n_base = manifest["n_base_users"]
+            matrix = sparse.csr_matrix(
+                (arrays["ratings_data"], arrays["ratings_indices"], indptr),
+                shape=(len(user_keys), len(item_ids)), copy=False
+            )
+            base_nnz = int(indptr[n_base])
+            base_matrix = sparse.csr_matrix(
+                (arrays["ratings_data"][:base_nnz], arrays["ratings_indices"][:base_nnz], indptr[:n_base + 1]),
+                shape=(n_base, len(item_ids)), copy=False
+            )
+            self.base_ratings = SparseRatingsStore.from_arrays(
+                base_matrix, user_keys[:n_base], item_ids, arrays["base_col_sums"], arrays["row_sq_norms"][:n_base]
+            )
+            ratings = SparseRatingsStore.from_arrays(
+                matrix, user_keys, item_ids, arrays["col_sums"], arrays["row_sq_norms"]
+            )
+            self.item_ids = item_ids.tolist()
+            self.model_item_ids = list(self.item_ids)
+            self.genre_index = self.catalog.genre_index.take(self.catalog.rows_of(self.model_item_ids))
+            self._mood_columns = {mood: self.genre_index.mood_columns(mood) for mood in self.mood_genres}
+
+            popularity = MoodPopularity.from_rankings(
+                ratings.col_sums, {mood: arrays[f"popularity_{mood}"] for mood in self.mood_genres}
+            )
+            user_ratings = {
+                user_name: {item_id: rating for item_id, rating in item_ratings}
+                for user_name, item_ratings in manifest["user_ratings"].items()
+            }
+            user_index = create_user_index(self.user_index, **self.user_index_params).fit(ratings)
+            snapshot = ModelSnapshot(ratings, user_ratings, popularity, user_index)
+            snapshot.feedback_watermark = tuple(manifest["feedback_watermark"])
+            self._restore_snapshot_arrays(snapshot, arrays)
+        except Exception as e:
+            print(f"[ML] Error restoring model snapshot: {e}")
+            return False
+        self._swap_snapshot(snapshot)
+
+        # Sustigni feedback upisan nakon snapshot-a
+        deltas, watermark = self._feedback_since(snapshot.feedback_watermark, limit=self.catch_up_limit)
+        if deltas is None:
+            print("[ML] Feedback can't be replayed on the snapshot (rows removed or bulk import), full reload")
+            self._swap_snapshot(self._build_snapshot([], full_reload=True))
+            self.save_snapshot()
+        elif deltas:
+            caught_up = self._build_snapshot(deltas)
+            caught_up.feedback_watermark = watermark
+            self._swap_snapshot(caught_up)
+        print(f"[ML] Model restored from snapshot in {(time.perf_counter() - started) * 1000:.0f}ms. "
+              f"Matrix shape: {self.ratings.shape}, nnz: {self.ratings.nnz}, "
+              f"replayed feedback: {len(deltas) if deltas is not None else 'all'}")
+        return True
+
     def recommend(self, user_name: str, mood: str = "neutral", n: int = 10) -> list[dict[str, any]]:
         """
         Pravi collaborative filtering preporuke:
@@ -109,136 +424,202 @@ class MLRecommender(Recommender):
         4. Fallback: popularne filmove
         5. Filter po mood-u
         """
-        if self.model is None or self.ratings_matrix is None or self.ratings_matrix.empty:
-            return [{"item_id": f"movie_{i}", "title": f"Movie {i}", "year": "Unknown", "genres": "", "score": 1.0 - i*0.1, "reason": "Popular", "llm_description": "A great movie!", "agent_mood": "Fallback mode – enjoy!"} for i in range(n)]
-        
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.ratings.n_users == 0:
+            return self._fallback_recommendations(n)
+        # Isti (user, mood, n) na istoj verziji modela → lista iz keša
+        return self.result_cache.get(user_name, mood, n, snapshot.version,
+                                     lambda: self._recommend(user_name, mood, n, snapshot))
+
+    def recommend_batch(self, requests: Iterable[Tuple[str, str]], n: int = 10,
+                        chunk_size: int = 64) -> Iterator[Tuple[str, str, List[dict]]]:
+        """
+        (user_name, mood, recommendations) for many (user_name, mood) pairs,
+        yielded in request order. Requests are handled chunk by chunk: the
+        chunk's missing profiles are loaded with one query and the
+        collaborative step scores all its users together (one matrix-matrix
+        product for the similar-user search). Lists are the same as from
+        recommend() (engines scoring with matrix products may differ in the
+        last float32 bit of a score); the result cache is bypassed.
+        """
+        requests = iter(requests)
+        while True:
+            chunk = list(itertools.islice(requests, chunk_size))
+            if not chunk:
+                return
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.ratings.n_users == 0:
+                for user_name, mood in chunk:
+                    yield user_name, mood, self._fallback_recommendations(n)
+                continue
+            profiles = self._get_profiles(user_name for user_name, _ in chunk)
+            for (user_name, mood), results in zip(chunk, self._recommend_many(chunk, profiles, n, snapshot)):
+                yield user_name, mood, results
+
+    @staticmethod
+    def _fallback_recommendations(n: int) -> list[dict]:
+        return [{"item_id": f"movie_{i}", "title": f"Movie {i}", "year": "Unknown", "genres": "", "score": 1.0 - i*0.1, "reason": "Popular", "llm_description": "A great movie!", "agent_mood": "Fallback mode – enjoy!"} for i in range(n)]
+
+    def _recommend(self, user_name: str, mood: str, n: int, snapshot: ModelSnapshot) -> list[dict]:
+        # Jedan profil (iz keša ili jednim DB upitom) za liked i disliked
+        return self._recommend_many([(user_name, mood)], {user_name: self._get_profile(user_name)}, n, snapshot)[0]
+
+    def _recommend_many(self, requests: List[Tuple[str, str]], profiles: Dict[str, UserProfile], n: int,
+                        snapshot: ModelSnapshot) -> List[list[dict]]:
         results = []
+        queries = []  # (user_name, liked, disliked, remaining, mood) po zahtjevu
         
         # 1. Prikaži prvo liked filmove za ovaj mood
-        liked = self._get_liked_movies(user_name, mood)
-        disliked = self._get_disliked_movies_by_name(user_name, mood)
-        
-        for movie_id in liked[:n]:
-            results.append({
+        for user_name, mood in requests:
+            profile = profiles.get(user_name) or UserProfile()
+            liked = profile.liked_for(mood)
+            disliked = profile.disliked_for(mood)
+            user_results = [{
                 "item_id": str(movie_id),
-                "title": self.movies.get(int(movie_id), f"Movie {movie_id}"),
-                "year": self.years.get(int(movie_id), "Unknown"),
-                "genres": self.genres.get(int(movie_id), ""),
+                "title": self.catalog.title(movie_id),
+                "year": self.catalog.year(movie_id),
+                "genres": self.catalog.genres_of(movie_id),
                 "score": 5.0,
                 "reason": "You liked this before!",
-                "llm_description": self.get_llm_description(self.movies.get(int(movie_id), f"Movie {movie_id}"), self.genres.get(int(movie_id), "")),
+                "llm_description": self.get_llm_description(self.catalog.title(movie_id), self.catalog.genres_of(movie_id)),
                 "agent_mood": "You loved this one!"
-            })
+            } for movie_id in liked[:n]]
+            results.append(user_results)
+            queries.append((user_name, liked, disliked, n - len(user_results), mood))
         
-        if len(results) < n:
-            # 2. Collaborative filtering: pronađi slične korisnike
-            remaining = n - len(results)
-            user_recommendations = self._get_collaborative_recommendations(user_name, liked, disliked, remaining, mood)
-            results.extend(user_recommendations)
+        # 2. Collaborative filtering: pronađi slične korisnike (svi korisnici kojima fali preporuka zajedno)
+        pending = [i for i, query in enumerate(queries) if query[3] > 0]
+        collaborative = self._get_collaborative_batch([queries[i] for i in pending], snapshot)
+        for i, user_recommendations in zip(pending, collaborative):
+            results[i].extend(user_recommendations)
         
-        if len(results) < n:
-            # 3. FALLBACK: popularne preporuke za mood
-            remaining = n - len(results)
-            popular_recs = self._get_popular_recommendations(liked, disliked, remaining, mood)
-            results.extend(popular_recs)
+        # 3. FALLBACK: popularne preporuke za mood
+        for (user_name, liked, disliked, _, mood), user_results in zip(queries, results):
+            if len(user_results) < n:
+                remaining = n - len(user_results)
+                user_results.extend(self._get_popular_recommendations(liked, disliked, remaining, mood, snapshot=snapshot))
         
-        return results[:n]
+        return [user_results[:n] for user_results in results]
     
-    def _get_popular_recommendations(self, liked: list, disliked: list, count: int, mood: str) -> list[dict]:
+    def _get_popular_recommendations(self, liked: list, disliked: list, count: int, mood: str,
+                                     snapshot: Optional[ModelSnapshot] = None) -> list[dict]:
         """Dohvati popularne filmove kao fallback preporuke."""
         recommendations = []
         try:
-            popular_items = self.ratings_matrix.mean().sort_values(ascending=False)
-            popular_items = popular_items[~popular_items.index.isin(liked + disliked)]
-            movie_ids = list(popular_items.index)
-            
-            # Filter po mood-u
-            for movie_id in movie_ids:
-                if len(recommendations) >= count:
-                    break
-                movie_genres = self.genres.get(int(movie_id), "").split("|")
-                if self._matches_mood(movie_genres, mood):
-                    recommendations.append({
-                        "item_id": str(movie_id),
-                        "title": self.movies.get(int(movie_id), f"Movie {movie_id}"),
-                        "year": self.years.get(int(movie_id), "Unknown"),
-                        "genres": self.genres.get(int(movie_id), ""),
-                        "score": popular_items.get(movie_id, 0),
-                        "reason": "Popular recommendation for your mood",
-                        "llm_description": self.get_llm_description(self.movies.get(int(movie_id), f"Movie {movie_id}"), self.genres.get(int(movie_id), "")),
-                        "agent_mood": "Trending now!"
-                    })
+            snapshot = snapshot or self._snapshot
+            ratings = snapshot.ratings
+            excluded_cols = np.array(
+                [col for col in map(ratings.col_of, liked + disliked) if col is not None], dtype=np.int32
+            )
+            # Rangiranje po mood-u je već izračunato pri build-u modela
+            cols, scores = snapshot.popularity.top(mood, count, excluded_cols, ratings.n_users)
+            for col, score in zip(cols, scores):
+                movie_id = int(ratings.item_ids[col])
+                recommendations.append({
+                    "item_id": str(movie_id),
+                    "title": self.catalog.title(movie_id),
+                    "year": self.catalog.year(movie_id),
+                    "genres": self.catalog.genres_of(movie_id),
+                    "score": float(score),
+                    "reason": "Popular recommendation for your mood",
+                    "llm_description": self.get_llm_description(self.catalog.title(movie_id), self.catalog.genres_of(movie_id)),
+                    "agent_mood": "Trending now!"
+                })
         except Exception as e:
             print(f"[ML] Error in popular recommendations: {e}")
         
         return recommendations[:count]
     
-    def _get_collaborative_recommendations(self, user_name: str, liked: list, disliked: list, count: int, mood: str) -> list[dict]:
+    def _get_collaborative_recommendations(self, user_name: str, liked: list, disliked: list, count: int, mood: str,
+                                           snapshot: Optional[ModelSnapshot] = None) -> list[dict]:
         """
         Koristi cosine similarity da pronađe slične korisnike.
         Ne koristi KNN jer se matrica dinamički mijenja sa novim feedback-ima.
         """
-        recommendations = []
+        return self._get_collaborative_batch([(user_name, liked, disliked, count, mood)], snapshot or self._snapshot)[0]
+
+    def _get_collaborative_batch(self, queries: List[tuple], snapshot: ModelSnapshot) -> List[list[dict]]:
+        """
+        Collaborative recommendations for many (user_name, liked, disliked,
+        count, mood) queries. The similar-user search runs for all of them at
+        once (exact index: one sparse matrix-matrix product), and so does the
+        aggregation of every user's neighbor ratings.
+        """
+        ratings = snapshot.ratings
+        if not queries or not self.model_item_ids or not ratings.nnz:
+            return [[] for _ in queries]
         try:
-            if not self.model_item_ids or not self.ratings_matrix.size:
-                return recommendations
-            
-            # Kreiraj user vector za trenutnog korisnika
-            unique_user_index = f"user_{user_name}"
-            if unique_user_index in self.ratings_matrix.index:
-                user_vector = self.ratings_matrix.loc[unique_user_index].values
-            else:
-                # Ako korisnik nije u matrici, kreiraj vektor od liked/disliked
-                user_vector = np.zeros(len(self.model_item_ids))
-                for item in liked:
-                    if item in self.model_item_ids:
-                        user_vector[self.model_item_ids.index(item)] = 5.0
-                for item in disliked:
-                    if item in self.model_item_ids:
-                        user_vector[self.model_item_ids.index(item)] = 1.0
-            
-            # Izračunaj cosine similarity sa svim korisnicima
-            similarities = cosine_similarity([user_vector], self.ratings_matrix.values)[0]
-            
-            # Pronađi top slične korisnike (ne tog korisnika samog)
-            sorted_indices = np.argsort(similarities)[::-1]
+            user_vectors, user_rows = [], []
+            for user_name, liked, disliked, _, _ in queries:
+                # Kreiraj user vector za korisnika
+                user_row = ratings.row_of(f"user_{user_name}")
+                if user_row is not None:
+                    user_vector = ratings.row_dense(user_row)
+                else:
+                    # Ako korisnik nije u matrici, kreiraj vektor od liked/disliked
+                    item_ratings = {item: 5.0 for item in liked}
+                    item_ratings.update({item: 1.0 for item in disliked})
+                    user_vector = ratings.vector_from_ratings(item_ratings).toarray().ravel()
+                user_vectors.append(user_vector)
+                user_rows.append(user_row)
             
-            # Prikupli preporuke od sličnihusers
-            similar_users_recommendations = {}
-            top_n = min(5, len(sorted_indices))
+            # Top-k slični korisnici (ne sam korisnik) preko user indexa:
+            # exact = jedan float32 mat-mat nad svim redovima, lsh = samo kandidati iz bucket-a
+            found = snapshot.user_index.search_many(ratings, np.array(user_vectors), self.n_neighbors, user_rows)
             
-            for idx in sorted_indices[1:top_n]:  # Preskoči prvog (to je sam korisnik/najbliži)
-                if idx < len(self.ratings_matrix):
-                    similar_user_ratings = self.ratings_matrix.iloc[idx]
-                    for movie_id, rating in similar_user_ratings.items():
-                        if rating >= 4 and movie_id not in liked and movie_id not in disliked:
-                            if movie_id not in similar_users_recommendations:
-                                similar_users_recommendations[movie_id] = []
-                            similar_users_recommendations[movie_id].append(rating)
+            # Jedna maskirana (težinska) agregacija preko redova susjeda svih korisnika:
+            # weights (korisnik × susjed) @ blok ocjena susjeda
+            neighbors = np.concatenate([rows for rows, _ in found])
+            block = ratings.rows_matrix(neighbors)
+            block.data = np.where(block.data >= self.min_neighbor_rating, block.data, 0).astype(np.float32)
+            block.eliminate_zeros()
+            if self.neighbor_weighting == "similarity":
+                weights = np.concatenate([np.maximum(similarities, 0.0) for _, similarities in found]).astype(np.float64)
+            else:
+                weights = np.ones(len(neighbors))
+            indptr = np.zeros(len(found) + 1, dtype=np.int64)
+            indptr[1:] = np.cumsum([len(rows) for rows, _ in found])
+            user_weights = sparse.csr_matrix((weights, np.arange(len(neighbors)), indptr),
+                                             shape=(len(found), len(neighbors)))
+            numerators = (user_weights @ block).toarray()
+            denominators = (user_weights @ (block != 0)).toarray()
+        except Exception as e:
+            print(f"[ML] Error in collaborative recommendations: {e}")
+            return [[] for _ in queries]
+        return [
+            self._rank_neighbor_scores(liked, disliked, count, mood, numerator, denominator, snapshot)
+            if len(rows) else []
+            for (_, liked, disliked, count, mood), (rows, _), numerator, denominator
+            in zip(queries, found, numerators, denominators)
+        ]
+
+    def _rank_neighbor_scores(self, liked: list, disliked: list, count: int, mood: str, numerator: np.ndarray,
+                              denominator: np.ndarray, snapshot: ModelSnapshot) -> list[dict]:
+        """Filmovi koje su susjedi visoko ocijenili, bez liked/disliked, filtrirano po mood-u."""
+        recommendations = []
+        try:
+            ratings = snapshot.ratings
+            scores = np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
             
-            # Sortiraj po prosjeku rating-a od sličnih korisnika
-            sorted_recs = sorted(
-                similar_users_recommendations.items(),
-                key=lambda x: np.mean(x[1]),
-                reverse=True
-            )
+            # Isključi liked/disliked i primijeni mood masku prije top-k (ne gubimo kandidate)
+            candidate_cols = np.flatnonzero(denominator > 0)
+            excluded_cols = [col for col in map(ratings.col_of, liked + disliked) if col is not None]
+            candidate_cols = candidate_cols[~np.isin(candidate_cols, excluded_cols)]
+            candidate_cols = candidate_cols[self.genre_index.matches(candidate_cols, mood)]
+            top_cols = candidate_cols[top_k(scores[candidate_cols], count)]
             
-            # Filter po mood-u i kreiraj rezultate
-            for movie_id, ratings in sorted_recs[:count * 2]:
-                movie_genres = self.genres.get(int(movie_id), "").split("|")
-                if self._matches_mood(movie_genres, mood):
-                    recommendations.append({
-                        "item_id": str(movie_id),
-                        "title": self.movies.get(int(movie_id), f"Movie {movie_id}"),
-                        "year": self.years.get(int(movie_id), "Unknown"),
-                        "genres": self.genres.get(int(movie_id), ""),
-                        "score": np.mean(ratings),
-                        "reason": f"Similar users loved this",
-                        "llm_description": self.get_llm_description(self.movies.get(int(movie_id), f"Movie {movie_id}"), self.genres.get(int(movie_id), "")),
-                        "agent_mood": "⭐ Based on your taste!"
-                    })
-                    if len(recommendations) >= count:
-                        break
+            for col in top_cols:
+                movie_id = int(ratings.item_ids[col])
+                recommendations.append({
+                    "item_id": str(movie_id),
+                    "title": self.catalog.title(movie_id),
+                    "year": self.catalog.year(movie_id),
+                    "genres": self.catalog.genres_of(movie_id),
+                    "score": float(scores[col]),
+                    "reason": f"Similar users loved this",
+                    "llm_description": self.get_llm_description(self.catalog.title(movie_id), self.catalog.genres_of(movie_id)),
+                    "agent_mood": "⭐ Based on your taste!"
+                })
         except Exception as e:
             print(f"[ML] Error in collaborative recommendations: {e}")
         
@@ -246,20 +627,70 @@ class MLRecommender(Recommender):
     
     def _matches_mood(self, movie_genres: list, mood: str) -> bool:
         """Provjeri da li filmske žanre odgovaraju mood-u."""
-        if mood == "neutral":
+        mood_mask = self.genre_index.mood_masks.get(mood, 0)
+        if mood_mask is None:
             return True
-        target_genres = self.mood_genres.get(mood, [])
-        return any(g in target_genres for g in movie_genres)
+        return (self.genre_index.mask_for(movie_genres) & mood_mask) != 0
 
-    def update_model(self):
+    def apply_feedback(self, user_name: str, item_id, rating: float, rowid: Optional[int] = None) -> None:
+        """
+        Apply one new rating as a delta: patch only that matrix entry and the
+        cached column sums/row norms instead of reloading all feedback.
+        With a background refresher the delta is only queued; it becomes
+        visible with the next model version. `rowid` is the feedback row's
+        rowid; without it the snapshot watermark stays behind the row and the
+        next restore replays it.
         """
-        Update model by reloading feedback ratings.
+        if self._snapshot is None:
+            return
+        try:
+            item_id = int(item_id)
+        except (TypeError, ValueError):
+            return
+        if self.refresher and self.refresher.running:
+            self.refresher.submit((user_name, item_id, rating, rowid))
+            return
+        with self._write_lock:
+            self._swap_snapshot(self._build_snapshot([(user_name, item_id, rating, rowid)]))
+
+    def update_model(self) -> bool:
+        """
+        Update model by reloading feedback ratings (full reload).
         Cosine similarity ne zahteva retrain - jednostavno učitaj nove feedback-e.
+        Za pojedinačni novi feedback koristi apply_feedback().
+        Returns True if the new model is published, False if the rebuild was
+        only queued on the background refresher.
         """
+        if self.refresher and self.refresher.running:
+            self.refresher.request_rebuild()
+            return False
         print("[ML] Updating model with new feedback...")
-        self.user_ratings.clear()
-        self._load_feedback_ratings()
-        print(f"[ML] Model updated. Matrix shape: {self.ratings_matrix.shape}, Users: {len(self.ratings_matrix)}")
+        with self._write_lock:
+            self._swap_snapshot(self._build_snapshot([], full_reload=True))
+        print(f"[ML] Model updated. Matrix shape: {self.ratings.shape}, Users: {self.ratings.n_users}")
+        return True
+
+    def get_model_stats(self) -> dict:
+        """Published model version and refresher counters."""
+        snapshot = self._snapshot
+        return {
+            "engine": type(self).__name__,
+            "model_version": self.model_version,
+            "users": snapshot.ratings.n_users if snapshot else 0,
+            "items": snapshot.ratings.n_items if snapshot else 0,
+            "nnz": snapshot.ratings.nnz if snapshot else 0,
+            "overlay_rows": snapshot.ratings.overlay_rows if snapshot else 0,
+            "catalog_bytes": self.catalog.memory_bytes() if self.catalog else 0,
+            "user_index": snapshot.user_index.get_stats() if snapshot else None,
+            "refresher": self.refresher.get_stats() if self.refresher else None,
+            "profile_cache": self.profile_cache.get_stats(),
+            "result_cache": self.result_cache.get_stats(),
+        }
+
+    def stop_refresher(self) -> None:
+        """Stop the background refresher (pending deltas are dropped; they are already in the DB)."""
+        if self.refresher:
+            self.refresher.stop(timeout=5.0)
 
     def get_llm_description(self, movie_title: str, genres: str) -> str:
         # Dummy LLM: opis filma bez API
@@ -268,42 +699,106 @@ class MLRecommender(Recommender):
     def _filter_by_mood(self, movie_ids: list, mood: str) -> list:
         if mood == "neutral":
             return movie_ids
-        target_genres = self.mood_genres.get(mood, [])
-        filtered = []
-        for mid in movie_ids:
-            movie_genres = self.genres.get(int(mid), "").split("|")
-            if any(g in target_genres for g in movie_genres):
-                filtered.append(mid)
-        return filtered[:10]  # Limit to 10
+        rows = self.catalog.rows_of([int(mid) for mid in movie_ids])
+        keep = self.catalog.genre_index.take(rows).matches(np.arange(len(rows)), mood)
+        return [mid for mid, ok in zip(movie_ids, keep) if ok][:10]  # Limit to 10
     
-    def _get_liked_movies(self, user_name: str, mood: str) -> list:
-        """Dohvati lajkovane filmove za user-a i mood (rating >= 4), sortirano po vremenu"""
+    def _load_user_profile(self, user_name: str) -> UserProfile:
+        """Sav feedback korisnika jednim upitom, grupisan po mood-u (cache loader)."""
+        return self._load_user_profiles([user_name])[user_name]
+
+    def _load_user_profiles(self, user_names: List[str]) -> Dict[str, UserProfile]:
+        """Profili više korisnika jednim upitom (cache bulk loader)."""
         db = SessionLocal()
         try:
-            feedbacks = db.query(FeedbackModel).filter(
-                FeedbackModel.user_name == user_name,
-                FeedbackModel.mood == mood,
-                FeedbackModel.rating >= 4
-            ).order_by(FeedbackModel.timestamp.desc()).all()
-            return [int(fb.item_id) for fb in feedbacks]
-        except Exception as e:
-            print(f"Error getting liked movies: {e}")
-            return []
+            feedbacks = db.execute(self._profile_query(user_names)).scalars().all()
         finally:
             db.close()
-    
-    def _get_disliked_movies_by_name(self, user_name: str, mood: str) -> list:
-        """Dohvati dislajkovane filmove za user-a i mood (rating <= 2)"""
-        db = SessionLocal()
+        return self._build_profiles(user_names, feedbacks)
+
+    async def _load_user_profiles_async(self, user_names: List[str]) -> Dict[str, UserProfile]:
+        """_load_user_profiles preko async engine-a (cache async bulk loader)."""
+        async with AsyncSessionLocal() as db:
+            feedbacks = (await db.execute(self._profile_query(user_names))).scalars().all()
+        return self._build_profiles(user_names, feedbacks)
+
+    @staticmethod
+    def _profile_query(user_names: List[str]):
+        return select(FeedbackModel).where(
+            FeedbackModel.user_name.in_(user_names)
+        ).order_by(literal_column("feedback.rowid"))
+
+    @staticmethod
+    def _build_profiles(user_names: List[str], feedbacks) -> Dict[str, UserProfile]:
+        by_user = {user_name: [] for user_name in user_names}
+        for fb in feedbacks:
+            by_user[fb.user_name].append(fb)
+        profiles = {}
+        for user_name, user_feedbacks in by_user.items():
+            profile = UserProfile()
+            # Liked sortirano po vremenu (najnoviji prvi), disliked redom upisa
+            for fb in sorted(user_feedbacks, key=lambda fb: fb.timestamp or datetime.min, reverse=True):
+                if fb.rating is not None and fb.rating >= 4:
+                    profile.liked.setdefault(fb.mood, []).append(int(fb.item_id))
+            for fb in user_feedbacks:
+                if fb.rating is not None and fb.rating <= 2:
+                    profile.disliked.setdefault(fb.mood, []).append(int(fb.item_id))
+            profiles[user_name] = profile
+        return profiles
+
+    def _get_profile(self, user_name: str) -> UserProfile:
         try:
-            feedbacks = db.query(FeedbackModel).filter(
-                FeedbackModel.user_name == user_name,
-                FeedbackModel.mood == mood,
-                FeedbackModel.rating <= 2
-            ).all()
-            return [int(fb.item_id) for fb in feedbacks]
+            return self.profile_cache.get(user_name)
         except Exception as e:
-            print(f"Error getting disliked movies: {e}")
-            return []
-        finally:
-            db.close()
\ No newline at end of file
+            print(f"Error getting user profile: {e}")
+            return UserProfile()
+
+    async def prefetch_profiles_async(self, user_names: Iterable[str]) -> None:
+        """
+        Load the users' missing profiles into the cache on the async engine,
+        so recommend() in the threadpool finds them cached instead of
+        querying SQLite from a worker thread. Errors are left to the sync path.
+        """
+        if self.profile_cache.max_users <= 0:
+            return  # keš isključen: profil bi se ionako učitao ponovo
+        try:
+            await self.profile_cache.get_many_async(user_names)
+        except Exception as e:
+            print(f"Error prefetching user profiles: {e}")
+
+    def _get_profiles(self, user_names: Iterable[str]) -> Dict[str, UserProfile]:
+        try:
+            return self.profile_cache.get_many(user_names)
+        except Exception as e:
+            print(f"Error getting user profiles: {e}")
+            return {}
+
+    @staticmethod
+    def _feedback_version_query(user_name: str):
+        rowid = literal_column("feedback.rowid")
+        return select(func.coalesce(func.max(rowid), 0), func.count()).select_from(FeedbackModel).where(
+            FeedbackModel.user_name == user_name
+        )
+
+    async def feedback_version_async(self, user_name: str) -> Optional[str]:
+        """
+        Per-user feedback version read from the DB: "<max rowid>.<row count>"
+        of the user's feedback rows. Every insert (from any process) raises
+        the rowid and every removal lowers the count, so the version is
+        never stale; None if the query fails.
+        """
+        try:
+            async with AsyncSessionLocal() as db:
+                max_rowid, count = (await db.execute(self._feedback_version_query(user_name))).one()
+            return f"{max_rowid}.{count}"
+        except Exception as e:
+            print(f"Error getting feedback version: {e}")
+            return None
+
+    def _get_liked_movies(self, user_name: str, mood: str) -> list:
+        """Dohvati lajkovane filmove za user-a i mood (rating >= 4), sortirano po vremenu"""
+        return self._get_profile(user_name).liked_for(mood)
+
+    def _get_disliked_movies_by_name(self, user_name: str, mood: str) -> list:
+        """Dohvati dislajkovane filmove za user-a i mood (rating <= 2)"""
+        return self._get_profile(user_name).disliked_for(mood)
@@ -0,0 +1,121 @@
+"""
+In-memory recommendation result cache.
+
+A finished recommendation list is cached under (user, mood, n, model
+version). A new model version makes older entries unreachable (they age
+out of the LRU), and the learner invalidates a user's entries as soon as
+their feedback is saved, since liked/disliked movies change the list before
+the next model version is published. The TTL only bounds staleness for
+feedback written by other processes.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+CacheKey = Tuple[str, str, int, int]  # (user_name, mood, n, model_version)
+
+
+def estimate_bytes(results: List[dict]) -> int:
+    """Approximate size of a recommendation list (list + dicts + values, shared keys excluded)."""
+    size = sys.getsizeof(results)
+    for result in results:
+        size += sys.getsizeof(result) + sum(sys.getsizeof(value) for value in result.values())
+    return size
+
+
+class RecommendationCache:
+    """
+    Bounded LRU + TTL cache of recommendation lists.
+
+    Args:
+        max_entries: lists kept before the least recently used is evicted
+            (0 disables caching, every get is a compute)
+        ttl: seconds a cached list stays valid
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[CacheKey, tuple]" = OrderedDict()  # key -> (results, stored_at, bytes)
+        self._by_user: Dict[str, Set[CacheKey]] = {}
+        self._lock = threading.Lock()
+        self._writes = 0  # broji invalidacije; compute tokom invalidacije se ne kešira
+        self.memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, user_name: str, mood: str, n: int, model_version: int,
+            compute: Callable[[], List[dict]]) -> List[dict]:
+        """Cached list for the key, or compute() on a miss. Callers get their own list."""
+        key = (user_name, mood, n, model_version)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                results, stored_at, _ = entry
+                if now - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return list(results)
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            writes = self._writes
+        # Preporuke se računaju van lock-a
+        results = compute()
+        with self._lock:
+            if self.max_entries > 0 and writes == self._writes:
+                if key in self._entries:
+                    self._remove(key)
+                size = estimate_bytes(results)
+                self._entries[key] = (results, now, size)
+                self._by_user.setdefault(user_name, set()).add(key)
+                self.memory_bytes += size
+                while len(self._entries) > self.max_entries:
+                    self._remove(next(iter(self._entries)))
+                    self.evictions += 1
+        return list(results)
+
+    def invalidate(self, user_name: Optional[str] = None) -> None:
+        """Drop one user's lists (all moods, sizes and model versions), or every list."""
+        with self._lock:
+            self.invalidations += 1
+            self._writes += 1
+            if user_name is None:
+                self._entries.clear()
+                self._by_user.clear()
+                self.memory_bytes = 0
+                return
+            for key in list(self._by_user.get(user_name, ())):
+                self._remove(key)
+
+    def _remove(self, key: CacheKey) -> None:
+        _, _, size = self._entries.pop(key)
+        self.memory_bytes -= size
+        user_keys = self._by_user.get(key[0])
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._by_user[key[0]]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "users": len(self._by_user),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "memory_bytes": self.memory_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,95 @@
+"""
+Versioned on-disk model snapshots.
+
+A snapshot is a directory of plain `.npy` arrays plus a `manifest.json`
+with the metadata needed to validate and rebuild the model around them.
+Arrays are loaded with `mmap_mode='r'`, so a worker starts without parsing
+any CSV and every process that maps the same snapshot shares its pages via
+the OS page cache instead of holding a private copy.
+
+Writers never touch a published snapshot: each save goes into a fresh
+`v<n>` directory and then the `CURRENT` pointer file is replaced
+atomically, so concurrent readers always see a complete snapshot. Older
+versions are pruned; on POSIX a process that still maps a pruned version
+keeps its pages until it unmaps them.
+"""
+import json
+import os
+import shutil
+import time
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
+
+# Povećati kad se promijeni raspored nizova ili manifest
+FORMAT_VERSION = 2
+
+
+def source_fingerprint(paths: Iterable[str]) -> Dict[str, list]:
+    """(size, mtime_ns) of every source file; any change invalidates the snapshot."""
+    fingerprint = {}
+    for path in paths:
+        stat = os.stat(path)
+        fingerprint[os.path.basename(path)] = [stat.st_size, stat.st_mtime_ns]
+    return fingerprint
+
+
+class SnapshotStore:
+    """
+    Args:
+        directory: where snapshot versions and the CURRENT pointer live
+        keep: number of versions to keep after a save
+    """
+
+    def __init__(self, directory: str, keep: int = 2):
+        self.directory = directory
+        self.keep = keep
+
+    def save(self, arrays: Dict[str, np.ndarray], manifest: dict) -> str:
+        """Write a new snapshot version and publish it; returns its directory."""
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"v{time.time_ns()}-{os.getpid()}"
+        staging = os.path.join(self.directory, f".{name}")
+        os.makedirs(staging)
+        try:
+            for key, array in arrays.items():
+                np.save(os.path.join(staging, f"{key}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+            manifest = {**manifest, "format_version": FORMAT_VERSION, "arrays": sorted(arrays)}
+            with open(os.path.join(staging, "manifest.json"), "w") as f:
+                json.dump(manifest, f)
+            os.rename(staging, os.path.join(self.directory, name))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        # Atomski prebaci CURRENT na novu verziju
+        pointer = os.path.join(self.directory, f".CURRENT.{os.getpid()}")
+        with open(pointer, "w") as f:
+            f.write(name)
+        os.replace(pointer, os.path.join(self.directory, "CURRENT"))
+        self._prune(name)
+        return os.path.join(self.directory, name)
+
+    def load(self) -> Optional[Tuple[Dict[str, np.ndarray], dict]]:
+        """(memory-mapped arrays, manifest) of the current snapshot, None if there is no usable one."""
+        try:
+            with open(os.path.join(self.directory, "CURRENT")) as f:
+                path = os.path.join(self.directory, f.read().strip())
+            with open(os.path.join(path, "manifest.json")) as f:
+                manifest = json.load(f)
+            if manifest.get("format_version") != FORMAT_VERSION:
+                return None
+            arrays = {
+                key: np.load(os.path.join(path, f"{key}.npy"), mmap_mode='r', allow_pickle=False)
+                for key in manifest["arrays"]
+            }
+            return arrays, manifest
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _prune(self, current: str) -> None:
+        versions = sorted(
+            (entry for entry in os.listdir(self.directory) if entry.startswith("v")),
+            key=lambda entry: os.path.getmtime(os.path.join(self.directory, entry)),
+        )
+        for entry in versions[:-self.keep] if self.keep else versions:
+            if entry != current:
+                shutil.rmtree(os.path.join(self.directory, entry), ignore_errors=True)
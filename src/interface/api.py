@@ -1,19 +1,39 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request, Response
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from src.application.orchestrator import Orchestrator
 from src.application.runner import BackgroundRunner
-from src.application.feedback_service import FeedbackService
+from src.application.feedback_service import FeedbackService, RATINGS_PAGE_SIZE
 from src.application.event_service import EventQueueService
+from src.application.import_service import FeedbackImportService, IMPORT_FORMATS
+from src.infrastructure.db import async_engine, init_db
 from src.infrastructure.recommender_impl import MLRecommender
+from src.infrastructure.recommender_factory import create_recommender, MODEL_SNAPSHOT_DIR
 from src.infrastructure.learner_impl import DummyLearner
 from src.infrastructure.sensor_impl import DummySensor
 from src.infrastructure.actuator_impl import DummyActuator
-from typing import Optional
+from typing import List, Optional
 import asyncio
+import codecs
+import json
+import os
+import uuid
 
 app = FastAPI()
 
+# Feedback koji stigne unutar ovog prozora (sekunde) spaja se u jedan model refresh
+MODEL_REFRESH_WINDOW = 0.5
+
+# /recommend/batch: najviše zahtjeva po pozivu i preporuka po korisniku (veći n se skraćuje)
+BATCH_MAX_REQUESTS = 1000
+BATCH_MAX_N = 100
+
+# Sekunde između fallback poll-ova queue-a kad nema notify-a
+RUNNER_FALLBACK_POLL = 30.0
+# Najviše event-a koje runner obrađuje paralelno (u svom thread pool-u, van event loop-a)
+RUNNER_CONCURRENCY = int(os.environ.get("RUNNER_CONCURRENCY", "2"))
+
 # Global instances
 runner: Optional[BackgroundRunner] = None
 recommender_instance: Optional[MLRecommender] = None
@@ -22,14 +42,17 @@ recommender_instance: Optional[MLRecommender] = None
 async def startup_event():
     """Start the background runner on application startup."""
     global runner, recommender_instance
-    recommender_instance = MLRecommender()
+    init_db()
+    recommender_instance = create_recommender(refresh_window=MODEL_REFRESH_WINDOW, snapshot_dir=MODEL_SNAPSHOT_DIR)
     orchestrator = Orchestrator(
         recommender=recommender_instance,
         learner=DummyLearner(recommender=recommender_instance),
         sensor=DummySensor(),
         actuator=DummyActuator()
     )
-    runner = BackgroundRunner(orchestrator, tick_interval=5.0)
+    # Novi event-i iz ovog procesa bude runner odmah; poll je samo za event-e iz drugih procesa
+    runner = BackgroundRunner(orchestrator, tick_interval=RUNNER_FALLBACK_POLL,
+                              max_concurrency=RUNNER_CONCURRENCY)
     # Start runner in background
     asyncio.create_task(runner.run())
 
@@ -37,8 +60,16 @@ async def startup_event():
 async def shutdown_event():
     """Stop the background runner on application shutdown."""
     global runner
-    if runner:
-        runner.stop()
+    try:
+        if runner:
+            runner.stop()
+        if recommender_instance:
+            recommender_instance.stop_refresher()
+            # Sljedeći start sustiže samo feedback upisan nakon ovog snapshot-a
+            recommender_instance.save_snapshot()
+    finally:
+        # Zatvori aiosqlite konekcije: svaka ima svoj (ne-daemon) thread koji inače drži proces
+        await async_engine.dispose()
 
 @app.get("/")
 def read_root():
@@ -50,7 +81,7 @@ app.mount("/static", StaticFiles(directory="static", html=True), name="static")
 def get_orchestrator():
     global recommender_instance
     if recommender_instance is None:
-        recommender_instance = MLRecommender()
+        recommender_instance = create_recommender()
     return Orchestrator(
         recommender=recommender_instance,
         learner=DummyLearner(recommender=recommender_instance),
@@ -61,62 +92,200 @@ def get_orchestrator():
 def get_feedback_service():
     global recommender_instance
     if recommender_instance is None:
-        recommender_instance = MLRecommender()
+        recommender_instance = create_recommender()
     return FeedbackService(
         recommender=recommender_instance,
         learner=DummyLearner(recommender=recommender_instance)
     )
 
+def get_import_service():
+    global recommender_instance
+    if recommender_instance is None:
+        recommender_instance = create_recommender()
+    return FeedbackImportService(recommender=recommender_instance)
+
 def get_event_service():
-    return EventQueueService()
+    return EventQueueService(notify=runner.notify if runner else None)
+
+
+# Nasumičan token procesa: ETag drugog worker-a ili prije restarta nikad ne odgovara
+ETAG_EPOCH = uuid.uuid4().hex[:12]
+
+
+async def user_etag(recommender, kind: str, name: str, with_model: bool = False) -> Optional[str]:
+    """
+    Weak ETag of a per-user response: the user's feedback version (max
+    rowid and count of their feedback rows, one indexed query per request,
+    so feedback written by any worker changes it at once) plus the model
+    version for model output. None if the recommender has no feedback
+    versions or the version can't be read.
+    """
+    if not hasattr(recommender, "feedback_version_async"):
+        return None
+    version = await recommender.feedback_version_async(name)
+    if version is None:
+        return None
+    parts = [ETAG_EPOCH, kind, version]
+    if with_model:
+        parts.append(recommender.model_version)
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+async def prefetch_profiles(recommender, names: List[str]) -> None:
+    """Cache misses of the users' profiles are loaded on the event loop (async engine), not in the threadpool."""
+    if hasattr(recommender, "prefetch_profiles_async"):
+        await recommender.prefetch_profiles_async(names)
+
+
+def not_modified(request: Request, response: Response, etag: Optional[str]) -> Optional[Response]:
+    """304 if If-None-Match matches `etag`; otherwise tags the response and returns None."""
+    if etag is None:
+        return None
+    # Browser uvijek revalidira (fetch šalje If-None-Match iz svog HTTP cache-a)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*"
+                          or etag in (tag.strip() for tag in if_none_match.split(","))):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
 
 
 
 @app.get("/recommend")
-def recommend(name: str, mood: str = "neutral", orchestrator: Orchestrator = Depends(get_orchestrator)):
+async def recommend(request: Request, response: Response, name: str, mood: str = "neutral",
+                    orchestrator: Orchestrator = Depends(get_orchestrator)):
     try:
         if not name or len(name.strip()) == 0:
             return {"error": "Name is required"}
-        return orchestrator.step(name.strip(), mood)
+        # Ista verzija feedback-a korisnika i modela → ista lista; 304 bez računanja
+        etag = await user_etag(orchestrator.recommender, "rec", name.strip(), with_model=True)
+        cached = not_modified(request, response, etag)
+        if cached:
+            return cached
+        await prefetch_profiles(orchestrator.recommender, [name.strip()])
+        # Profil je u cache-u; u threadpool ide samo CPU dio (scoring)
+        return await run_in_threadpool(orchestrator.step, name.strip(), mood)
     except Exception as e:
         return {"error": str(e)}
 
+@app.post("/recommend/batch")
+async def recommend_batch(body: dict, orchestrator: Orchestrator = Depends(get_orchestrator)):
+    """
+    Recommendations for many users in one call.
+    Body: {"requests": [{"name": str, "mood": str}, ...], "n": int}
+    At most BATCH_MAX_REQUESTS requests; n is clamped to 1..BATCH_MAX_N.
+    Streams one JSON line per request, in order: {"name", "mood", "recommendations"}.
+    """
+    requests = body.get("requests")
+    if not isinstance(requests, list):
+        return {"error": "requests must be a list of {name, mood}"}
+    if len(requests) > BATCH_MAX_REQUESTS:
+        return {"error": f"At most {BATCH_MAX_REQUESTS} requests per batch"}
+    # Body se validira prije stream-a: greška usred stream-a bi prekinula odgovor bez poruke
+    try:
+        n = max(1, min(int(body.get("n", 10)), BATCH_MAX_N))
+    except (TypeError, ValueError):
+        return {"error": "n must be an integer"}
+    pairs = []
+    for request in requests:
+        name = (request.get("name") or "").strip() if isinstance(request, dict) else ""
+        if not name:
+            return {"error": "Name is required for every request"}
+        pairs.append((name, request.get("mood") or "neutral"))
+
+    await prefetch_profiles(orchestrator.recommender, [name for name, _ in pairs])
+
+    def lines():
+        for name, mood, recommendations in orchestrator.step_batch(pairs, n):
+            yield json.dumps({"name": name, "mood": mood, "recommendations": recommendations}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @app.post("/events")
-def ingest_event(event: dict, service: EventQueueService = Depends(get_event_service)):
+async def ingest_event(event: dict, service: EventQueueService = Depends(get_event_service)):
     """
     Ingest event into the queue for background processing.
     Events are stored as 'pending' and will be processed by the runner.
     """
-    return service.enqueue_event(event)
+    return await service.enqueue_event(event)
 
 @app.post("/feedback")
-def feedback(feedback_data: dict, service: FeedbackService = Depends(get_feedback_service)):
+async def feedback(feedback_data: dict, service: FeedbackService = Depends(get_feedback_service)):
     """
     Thin web layer: receive feedback, delegate to service, return response.
     All business logic is in FeedbackService.
     """
-    return service.process_feedback(feedback_data)
+    return await service.process_feedback(feedback_data)
+
+@app.post("/feedback/import")
+async def import_feedback(request: Request, format: str = "ndjson",
+                          service: FeedbackImportService = Depends(get_import_service)):
+    """
+    Bulk feedback import: the request body is streamed as NDJSON (one
+    {"name", "item_id", "rating", "mood"} object per line) or CSV with a
+    header row. Rows are inserted in large chunks and one model rebuild is
+    queued at the end (the background refresher publishes it shortly after).
+    Returns the import report (inserted, duplicates, invalid, rows_per_sec,
+    model_rebuild: "scheduled", ...).
+    """
+    if format not in IMPORT_FORMATS:
+        return {"error": f"format must be one of: {', '.join(IMPORT_FORMATS)}"}
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    partial = ""
+    async for chunk in request.stream():
+        lines = (partial + decoder.decode(chunk)).split("\n")
+        partial = lines.pop()
+        if lines:
+            # Validacija i INSERT-i van event loop-a
+            await run_in_threadpool(service.add_lines, lines, format)
+    await run_in_threadpool(service.add_lines, [partial + decoder.decode(b"", final=True)], format)
+    return await run_in_threadpool(service.finish)
 
 @app.get("/stats")
-def get_stats(name: str, service: FeedbackService = Depends(get_feedback_service)):
+async def get_stats(request: Request, response: Response, name: str,
+                    service: FeedbackService = Depends(get_feedback_service)):
     """
     Thin web layer: receive request, delegate to service, return response.
     All business logic (aggregation, counting) is in FeedbackService.
+    Conditional GET: ETag from the user's feedback version.
     """
-    return service.get_user_statistics(name)
+    cached = not_modified(request, response, await user_etag(service.recommender, "stats", name))
+    if cached:
+        return cached
+    return await service.get_user_statistics(name)
 
 
 @app.get("/ratings")
-def get_ratings(name: str, mood: Optional[str] = None, service: FeedbackService = Depends(get_feedback_service)):
+async def get_ratings(request: Request, response: Response, name: str, mood: Optional[str] = None,
+                      limit: int = RATINGS_PAGE_SIZE, cursor: Optional[str] = None, format: str = "json",
+                      service: FeedbackService = Depends(get_feedback_service)):
     """
     Thin web layer: receive request, delegate to service, return response.
     All business logic is in FeedbackService.
+    Conditional GET: ETag from the user's feedback version.
+    format=json: one page of `limit` ratings plus next_cursor (pass it as
+    `cursor` for the next page). format=ndjson: the whole history streamed
+    as one JSON line per rating.
     """
-    return service.get_user_ratings(name, mood)
+    if format not in ("json", "ndjson"):
+        return {"error": "format must be json or ndjson"}
+    cached = not_modified(request, response, await user_etag(service.recommender, "ratings", name))
+    if cached:
+        return cached
+    if format == "ndjson":
+        async def lines():
+            async for rating in service.stream_user_ratings(name, mood):
+                yield json.dumps(rating) + "\n"
+
+        # Vraćen Response ne nasljeđuje header-e od `response`: ETag se prenosi ručno
+        headers = {key: response.headers[key] for key in ("etag", "cache-control") if key in response.headers}
+        return StreamingResponse(lines(), media_type="application/x-ndjson", headers=headers)
+    return await service.get_user_ratings(name, mood, limit, cursor)
 
 
 @app.get("/runner/stats")
-def get_runner_stats():
+async def get_runner_stats():
     """Get background runner statistics."""
     global runner
     if not runner:
@@ -125,6 +294,15 @@ def get_runner_stats():
 
 
 @app.get("/runner/events")
-def get_pending_events(service: EventQueueService = Depends(get_event_service)):
+async def get_pending_events(service: EventQueueService = Depends(get_event_service)):
     """Get count of pending events in queue."""
-    return service.get_queue_stats()
\ No newline at end of file
+    return await service.get_queue_stats()
+
+
+@app.get("/model/stats")
+async def get_model_stats():
+    """Get published model version and background refresher statistics."""
+    global recommender_instance
+    if not recommender_instance:
+        return {"error": "Model not initialized"}
+    return recommender_instance.get_model_stats()
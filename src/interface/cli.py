@@ -0,0 +1,63 @@
+"""
+Command line tools.
+
+    python -m src.interface.cli import-feedback ratings.ndjson
+    python -m src.interface.cli import-feedback history.csv --format csv
+
+import-feedback writes straight to the feedback table. A server that is
+already running keeps its in-memory model and does not see the imported
+rows until it restarts (it then restores the snapshot written here); to
+import into a live server, POST the file to /feedback/import instead.
+"""
+import argparse
+import json
+import sys
+import time
+from src.application.import_service import FeedbackImportService, IMPORT_FORMATS
+from src.infrastructure.db import init_db
+from src.infrastructure.recommender_factory import create_recommender, MODEL_SNAPSHOT_DIR
+
+
+def import_feedback(args) -> dict:
+    """
+    Bulk import into the feedback table, then one full model rebuild that
+    is saved as the new snapshot (RECOMMENDER_ENGINE, MODEL_SNAPSHOT_DIR).
+    """
+    service = FeedbackImportService(chunk_size=args.chunk_size)
+    if args.path == "-":
+        report = service.import_lines(sys.stdin, args.format)
+    else:
+        with open(args.path, encoding="utf-8", newline="") as f:
+            report = service.import_lines(f, args.format)
+    if report["inserted"] and not args.no_rebuild:
+        # Jedan build: catch_up_limit=0 → importovani redovi se ne replay-aju na stari snapshot, nego
+        # full reload (ili hladan build bez snapshot-a) koji odmah sprema novi snapshot
+        started = time.perf_counter()
+        create_recommender(snapshot_dir=MODEL_SNAPSHOT_DIR, catch_up_limit=0)
+        report["model_rebuild"] = "done"
+        report["rebuild_seconds"] = round(time.perf_counter() - started, 3)
+        print("[IMPORT] Running servers pick up the import on their next restart")
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.interface.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import-feedback", help="bulk import feedback rows (NDJSON or CSV)")
+    importer.add_argument("path", help="input file, - for stdin")
+    importer.add_argument("--format", choices=IMPORT_FORMATS, default=None,
+                          help="input format (default: from the file extension, else ndjson)")
+    importer.add_argument("--chunk-size", type=int, default=50000, help="rows per INSERT transaction")
+    importer.add_argument("--no-rebuild", action="store_true", help="skip the model rebuild after the import")
+    args = parser.parse_args(argv)
+    init_db()
+    if args.format is None:
+        args.format = "csv" if args.path.lower().endswith(".csv") else "ndjson"
+
+    report = import_feedback(args)
+    print(json.dumps(report, indent=2))
+    return 1 if report["invalid"] and not report["inserted"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
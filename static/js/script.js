@@ -148,12 +148,16 @@ async function giveStarRating(itemId, rating) {
     }
 }
 
-function loadRatings(userName, mood) {
-    fetch(`/ratings?name=${encodeURIComponent(userName)}${mood ? `&mood=${encodeURIComponent(mood)}` : ''}`)
+function loadRatings(userName, mood, cursor) {
+    // Stranice po 1000; next_cursor vodi na sljedeću
+    fetch(`/ratings?name=${encodeURIComponent(userName)}${mood ? `&mood=${encodeURIComponent(mood)}` : ''}&limit=1000${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`)
         .then(r => r.json())
         .then(data => {
             if (data && Array.isArray(data.ratings)) {
                 data.ratings.forEach(r => setStarState(r.item_id, r.rating));
+                if (data.next_cursor) {
+                    loadRatings(userName, mood, data.next_cursor);
+                }
             }
         })
         .catch(err => console.error('loadRatings error:', err));
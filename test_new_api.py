@@ -1,5 +1,7 @@
+from src.infrastructure.db import init_db
 from src.infrastructure.recommender_impl import MLRecommender
 
+init_db()
 rec = MLRecommender()
 result = rec.recommend('Adi', 'happy', 3)
 print(f'Got {len(result)} recommendations:')
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+import asyncio
+import pandas as pd
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from src.infrastructure import recommender_impl
+from src.infrastructure.db import Base, FeedbackModel, create_async_sqlite_engine, create_sqlite_engine
+
+
+class TinyMovieLens:
+    """
+    Hand-written ratings.csv / movies.csv plus an empty feedback DB in a temp
+    directory. Recommenders built here load them instead of data/.
+    """
+
+    def __init__(self, root, session_factory):
+        self.data_path = root / "data" / "ml-latest-small"
+        self.data_path.mkdir(parents=True)
+        self.session_factory = session_factory
+        self._added = 0
+
+    def build(self, cls, ratings, movies, **kwargs):
+        """ratings: (userId, movieId, rating) rows, movies: (movieId, title, genres) rows."""
+        pd.DataFrame(ratings, columns=["userId", "movieId", "rating"]).to_csv(self.data_path / "ratings.csv", index=False)
+        pd.DataFrame(movies, columns=["movieId", "title", "genres"]).to_csv(self.data_path / "movies.csv", index=False)
+        return cls(**kwargs)
+
+    def add_feedback(self, rows):
+        """Insert (user_name, item_id, rating, mood) feedback rows, one minute apart."""
+        db = self.session_factory()
+        try:
+            for user_name, item_id, rating, mood in rows:
+                db.add(FeedbackModel(id=f"{user_name}_{item_id}_{mood}", user_name=user_name, item_id=str(item_id),
+                                     rating=rating, mood=mood,
+                                     timestamp=datetime(2024, 1, 1) + timedelta(minutes=self._added)))
+                self._added += 1
+            db.commit()
+        finally:
+            db.close()
+
+
+@pytest.fixture
+def tiny_movielens(tmp_path, monkeypatch):
+    engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'feedback.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    async_engine = create_async_sqlite_engine(f"sqlite+aiosqlite:///{tmp_path / 'feedback.db'}")
+    monkeypatch.setattr(recommender_impl, "SessionLocal", factory)
+    monkeypatch.setattr(recommender_impl, "AsyncSessionLocal",
+                        async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False))
+    # Recommender čita relativno 'data/ml-latest-small'
+    monkeypatch.chdir(tmp_path)
+    yield TinyMovieLens(tmp_path, factory)
+    engine.dispose()
+    asyncio.run(async_engine.dispose())
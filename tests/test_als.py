@@ -0,0 +1,46 @@
+import numpy as np
+from scipy import sparse
+from src.infrastructure.ratings_store import SparseRatingsStore
+from src.infrastructure.als import ALSModel
+
+
+def _low_rank_ratings(n_users=121, n_items=80, rank=3, seed=5):
+    rng = np.random.default_rng(seed)
+    users = rng.normal(size=(n_users, rank))
+    items = rng.normal(size=(n_items, rank))
+    return np.clip(3.0 + 0.5 * users @ items.T, 0.5, 5.0)
+
+
+def _store(full, density=0.4, seed=5):
+    observed = np.random.default_rng(seed).random(full.shape) < density
+    matrix = sparse.csr_matrix(np.where(observed, full, 0).astype(np.float32))
+    return SparseRatingsStore(matrix, list(range(full.shape[0])), np.arange(full.shape[1]))
+
+
+def test_fit_recovers_low_rank_ratings():
+    store = _store(_low_rank_ratings()[:120])
+    model = ALSModel(n_factors=3, regularization=0.01, iterations=15).fit(store)
+    assert model.user_factors.shape == (120, 3)
+    assert model.rmse(store) < 0.15
+
+
+def test_fold_in_predicts_unseen_user():
+    full = _low_rank_ratings()
+    model = ALSModel(n_factors=3, regularization=0.01, iterations=15).fit(_store(full[:120]))
+    # Zadnji korisnik nije u modelu: pola kolona je poznato, ostatak se predviđa
+    row = full[120]
+    known = np.random.default_rng(9).choice(80, size=40, replace=False)
+    unknown = np.setdiff1d(np.arange(80), known)
+    predicted = model.predict(model.fold_in(known, row[known]))
+    assert np.sqrt(np.mean((predicted[unknown] - row[unknown]) ** 2)) < 0.3
+    assert np.allclose(model.fold_in([], []), 0)
+
+
+def test_fold_in_many_matches_fold_in():
+    full = _low_rank_ratings()
+    model = ALSModel(n_factors=3, regularization=0.01, iterations=5).fit(_store(full[:120]))
+    histories = [([0, 5, 9], full[120, [0, 5, 9]].tolist()), ([], []), ([1, 2], [5.0, 1.0])]
+    folded = model.fold_in_many(histories)
+    for vector, (cols, values) in zip(folded, histories):
+        assert np.array_equal(vector, model.fold_in(cols, values))
+    np.testing.assert_allclose(model.predict_many(folded)[0], model.predict(folded[0]), rtol=1e-5)
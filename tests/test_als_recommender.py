@@ -0,0 +1,64 @@
+import numpy as np
+from src.infrastructure.als_recommender_impl import ALSRecommender
+
+MOVIES = [
+    (10, "Heat (1995)", "Action|Crime"),
+    (20, "Toy Story (1995)", "Animation|Comedy"),
+    (30, "Up (2009)", "Animation|Adventure"),
+    (40, "Alien (1979)", "Horror|Sci-Fi"),
+    (50, "Amelie (2001)", "Comedy|Romance"),
+    (60, "Scream (1996)", "Horror|Mystery"),
+]
+# Broj ocjena po filmu: 10 → 3, 20 → 3, 30 → 3, 40 → 3, 50 → 1, 60 → 3
+RATINGS = [
+    (1, 10, 5.0), (1, 20, 5.0), (1, 30, 4.0),
+    (2, 10, 4.0), (2, 30, 5.0), (2, 40, 4.0),
+    (3, 20, 4.0), (3, 50, 5.0), (3, 60, 4.0),
+    (4, 40, 5.0), (4, 60, 5.0),
+    (5, 10, 3.0), (5, 20, 2.0), (5, 30, 4.0), (5, 40, 3.0), (5, 60, 3.0),
+]
+
+
+def _ranked(recommender, item_scores, rated=(), mood="neutral", count=10):
+    """_rank nad ručno zadanim predikcijama (item_id -> score) umjesto fold-in-a."""
+    snapshot = recommender._snapshot
+    ratings = snapshot.ratings
+    scores = np.zeros(ratings.n_items)
+    for item_id, score in item_scores.items():
+        scores[ratings.col_of(item_id)] = score
+    cols = [ratings.col_of(item_id) for item_id in rated]
+    return [(int(r["item_id"]), r["score"]) for r in recommender._rank(scores, cols, count, mood, snapshot)]
+
+
+def test_rank_filters_rare_items_low_predictions_rated_items_and_mood(tiny_movielens):
+    recommender = tiny_movielens.build(ALSRecommender, RATINGS, MOVIES, n_factors=2, iterations=2,
+                                       min_item_ratings=3, min_predicted_rating=3.5)
+    scores = {10: 4.0, 20: 3.4, 30: 4.5, 40: 3.5, 50: 5.0, 60: 5.5}
+    # 50 ima samo jednu ocjenu, 20 je ispod 3.5; score se siječe na 5
+    assert _ranked(recommender, scores) == [(60, 5.0), (30, 4.5), (10, 4.0), (40, 3.5)]
+    assert _ranked(recommender, scores, count=2) == [(60, 5.0), (30, 4.5)]
+    # Već ocijenjeni filmovi (feedback + liked/disliked) nikad
+    assert _ranked(recommender, scores, rated=[60, 10]) == [(30, 4.5), (40, 3.5)]
+    # Mood maska prije top-k: samo Horror
+    assert _ranked(recommender, scores, mood="scared", count=1) == [(60, 5.0)]
+    assert _ranked(recommender, scores, rated=[60], mood="scared") == [(40, 3.5)]
+
+    recommender.min_item_ratings = 1
+    assert _ranked(recommender, scores, count=2) == [(60, 5.0), (50, 5.0)]
+
+
+def test_factors_are_saved_and_restored_with_the_snapshot(tiny_movielens):
+    tiny_movielens.add_feedback([("Adi", 10, 5, "happy"), ("Adi", 40, 4, "happy"), ("Adi", 20, 1, "sad")])
+    kwargs = dict(n_factors=3, iterations=3, min_item_ratings=1, min_predicted_rating=0.0,
+                  snapshot_dir="data/model_snapshot")
+    trained = tiny_movielens.build(ALSRecommender, RATINGS, MOVIES, **kwargs)
+    assert trained.save_snapshot()
+
+    restored = ALSRecommender(**kwargs)
+    saved, loaded = trained._snapshot.factors, restored._snapshot.factors
+    # Faktori dolaze iz snapshot-a (mmap), ne iz novog treniranja
+    assert isinstance(loaded.item_factors, np.memmap)
+    for name in ("user_factors", "item_factors", "item_counts"):
+        assert np.array_equal(getattr(saved, name), getattr(loaded, name))
+    assert loaded.mean == saved.mean
+    assert restored.recommend("Adi", "neutral") == trained.recommend("Adi", "neutral")
@@ -0,0 +1,96 @@
+import numpy as np
+from scipy import sparse
+from src.infrastructure.ratings_store import SparseRatingsStore
+from src.infrastructure.ann_index import ExactUserIndex, LSHUserIndex, create_user_index
+
+
+def _clustered_store(n_clusters=20, per_cluster=30, n_items=400, seed=3):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n_clusters):
+        center = np.zeros(n_items, dtype=np.float32)
+        center[rng.choice(n_items, 25, replace=False)] = 1
+        for _ in range(per_cluster):
+            row = center * rng.uniform(1, 5, n_items).astype(np.float32)
+            rows.append(row)
+    matrix = sparse.csr_matrix(np.vstack(rows))
+    return SparseRatingsStore(matrix, list(range(matrix.shape[0])), np.arange(n_items))
+
+
+def test_lsh_recall_against_exact():
+    store = _clustered_store()
+    exact = ExactUserIndex()
+    lsh = LSHUserIndex(n_tables=8, n_bits=10).fit(store)
+    queries = range(0, store.n_users, 7)
+    hits = 0
+    for row in queries:
+        vector = store.row_dense(row)
+        expected, _ = exact.search(store, vector, 5, exclude_row=row)
+        found, sims = lsh.search(store, vector, 5, exclude_row=row)
+        assert row not in found.tolist()
+        assert np.all(np.diff(sims) <= 1e-6)
+        hits += len(set(found.tolist()) & set(expected.tolist()))
+    assert hits / (5 * len(queries)) > 0.9
+
+
+def test_lsh_update_inserts_new_rows():
+    store = _clustered_store()
+    lsh = LSHUserIndex(n_tables=8, n_bits=10).fit(store)
+    source = store.row_dense(0)
+    for col in np.flatnonzero(source):
+        store.set_rating("new_user", int(store.item_ids[col]), float(source[col]) * 2)
+    new_row = store.row_of("new_user")
+    updated = lsh.update(store, [new_row])
+
+    assert new_row in updated.candidates(source).tolist()
+    found, _ = updated.search(store, source, 1, exclude_row=0)
+    assert found.tolist() == [new_row]
+    # Stari indeks (objavljen sa starijim snapshot-om) nije promijenjen
+    assert lsh.n_rows == new_row and new_row not in lsh.candidates(source).tolist()
+
+
+def test_lsh_update_rehashes_changed_rows_copy_on_write():
+    store = _clustered_store()
+    lsh = LSHUserIndex(n_tables=8, n_bits=10).fit(store)
+    before = [{code: rows.tolist() for shard in table.shards for code, rows in shard.items()} for table in lsh.tables]
+    target = store.row_dense(300)  # red 0 preuzima ocjene reda iz drugog klastera
+    changed = store.copy()
+    for col in np.flatnonzero(store.row_dense(0)):
+        changed.set_rating(0, int(store.item_ids[col]), 0.0)
+    for col in np.flatnonzero(target):
+        changed.set_rating(0, int(store.item_ids[col]), float(target[col]))
+
+    updated = lsh.update(changed, [0])
+
+    assert [{code: rows.tolist() for shard in table.shards for code, rows in shard.items()}
+            for table in lsh.tables] == before
+    assert 0 in updated.candidates(target).tolist()
+    for table in updated.tables:
+        assert sum(int(np.sum(rows == 0)) for shard in table.shards for rows in shard.values()) == 1
+    assert sum(table.shards[i] is not lsh.tables[t].shards[i]
+               for t, table in enumerate(updated.tables) for i in range(len(table.shards))) <= 2 * len(lsh.tables)
+    expected = lsh.row_codes.array().copy()
+    expected[:lsh.n_tables] = lsh._codes(lsh._project(changed, changed.rows_matrix([0]), np.array([0])))[:, 0]
+    assert updated.row_codes.array().tolist() == expected.tolist()
+
+
+def test_create_user_index_rejects_unknown_kind():
+    assert isinstance(create_user_index("exact"), ExactUserIndex)
+    try:
+        create_user_index("faiss")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_exact_search_many_matches_search():
+    store = _clustered_store(n_clusters=5, per_cluster=10, n_items=100)
+    store.set_rating("new", 3, 4.0)  # overlay red
+    index = ExactUserIndex()
+    rows = [0, 17, store.row_of("new"), None]
+    vectors = np.array([store.row_dense(row) for row in rows[:3]] + [np.zeros(100, dtype=np.float32)])
+    for (found, sims), vector, row in zip(index.search_many(store, vectors, 5, rows), vectors, rows):
+        expected, expected_sims = index.search(store, vector, 5, exclude_row=row)
+        assert found.tolist() == expected.tolist()
+        assert np.array_equal(sims, expected_sims)
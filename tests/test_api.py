@@ -0,0 +1,128 @@
+import asyncio
+import json
+import pytest
+from fastapi import Response
+from starlette.requests import Request
+from src.application import feedback_service as feedback_service_module
+from src.application.feedback_service import FeedbackService
+from src.application.orchestrator import Orchestrator
+from src.infrastructure import recommender_impl
+from src.infrastructure.recommender_impl import MLRecommender
+from src.infrastructure.item_recommender_impl import ItemKNNRecommender
+from src.infrastructure.als_recommender_impl import ALSRecommender
+from src.interface import api
+
+MOVIES = [(10, "Heat (1995)", "Action|Crime"), (20, "Toy Story (1995)", "Animation|Comedy")]
+RATINGS = [(1, 10, 5.0), (1, 20, 4.0), (2, 10, 3.0)]
+
+
+def _request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/stats", "headers": headers})
+
+
+def test_stats_conditional_get_follows_the_users_feedback_in_the_db(tiny_movielens, monkeypatch):
+    monkeypatch.setattr(feedback_service_module, "AsyncSessionLocal", recommender_impl.AsyncSessionLocal)
+    tiny_movielens.add_feedback([("Adi", 10, 5, "happy")])
+    service = FeedbackService(recommender=tiny_movielens.build(MLRecommender, RATINGS, MOVIES), learner=None)
+
+    async def stats(if_none_match=None, name="Adi"):
+        response = Response()
+        result = await api.get_stats(_request(if_none_match), response, name, service)
+        if isinstance(result, Response):
+            return result.status_code, result.headers["etag"]
+        return 200, response.headers["etag"]
+
+    async def scenario():
+        status, etag = await stats()
+        assert status == 200 and etag.startswith('W/"')
+        assert await stats(etag) == (304, etag)
+        assert await stats("*") == (304, etag)
+        assert await stats(f'W/"other", {etag}') == (304, etag)
+        assert (await stats('W/"other", W/"stale"'))[0] == 200
+        # Druga korisnica ima svoj ETag
+        assert (await stats(etag, name="Lejla"))[0] == 200
+
+        # Novi red u bazi (npr. iz drugog procesa, mimo profile cache-a) mijenja ETag odmah
+        tiny_movielens.add_feedback([("Adi", 20, 1, "sad")])
+        status, fresh = await stats(etag)
+        assert status == 200 and fresh != etag
+        assert await stats(fresh) == (304, fresh)
+
+    asyncio.run(scenario())
+
+
+BATCH_MOVIES = MOVIES + [
+    (30, "Up (2009)", "Animation|Adventure"),
+    (40, "Alien (1979)", "Horror|Sci-Fi"),
+    (50, "Amelie (2001)", "Comedy|Romance"),
+    (60, "Scream (1996)", "Horror|Mystery"),
+]
+BATCH_RATINGS = [
+    (1, 10, 5.0), (1, 20, 5.0), (1, 30, 4.0), (1, 40, 5.0),
+    (2, 10, 5.0), (2, 30, 5.0), (2, 40, 4.0), (2, 50, 5.0),
+    (3, 20, 4.0), (3, 60, 5.0),
+    (4, 40, 5.0), (4, 50, 4.0), (4, 60, 4.0),
+]
+BATCH_FEEDBACK = [
+    ("Adi", 10, 5, "happy"), ("Adi", 20, 5, "happy"), ("Adi", 40, 1, "scared"),
+    ("Lejla", 60, 5, "scared"), ("Lejla", 50, 2, "neutral"),
+]
+
+
+def _batch(orchestrator, body):
+    async def lines():
+        response = await api.recommend_batch(body, orchestrator)
+        if not hasattr(response, "body_iterator"):
+            return response
+        return [json.loads(chunk) async for chunk in response.body_iterator]
+
+    return asyncio.run(lines())
+
+
+@pytest.mark.parametrize("cls, kwargs", [(MLRecommender, {}), (ItemKNNRecommender, {}),
+                                         (ALSRecommender, {"min_item_ratings": 1, "min_predicted_rating": 0.0})])
+def test_batch_lists_match_single_recommend_for_every_engine(tiny_movielens, cls, kwargs):
+    tiny_movielens.add_feedback(BATCH_FEEDBACK)
+    recommender = tiny_movielens.build(cls, BATCH_RATINGS, BATCH_MOVIES, **kwargs)
+    orchestrator = Orchestrator(recommender=recommender, learner=None, sensor=None, actuator=None)
+    pairs = [("Adi", "happy"), ("Lejla", "scared"), ("Adi", "neutral"), ("Novi", "sad"), ("Lejla", "neutral")]
+    lines = _batch(orchestrator, {"requests": [{"name": name, "mood": mood} for name, mood in pairs]})
+
+    assert [(line["name"], line["mood"]) for line in lines] == pairs
+    for line, (name, mood) in zip(lines, pairs):
+        single = orchestrator.step(name, mood)
+        assert [r["item_id"] for r in line["recommendations"]] == [r["item_id"] for r in single]
+        assert [r["score"] for r in line["recommendations"]] == pytest.approx([r["score"] for r in single], rel=1e-6)
+
+
+def test_batch_body_is_validated_before_streaming(tiny_movielens):
+    recommender = tiny_movielens.build(MLRecommender, BATCH_RATINGS, BATCH_MOVIES)
+    orchestrator = Orchestrator(recommender=recommender, learner=None, sensor=None, actuator=None)
+    request = [{"name": "Adi", "mood": "happy"}]
+    assert "error" in _batch(orchestrator, {"requests": request, "n": "ten"})
+    assert "error" in _batch(orchestrator, {"requests": request * (api.BATCH_MAX_REQUESTS + 1)})
+    assert "error" in _batch(orchestrator, {"requests": request + [{"mood": "sad"}]})
+    # n van raspona se skraćuje
+    assert len(_batch(orchestrator, {"requests": request, "n": 0})[0]["recommendations"]) == 1
+    assert len(_batch(orchestrator, {"requests": request, "n": 10 ** 6})[0]["recommendations"]) == len(BATCH_MOVIES)
+
+
+def test_recommend_endpoints_load_profiles_on_the_async_engine(tiny_movielens):
+    tiny_movielens.add_feedback(BATCH_FEEDBACK)
+    recommender = tiny_movielens.build(MLRecommender, BATCH_RATINGS, BATCH_MOVIES)
+    orchestrator = Orchestrator(recommender=recommender, learner=None, sensor=None, actuator=None)
+    sync_loads = []
+    load = recommender.profile_cache.bulk_loader
+    recommender.profile_cache.loader = lambda name: sync_loads.append(name) or load([name])[name]
+    recommender.profile_cache.bulk_loader = lambda names: sync_loads.extend(names) or load(names)
+
+    async def single():
+        return await api.recommend(_request(), Response(), "Adi", "happy", orchestrator)
+
+    results = asyncio.run(single())
+    assert [r["item_id"] for r in results[:2]] == ["20", "10"]  # liked (najnoviji prvi) iz profila
+    lines = _batch(orchestrator, {"requests": [{"name": "Lejla", "mood": "scared"}, {"name": "Novi"}]})
+    assert lines[0]["recommendations"][0]["item_id"] == "60"
+    # Threadpool je našao sve profile u cache-u: nijedan sync upit
+    assert sync_loads == []
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from src.infrastructure.block_array import BlockArray
+
+
+def test_copy_on_write_touches_one_block():
+    values = BlockArray(np.arange(2500, dtype=np.float64))
+    copy = values.copy()
+    copy.add(1500, 0.5)
+    copy.put([0], [7.0])
+
+    assert values.array()[[0, 1500]].tolist() == [0.0, 1500.0]
+    assert copy.take([0, 2, 1500]).tolist() == [7.0, 2.0, 1500.5]
+    # Netaknuti blok je i dalje isti objekat u obje kopije
+    assert copy._blocks[1] is not values._blocks[1]
+    assert copy._blocks[2] is values._blocks[2]
+
+    copy.put([2600], [9.0])  # raste preko kraja, praznina je 0
+    assert len(values) == 2500 and len(copy) == 2601
+    assert copy.array()[[2499, 2599, 2600]].tolist() == [2499.0, 0.0, 9.0]
+
+
+def test_array_is_read_only_and_refreshed_after_writes():
+    values = BlockArray([1.0, 2.0], dtype=np.float32)
+    dense = values.array()
+    with pytest.raises(ValueError):
+        dense[0] = 5.0
+    values.append(3.0)
+    assert values.array().tolist() == [1.0, 2.0, 3.0]
+    assert values.array().dtype == np.float32
+    assert dense.tolist() == [1.0, 2.0]
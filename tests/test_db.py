@@ -0,0 +1,85 @@
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+from sqlalchemy import inspect, text
+from src.infrastructure.db import create_sqlite_engine, migrate_schema
+
+
+def test_migrate_adds_indexes_and_removes_duplicates(tmp_path):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    # Shema prije indeksa, sa jednim duplikatom (user, mood, item)
+    conn.execute("CREATE TABLE feedback (id VARCHAR PRIMARY KEY, user_name VARCHAR, item_id VARCHAR, "
+                 "rating INTEGER, mood VARCHAR, timestamp DATETIME)")
+    conn.execute("CREATE TABLE events (id VARCHAR PRIMARY KEY, user_id VARCHAR, user_name VARCHAR, "
+                 "session_id VARCHAR, event_type VARCHAR, item_id VARCHAR, rating INTEGER, mood VARCHAR, "
+                 "timestamp DATETIME, context TEXT, status VARCHAR)")
+    conn.execute("INSERT INTO events (id, status) VALUES ('e', 'processing')")
+    conn.executemany("INSERT INTO feedback (id, user_name, item_id, rating, mood) VALUES (?, ?, ?, ?, ?)",
+                     [("a", "Adi", "1", 5, "happy"), ("b", "Adi", "1", 1, "happy"), ("c", "Adi", "1", 2, "sad")])
+    conn.commit()
+    conn.close()
+
+    engine = create_sqlite_engine(f"sqlite:///{path}")
+    migrate_schema(engine)
+    migrate_schema(engine)  # idempotentno
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("SELECT id FROM feedback ORDER BY id")).scalars().all() == ["a", "c"]
+        assert conn.execute(text("SELECT attempts FROM events")).scalar() == 0  # server default za stare redove
+        indexes = {index["name"] for index in inspect(conn).get_indexes("feedback")}
+        assert {"uq_feedback_user_mood_item", "ix_feedback_user_mood_rating"} <= indexes
+        assert "ix_events_status_timestamp" in {index["name"] for index in inspect(conn).get_indexes("events")}
+        assert {"worker_id", "lease_expires_at", "attempts"} <= {c["name"] for c in inspect(conn).get_columns("events")}
+    engine.dispose()
+
+
+def test_event_status_counters_follow_inserts_updates_and_deletes(tmp_path):
+    path = tmp_path / "counts.db"
+    conn = sqlite3.connect(path)
+    # Postojeća baza bez brojača: migracija ih prebroji iz redova
+    conn.execute("CREATE TABLE events (id VARCHAR PRIMARY KEY, status VARCHAR)")
+    conn.executemany("INSERT INTO events (id, status) VALUES (?, ?)",
+                     [("a", "pending"), ("b", "pending"), ("c", "processed"), ("d", None)])
+    conn.commit()
+    conn.close()
+
+    engine = create_sqlite_engine(f"sqlite:///{path}")
+    migrate_schema(engine)
+    migrate_schema(engine)  # idempotentno, bez dvostrukog brojanja
+
+    def counts(conn):
+        rows = conn.execute(text("SELECT status, count FROM event_status_counts WHERE count > 0")).all()
+        return dict(rows)
+
+    with engine.begin() as conn:
+        assert counts(conn) == {"pending": 2, "processed": 1}
+        conn.execute(text("INSERT INTO events (id, status) VALUES ('e', 'pending')"))
+        conn.execute(text("UPDATE events SET status = 'processing' WHERE status = 'pending'"))
+        conn.execute(text("UPDATE events SET status = 'processing' WHERE id = 'a'"))  # bez promjene statusa
+        conn.execute(text("UPDATE events SET status = 'dead' WHERE id = 'd'"))
+        conn.execute(text("DELETE FROM events WHERE id = 'c'"))
+        assert counts(conn) == {"processing": 3, "dead": 1}
+        expected = dict(conn.execute(text(
+            "SELECT status, COUNT(*) FROM events WHERE status IS NOT NULL GROUP BY status")).all())
+        assert counts(conn) == expected
+    engine.dispose()
+
+
+
+def test_import_has_no_side_effects_and_init_db_creates_the_schema(tmp_path):
+    (tmp_path / "data").mkdir()
+    root = Path(__file__).resolve().parents[1]
+    # Svjež proces u praznom direktoriju: import samo kreira engine-e, fajl baze nastaje tek sa init_db()
+    script = ("import os\n"
+              "from src.infrastructure import db\n"
+              "assert not os.path.exists('data/feedback.db')\n"
+              "db.init_db()\n"
+              "print(sorted(db.inspect(db.engine).get_table_names()))\n")
+    result = subprocess.run([sys.executable, "-c", script], cwd=tmp_path, capture_output=True, text=True,
+                            env={**os.environ, "PYTHONPATH": str(root)})
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().endswith("['event_status_counts', 'events', 'feedback']")
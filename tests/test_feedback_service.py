@@ -0,0 +1,103 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from src.application import feedback_service as feedback_service_module
+from src.application.feedback_service import FeedbackService
+from src.infrastructure.db import Base, FeedbackModel, create_async_sqlite_engine, create_sqlite_engine
+
+
+@pytest.fixture
+def run_service(tmp_path, monkeypatch):
+    """run_service(rows, fn): fn(FeedbackService) awaited against a fresh DB with the given feedback rows."""
+    path = tmp_path / "feedback.db"
+
+    def run(rows, fn):
+        engine = create_sqlite_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        db.add_all([FeedbackModel(**row) for row in rows])
+        db.commit()
+        db.close()
+        engine.dispose()
+
+        async def scenario():
+            async_engine = create_async_sqlite_engine(f"sqlite+aiosqlite:///{path}")
+            monkeypatch.setattr(feedback_service_module, "AsyncSessionLocal",
+                                async_sessionmaker(async_engine, expire_on_commit=False))
+            try:
+                return await fn(FeedbackService(recommender=None, learner=None))
+            finally:
+                await async_engine.dispose()
+
+        return asyncio.run(scenario())
+
+    return run
+
+
+def _feedback(i, user, mood, rating, timestamp=None):
+    return dict(id=f"f{i:02d}", user_name=user, mood=mood, item_id=str(i), rating=rating, timestamp=timestamp)
+
+
+def test_user_statistics_are_aggregated_per_mood(run_service):
+    rows = [_feedback(i, user, mood, rating) for i, (user, mood, rating) in enumerate([
+        ("Adi", "sad", 5), ("Adi", "happy", 1), ("Adi", "sad", 3), ("Adi", "happy", 4),
+        ("Adi", "angry", 2), ("Lejla", "angry", 5)])]
+    stats = run_service(rows, lambda service: service.get_user_statistics("Adi"))
+    assert stats == {
+        "user_name": "Adi",
+        "total_feedback": 5,
+        "liked_count": 2,
+        "disliked_count": 2,
+        "favorite_mood": "happy",  # izjednačeno sa "sad": prvi po abecedi
+        "moods": {"angry": 1, "happy": 2, "sad": 2},
+    }
+
+
+def test_user_statistics_without_feedback(run_service):
+    stats = run_service([_feedback(0, "Lejla", "angry", 5)], lambda service: service.get_user_statistics("Adi"))
+    assert stats["total_feedback"] == 0
+    assert stats["favorite_mood"] is None
+    assert stats["moods"] == {}
+
+
+def _history():
+    start = datetime(2024, 1, 1)
+    rows = [_feedback(i, "Adi", "happy" if i % 3 else "sad", 1 + i % 5, start + timedelta(minutes=i // 2))
+            for i in range(11)]  # parovi sa istim timestamp-om: id razdvaja
+    rows.append(_feedback(20, "Adi", "happy", 4))  # bez timestamp-a: prvi
+    rows.append(_feedback(21, "Lejla", "happy", 4, start))
+    return rows
+
+
+def test_ratings_keyset_pages_cover_history_once_in_order(run_service):
+    async def all_pages(service):
+        pages, cursor = [], None
+        while True:
+            page = await service.get_user_ratings("Adi", limit=4, cursor=cursor)
+            pages.append(page["ratings"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return pages
+
+    pages = run_service(_history(), all_pages)
+    assert [len(page) for page in pages] == [4, 4, 4]
+    item_ids = [rating["item_id"] for page in pages for rating in page]
+    assert item_ids == ["20"] + [str(i) for i in range(11)]
+
+
+def test_ratings_mood_filter_stream_and_bad_cursor(run_service):
+    async def scenario(service):
+        first = await service.get_user_ratings("Adi", mood="sad", limit=2)
+        rest = await service.get_user_ratings("Adi", mood="sad", limit=2, cursor=first["next_cursor"])
+        streamed = [rating async for rating in service.stream_user_ratings("Adi")]
+        bad = await service.get_user_ratings("Adi", cursor="not-a-cursor")
+        return first, rest, streamed, bad
+
+    first, rest, streamed, bad = run_service(_history(), scenario)
+    assert [r["item_id"] for r in first["ratings"] + rest["ratings"]] == ["0", "3", "6", "9"]
+    assert rest["next_cursor"] is None
+    assert [r["item_id"] for r in streamed] == ["20"] + [str(i) for i in range(11)]
+    assert streamed[1] == {"item_id": "0", "rating": 1, "mood": "sad", "timestamp": "2024-01-01T00:00:00"}
+    assert bad == {"error": "Invalid cursor"}
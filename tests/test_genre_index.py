@@ -0,0 +1,12 @@
+from src.infrastructure.genre_index import GenreIndex
+
+MOOD_GENRES = {"happy": ["Comedy", "Animation"], "scared": ["Horror"], "neutral": []}
+
+
+def test_matches_uses_genre_bitmasks():
+    index = GenreIndex(["Comedy|Drama", "Horror", "", "Animation|Horror"], MOOD_GENRES)
+    assert index.matches([0, 1, 2, 3], "happy").tolist() == [True, False, False, True]
+    assert index.matches([0, 1, 2, 3], "scared").tolist() == [False, True, False, True]
+    assert index.matches([0, 1, 2, 3], "neutral").tolist() == [True, True, True, True]
+    assert index.matches([0, 1], "unknown").tolist() == [False, False]
+    assert index.mood_columns("happy").tolist() == [0, 3]
@@ -0,0 +1,136 @@
+import argparse
+import json
+from datetime import datetime
+import pytest
+from sqlalchemy.orm import sessionmaker
+from src.application import import_service
+from src.application.import_service import FeedbackImportService
+from src.infrastructure import recommender_factory
+from src.infrastructure.db import Base, FeedbackModel, create_sqlite_engine
+from src.infrastructure.recommender_impl import MLRecommender
+from src.interface import cli
+
+
+class RecordingRecommender:
+    def __init__(self, refresher_running=False):
+        self.updates = 0
+        self.refresher_running = refresher_running
+
+    def update_model(self):
+        self.updates += 1
+        return not self.refresher_running
+
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'feedback.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(import_service, "SessionLocal", factory)
+    yield factory
+    engine.dispose()
+
+
+def _rows(factory):
+    db = factory()
+    try:
+        return {(fb.user_name, fb.mood, fb.item_id): fb for fb in db.query(FeedbackModel).all()}
+    finally:
+        db.close()
+
+
+def test_ndjson_import_skips_duplicates_and_invalid_rows_and_rebuilds_once(session_factory):
+    recommender = RecordingRecommender()
+    service = FeedbackImportService(recommender=recommender, chunk_size=2)
+    lines = [
+        json.dumps({"name": "Adi", "item_id": 1, "rating": 5, "mood": "happy",
+                    "timestamp": "2024-01-01T10:00:00"}),
+        json.dumps({"name": "Adi", "item_id": "2", "rating": 1.0, "mood": "happy"}),
+        json.dumps({"name": "Adi", "item_id": 1, "rating": 2, "mood": "happy"}),  # duplikat
+        "",
+        "not json",
+        json.dumps({"name": "Adi", "item_id": "abc", "rating": 3, "mood": "sad"}),
+        json.dumps({"name": "Adi", "item_id": 3, "rating": 9, "mood": "sad"}),
+        json.dumps({"user_name": "Lejla", "item_id": 3, "rating": 4, "mood": "sad"}),
+        json.dumps({"name": "Adi", "item_id": 4, "rating": 3.5, "mood": "sad"}),  # nije cijela ocjena
+    ]
+
+    report = service.import_lines(lines)
+
+    assert report["received"] == 8
+    assert report["inserted"] == 3
+    assert report["duplicates"] == 1
+    assert report["invalid"] == 4
+    assert report["errors"][0].startswith("line 5:")
+    assert report["errors"][-1] == "line 9: rating must be a whole number between 1 and 5"
+    assert report["model_rebuild"] == "done"
+    assert recommender.updates == 1
+    rows = _rows(session_factory)
+    assert set(rows) == {("Adi", "happy", "1"), ("Adi", "happy", "2"), ("Lejla", "sad", "3")}
+    assert rows[("Adi", "happy", "1")].rating == 5
+    assert rows[("Adi", "happy", "1")].timestamp == datetime(2024, 1, 1, 10)
+    assert rows[("Adi", "happy", "1")].id == "Adi_1_happy_2024-01-01T10:00:00"
+    assert rows[("Adi", "happy", "2")].rating == 1
+
+
+def test_csv_import_reads_header_across_calls(session_factory):
+    service = FeedbackImportService(chunk_size=100)
+    service.add_lines(["userId,movieId,rating,mood", "Adi,10,4,happy"], "csv")
+    service.add_lines(["Adi,11,5,happy", "Adi,12,,happy"], "csv")
+
+    report = service.finish()
+
+    assert report["inserted"] == 2
+    assert report["invalid"] == 1
+    assert report["model_rebuild"] is None
+    assert set(_rows(session_factory)) == {("Adi", "happy", "10"), ("Adi", "happy", "11")}
+
+
+
+def test_rebuild_queued_on_a_background_refresher_is_reported_as_scheduled(session_factory):
+    recommender = RecordingRecommender(refresher_running=True)
+    service = FeedbackImportService(recommender=recommender)
+    report = service.import_lines([json.dumps({"name": "Adi", "item_id": 1, "rating": 5, "mood": "happy"})])
+    assert report["model_rebuild"] == "scheduled"
+    assert recommender.updates == 1
+
+def test_unknown_format_is_rejected(session_factory):
+    with pytest.raises(ValueError):
+        FeedbackImportService().add_lines(["a"], "xml")
+
+
+@pytest.mark.parametrize("server_snapshot", [True, False])
+def test_cli_import_rebuilds_and_saves_the_snapshot_once(tiny_movielens, monkeypatch, capsys, server_snapshot):
+    monkeypatch.setattr(import_service, "SessionLocal", tiny_movielens.session_factory)
+    snapshot_dir = recommender_factory.MODEL_SNAPSHOT_DIR
+    # Snapshot servera prije importa (ili nijedan)
+    tiny_movielens.build(MLRecommender, [(1, 10, 5.0), (1, 20, 4.0), (2, 10, 3.0)],
+                         [(10, "Heat (1995)", "Action|Crime"), (20, "Toy Story (1995)", "Animation|Comedy")],
+                         snapshot_dir=snapshot_dir if server_snapshot else None)
+    path = tiny_movielens.data_path.parent / "import.ndjson"
+    path.write_text("\n".join(json.dumps({"name": "Adi", "item_id": item_id, "rating": 5, "mood": "happy"})
+                              for item_id in (10, 20)))
+    calls = {"full_builds": 0, "saves": 0}
+    build, save = MLRecommender._build_snapshot, MLRecommender.save_snapshot
+
+    def counting_build(self, deltas, full_reload=False):
+        calls["full_builds"] += full_reload
+        return build(self, deltas, full_reload)
+
+    def counting_save(self):
+        calls["saves"] += 1
+        return save(self)
+
+    monkeypatch.setattr(MLRecommender, "_build_snapshot", counting_build)
+    monkeypatch.setattr(MLRecommender, "save_snapshot", counting_save)
+
+    report = cli.import_feedback(argparse.Namespace(path=str(path), format="ndjson", chunk_size=100,
+                                                    no_rebuild=False))
+    assert report["inserted"] == 2 and report["model_rebuild"] == "done"
+    assert calls == {"full_builds": 1, "saves": 1}
+
+    # Sljedeći start servera čita snapshot sa importom, bez replay-a
+    capsys.readouterr()
+    restored = MLRecommender(snapshot_dir=snapshot_dir)
+    assert "replayed feedback: 0" in capsys.readouterr().out
+    assert restored.user_ratings == {"Adi": {10: 5, 20: 5}}
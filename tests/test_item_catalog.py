@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+from src.infrastructure.item_catalog import ItemCatalog
+
+MOOD_GENRES = {"happy": ["Comedy"], "neutral": []}
+
+
+def _catalog():
+    movies = pd.DataFrame({
+        "movieId": [10, 2, 7],
+        "title": ["Heat (1995)", "Babylon 5", "Amélie (Fabuleux destin d'Amélie Poulain, Le) (2001)"],
+        "genres": ["Action|Crime", "Sci-Fi", "Comedy|Romance"],
+    })
+    return ItemCatalog.from_frame(movies, MOOD_GENRES)
+
+
+def test_lookups_by_movie_id():
+    catalog = _catalog()
+    assert catalog.title(7).startswith("Amélie")
+    assert catalog.year(10) == 1995
+    assert catalog.year(2) is None
+    assert catalog.year(99) == "Unknown"
+    assert catalog.title("99") == "Movie 99"
+    assert catalog.genres_of(2) == "Sci-Fi"
+    assert catalog.rows_of([7, 99, 10, 2]).tolist() == [2, -1, 0, 1]
+
+
+def test_round_trip_through_arrays():
+    catalog = _catalog()
+    restored = ItemCatalog.from_arrays(catalog.to_arrays(), MOOD_GENRES)
+    assert restored.titles.to_list() == catalog.titles.to_list()
+    assert restored.years.tolist() == [1995, 0, 2001]
+    columns = restored.genre_index.take(restored.rows_of([7, 10, 99]))
+    assert columns.matches(np.arange(3), "happy").tolist() == [True, False, False]
@@ -0,0 +1,36 @@
+import numpy as np
+from scipy import sparse
+from src.infrastructure.ratings_store import SparseRatingsStore
+from src.infrastructure.item_neighbors import ItemNeighbors
+
+
+def _store(dense):
+    matrix = sparse.csr_matrix(np.asarray(dense, dtype=np.float32))
+    return SparseRatingsStore(matrix, list(range(matrix.shape[0])), np.arange(matrix.shape[1]) + 100)
+
+
+def test_build_matches_dense_cosine():
+    rng = np.random.default_rng(1)
+    dense = rng.integers(0, 6, size=(40, 30)) * (rng.random((40, 30)) < 0.3)
+    table = ItemNeighbors.build(_store(dense), k=5, chunk_size=7)
+
+    norms = np.linalg.norm(dense, axis=0)
+    cosine = (dense.T @ dense) / np.maximum(np.outer(norms, norms), 1e-12)
+    np.fill_diagonal(cosine, -np.inf)
+    for col in range(30):
+        valid = table.neighbors[col] >= 0
+        expected = np.sort(cosine[col][cosine[col] > 0])[::-1][:5]
+        assert col not in table.neighbors[col].tolist()
+        assert np.allclose(table.similarities[col][valid], expected, atol=1e-5)
+
+
+def test_score_aggregates_history_neighbors():
+    dense = [[5, 5, 0, 0], [4, 4, 0, 1], [0, 0, 3, 3]]
+    store = _store(dense)
+    store.set_rating("new", 101, 5.0)  # overlay red ulazi u build
+    table = ItemNeighbors.build(store, k=2)
+    scores, support = table.score([0], [1.0], store.n_items)
+    assert np.argmax(scores) == 1
+    assert support[0] == 0
+    scores, _ = table.score([0, 2], [1.0, -1.0], store.n_items)
+    assert scores[3] < 0
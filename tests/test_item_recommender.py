@@ -0,0 +1,80 @@
+import pytest
+from src.infrastructure.item_recommender_impl import ItemKNNRecommender
+from src.infrastructure.als_recommender_impl import ALSRecommender
+from src.infrastructure.recommender_impl import MLRecommender
+from src.infrastructure import recommender_factory
+
+MOVIES = [
+    (10, "Heat (1995)", "Action|Crime"),
+    (20, "Toy Story (1995)", "Animation|Comedy"),
+    (30, "Up (2009)", "Animation|Adventure"),
+    (40, "Alien (1979)", "Horror|Sci-Fi"),
+    (50, "Amelie (2001)", "Comedy|Romance"),
+    (60, "Scream (1996)", "Horror|Mystery"),
+]
+RATINGS = [
+    (1, 10, 5.0), (1, 20, 5.0), (1, 30, 4.0),
+    (2, 10, 4.0), (2, 30, 5.0), (2, 40, 4.0),
+    (3, 20, 4.0), (3, 50, 5.0), (3, 60, 4.0),
+    (4, 40, 5.0), (4, 50, 4.0), (4, 60, 5.0),
+    (5, 30, 4.0), (5, 60, 3.0),
+]
+
+
+def _item_model(tiny_movielens, feedback, **kwargs):
+    tiny_movielens.add_feedback(feedback)
+    return tiny_movielens.build(ItemKNNRecommender, RATINGS, MOVIES, **kwargs)
+
+
+def _collaborative(recommender, liked=(), disliked=(), mood="neutral", count=10):
+    query = ("Adi", list(liked), list(disliked), count, mood)
+    results = recommender._get_collaborative_batch([query], recommender._snapshot)[0]
+    return [(int(r["item_id"]), round(r["score"], 4)) for r in results]
+
+
+# Score kandidata = suma cosine sličnosti (kolone filmova, uključujući red user_Adi) prema
+# historiji: +1 za ocjenu >= 4, -1 za ocjenu <= 2, ocjena 3 se ne broji
+
+
+def test_history_aggregates_feedback_from_every_mood(tiny_movielens):
+    # 10 je ocijenjen u "happy", 20 u "sad"; upit za "neutral" bez liked/disliked i dalje sumira oba
+    recommender = _item_model(tiny_movielens, [("Adi", 10, 5, "happy"), ("Adi", 20, 5, "sad")])
+    assert _collaborative(recommender) == [(30, 0.9782), (50, 0.3845), (40, 0.3076), (60, 0.2785)]
+    # Samo top-2 susjeda po filmu: 10 → (20, 30), 20 → (10, 50); ocijenjeni 10 i 20 otpadaju
+    recommender = tiny_movielens.build(ItemKNNRecommender, RATINGS, MOVIES, item_neighbors=2)
+    assert _collaborative(recommender) == [(30, 0.6522), (50, 0.3845)]
+
+
+def test_neutral_ratings_are_ignored_and_dislikes_push_neighbors_down(tiny_movielens):
+    recommender = _item_model(tiny_movielens, [("Adi", 10, 5, "happy"), ("Adi", 20, 3, "happy")])
+    # Ocjena 3 nije ni like ni dislike: samo susjedi filma 10, a 20 je ipak ocijenjen pa se ne preporučuje
+    assert _collaborative(recommender) == [(30, 0.6522), (40, 0.3076)]
+
+    tiny_movielens.add_feedback([("Adi", 20, 5, "sad"), ("Adi", 40, 1, "sad")])
+    recommender = tiny_movielens.build(ItemKNNRecommender, RATINGS, MOVIES)
+    # Dislike filma 40 oduzima njegove sličnosti: 50 i 60 padaju ispod nule i nestaju
+    assert _collaborative(recommender) == [(30, 0.5695)]
+
+
+def test_rated_liked_and_disliked_items_are_never_recommended(tiny_movielens):
+    recommender = _item_model(tiny_movielens, [("Adi", 10, 5, "happy"), ("Adi", 20, 5, "sad")])
+    recommended = {item for item, _ in _collaborative(recommender, liked=[30], disliked=[60])}
+    assert recommended and recommended.isdisjoint({10, 20, 30, 60})
+    # Mood maska prije top-k: samo Horror, bez liked 60
+    assert [item for item, _ in _collaborative(recommender, liked=[60], mood="scared")] == [40]
+
+
+@pytest.mark.parametrize("engine, cls", [("user_knn", MLRecommender), ("item_knn", ItemKNNRecommender),
+                                         ("als", ALSRecommender)])
+def test_create_recommender_builds_the_configured_engine(tiny_movielens, monkeypatch, engine, cls):
+    tiny_movielens.build(MLRecommender, RATINGS, MOVIES)  # samo CSV-ovi
+    monkeypatch.setattr(recommender_factory, "RECOMMENDER_ENGINE", engine)
+    assert type(recommender_factory.create_recommender()) is cls
+
+
+def test_create_recommender_rejects_an_unknown_engine(monkeypatch):
+    monkeypatch.setattr(recommender_factory, "RECOMMENDER_ENGINE", "svd")
+    with pytest.raises(ValueError, match="Unknown RECOMMENDER_ENGINE: svd"):
+        recommender_factory.create_recommender()
+    with pytest.raises(ValueError, match="Unknown RECOMMENDER_ENGINE: knn"):
+        recommender_factory.create_recommender("knn")
@@ -0,0 +1,36 @@
+from src.infrastructure.model_refresher import ModelRefresher
+
+
+def test_refresher_coalesces_burst_into_one_rebuild():
+    builds = []
+    published = []
+
+    def build(deltas, full_reload):
+        builds.append((list(deltas), full_reload))
+        return len(builds)
+
+    refresher = ModelRefresher(build, published.append, window=0.05)
+    refresher.start()
+    try:
+        for i in range(50):
+            refresher.submit(i)
+        assert refresher.flush(timeout=5.0)
+    finally:
+        refresher.stop(timeout=5.0)
+
+    assert builds == [(list(range(50)), False)]
+    assert published == [1]
+    assert refresher.get_stats()["total_rebuilds"] == 1
+
+
+def test_refresher_full_rebuild_request():
+    builds = []
+    refresher = ModelRefresher(lambda deltas, full: builds.append(full), lambda model: None, window=0.0)
+    refresher.start()
+    try:
+        refresher.request_rebuild()
+        assert refresher.flush(timeout=5.0)
+    finally:
+        refresher.stop(timeout=5.0)
+
+    assert builds == [True]
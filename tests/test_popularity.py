@@ -0,0 +1,26 @@
+import numpy as np
+from src.infrastructure.popularity import MoodPopularity
+
+
+def test_top_skips_excluded_columns():
+    popularity = MoodPopularity(np.array([5.0, 9.0, 1.0, 9.0]), {"neutral": np.arange(4), "sad": np.array([0, 2])})
+    cols, scores = popularity.top("neutral", 2, np.array([1], dtype=np.int32), n_users=2)
+    assert cols.tolist() == [3, 0]
+    assert scores.tolist() == [4.5, 2.5]
+    assert popularity.top("sad", 5, np.array([], dtype=np.int32), n_users=1)[0].tolist() == [0, 2]
+    assert popularity.top("unknown", 5, np.array([], dtype=np.int32), n_users=1)[0].tolist() == []
+
+
+def test_updated_matches_full_rebuild():
+    rng = np.random.default_rng(7)
+    sums = rng.integers(0, 20, size=200).astype(np.float64)
+    mood_columns = {"neutral": np.arange(200), "happy": np.arange(0, 200, 3)}
+    popularity = MoodPopularity(sums, mood_columns)
+    for _ in range(20):
+        changed = rng.choice(200, size=4, replace=False)
+        sums = sums.copy()
+        sums[changed] += rng.integers(-3, 4, size=4)
+        popularity = popularity.updated(sums, changed)
+    fresh = MoodPopularity(sums, mood_columns)
+    for mood in mood_columns:
+        assert popularity.rankings[mood].tolist() == fresh.rankings[mood].tolist()
@@ -0,0 +1,92 @@
+import asyncio
+import time
+from src.infrastructure.profile_cache import UserProfile, UserProfileCache
+
+
+def _loader(calls):
+    def load(user_name):
+        calls.append(user_name)
+        return UserProfile({"happy": [1]}, {"happy": [2]})
+    return load
+
+
+def test_hits_misses_and_lru_eviction():
+    calls = []
+    cache = UserProfileCache(_loader(calls), max_users=2, ttl=60)
+    cache.get("a")
+    cache.get("a")
+    cache.get("b")
+    cache.get("c")  # izbacuje "a"
+    cache.get("a")
+    assert calls == ["a", "b", "c", "a"]
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (1, 4, 2, 2)
+
+
+def test_ttl_expiry_and_write_through():
+    calls = []
+    cache = UserProfileCache(_loader(calls), ttl=0.05)
+    cache.get("a")
+    cache.record("a", "happy", "5", 5)
+    cache.record("a", "sad", 6, 1)
+    profile = cache.get("a")
+    assert profile.liked_for("happy") == [5, 1]
+    assert profile.disliked_for("sad") == [6]
+    time.sleep(0.06)
+    cache.get("a")
+    assert calls == ["a", "a"]
+    assert cache.get_stats()["expirations"] == 1
+
+
+def test_load_racing_a_write_is_not_cached():
+    cache = None
+
+    def load(user_name):
+        cache.record(user_name, "happy", 3, 5)  # feedback upisan dok traje učitavanje
+        return UserProfile()
+
+    cache = UserProfileCache(load)
+    cache.get("a")
+    assert cache.get_stats()["size"] == 0
+
+
+def test_record_skips_neutral_ratings_and_non_numeric_ids():
+    cache = UserProfileCache(lambda user_name: UserProfile(), ttl=60)
+    cache.get("a")
+    cache.record("a", "happy", "5", 5)
+    cache.record("a", "happy", "6", 3)  # ni like ni dislike
+    cache.record("a", "happy", "tt01", 1)  # ne-numerički id
+    profile = cache.get("a")
+    assert profile.liked_for("happy") == [5] and profile.disliked_for("happy") == []
+
+
+def test_get_many_loads_all_misses_with_one_bulk_call():
+    bulk_calls = []
+
+    def bulk(user_names):
+        bulk_calls.append(list(user_names))
+        return {user_name: UserProfile() for user_name in user_names}
+
+    cache = UserProfileCache(_loader([]), ttl=60, bulk_loader=bulk)
+    cache.get_many(["a"])
+    profiles = cache.get_many(["a", "b", "c", "b"])
+    assert sorted(profiles) == ["a", "b", "c"]
+    assert bulk_calls == [["a"], ["b", "c"]]
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_get_many_async_awaits_the_async_bulk_loader_and_shares_the_cache():
+    calls, async_calls = [], []
+
+    async def load_async(user_names):
+        async_calls.append(list(user_names))
+        return {user_name: UserProfile({"sad": [3]}) for user_name in user_names}
+
+    cache = UserProfileCache(_loader(calls), max_users=10, ttl=60, async_bulk_loader=load_async)
+    profiles = asyncio.run(cache.get_many_async(["a", "b", "a"]))
+    assert sorted(profiles) == ["a", "b"]
+    assert cache.get("a").liked_for("sad") == [3]  # sync get vidi profil iz async load-a
+    cache.get("c")
+    profiles = asyncio.run(cache.get_many_async(["b", "c", "d"]))
+    assert profiles["c"].liked_for("happy") == [1]
+    assert (calls, async_calls) == (["c"], [["a", "b"], ["d"]])
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+from src.infrastructure.ratings_store import SparseRatingsStore
+
+
+def _store():
+    frame = pd.DataFrame({
+        "userId": [1, 1, 2, 3],
+        "movieId": [10, 20, 20, 30],
+        "rating": [4.0, 5.0, 3.0, 1.0],
+    })
+    return SparseRatingsStore.from_frame(frame)
+
+
+def test_from_frame_builds_sparse_matrix():
+    store = _store()
+    assert store.shape == (3, 3)
+    assert store.nnz == 4
+    assert store.matrix.dtype == np.float32
+    assert store.user_row(1).toarray().tolist() == [[4.0, 5.0, 0.0]]
+
+
+def test_column_means_match_dense_pivot():
+    store = _store()
+    np.testing.assert_allclose(store.column_means(), [4.0 / 3, 8.0 / 3, 1.0 / 3])
+
+
+def test_with_user_rows_appends_and_replaces():
+    store = _store().with_user_rows({"user_Adi": {20: 5, 999: 4}})
+    assert store.n_users == 4
+    # Nepoznati movieId se ignoriše
+    assert store.user_row("user_Adi").toarray().tolist() == [[0.0, 5.0, 0.0]]
+
+    store = store.with_user_rows({"user_Adi": {10: 2}})
+    assert store.n_users == 4
+    assert store.user_row("user_Adi").toarray().tolist() == [[2.0, 0.0, 0.0]]
+    assert store.user_row(1).toarray().tolist() == [[4.0, 5.0, 0.0]]
+
+
+def test_set_rating_patches_entry_and_cached_norms():
+    store = _store()
+    assert store.set_rating(1, 30, 2.0)
+    assert store.set_rating("user_Adi", 10, 5.0)
+    assert not store.set_rating("user_Adi", 999, 5.0)
+
+    assert store.n_users == 4
+    assert store.user_row(1).toarray().tolist() == [[4.0, 5.0, 2.0]]
+    np.testing.assert_allclose(store.col_sums, [9.0, 8.0, 3.0])
+    np.testing.assert_allclose(store.row_sq_norms, [45.0, 9.0, 1.0, 25.0])
+    np.testing.assert_allclose(store.dot(np.array([1.0, 0.0, 1.0], dtype=np.float32)), [6.0, 0.0, 1.0, 5.0])
+
+
+def test_compact_folds_overlay_into_csr():
+    store = _store()
+    store.set_rating(2, 20, 4.0)
+    store.set_rating("user_Adi", 30, 3.0)
+    compacted = store.compact()
+
+    assert compacted.overlay_rows == 0
+    assert compacted.nnz == store.nnz == 5
+    np.testing.assert_allclose(compacted.col_sums, store.col_sums)
+    np.testing.assert_allclose(compacted.row_sq_norms, store.row_sq_norms)
+    assert compacted.user_row(2).toarray().tolist() == [[0.0, 4.0, 0.0]]
+
+
+def test_cosine_uses_cached_inverse_norms():
+    store = _store()
+    store.set_rating("user_Adi", 20, 4.0)
+    store.set_rating(3, 30, 0.0)
+    sims = store.cosine(np.array([0.0, 1.0, 0.0], dtype=np.float32))
+    assert sims.dtype == np.float32
+    np.testing.assert_allclose(sims, [5.0 / np.sqrt(41.0), 1.0, 0.0, 1.0], rtol=1e-6)
+    assert store.cosine(np.zeros(3, dtype=np.float32)).tolist() == [0.0, 0.0, 0.0, 0.0]
+
+
+def test_copy_shares_state_and_leaves_source_untouched():
+    store = _store()
+    store.set_rating(2, 30, 2.0)  # overlay red dijele obje kopije
+    before = (store.col_sums.copy(), store.row_sq_norms.copy(), store.user_row(2).toarray())
+
+    copy = store.copy()
+    assert copy.set_rating(2, 10, 5.0)
+    assert copy.set_rating("user_Adi", 20, 4.0)
+
+    assert store.n_users == 3 and store.row_of("user_Adi") is None
+    assert store.user_row(2).toarray().tolist() == before[2].tolist()
+    np.testing.assert_allclose(store.col_sums, before[0])
+    np.testing.assert_allclose(store.row_sq_norms, before[1])
+    assert copy.user_row(2).toarray().tolist() == [[5.0, 3.0, 2.0]]
+    np.testing.assert_allclose(copy.col_sums, [9.0, 12.0, 3.0])
+    np.testing.assert_allclose(copy.row_sq_norms, [41.0, 38.0, 1.0, 16.0])
+
+
+def test_copies_of_the_same_store_append_users_independently():
+    store = _store()
+    first, second = store.copy(), store.copy()
+    first.set_rating("user_Adi", 10, 5.0)
+    second.set_rating("user_Lejla", 20, 1.0)  # isti novi red, druga kopija
+
+    assert first.row_of("user_Adi") == second.row_of("user_Lejla") == 3
+    assert first.row_of("user_Lejla") is None and second.row_of("user_Adi") is None
+    assert first.user_keys == [1, 2, 3, "user_Adi"]
+    assert second.user_keys == [1, 2, 3, "user_Lejla"]
+    assert second.user_row("user_Lejla").toarray().tolist() == [[0.0, 1.0, 0.0]]
+    assert store.n_users == 3
@@ -0,0 +1,125 @@
+import numpy as np
+from src.infrastructure import learner_impl
+from src.infrastructure.learner_impl import DummyLearner
+from src.infrastructure.recommender_impl import MLRecommender
+
+MOVIES = [
+    (10, "Heat (1995)", "Action|Crime"),
+    (20, "Toy Story (1995)", "Animation|Comedy"),
+    (30, "Up (2009)", "Animation|Adventure"),
+    (40, "Alien (1979)", "Horror|Sci-Fi"),
+    (50, "Amelie (2001)", "Comedy|Romance"),
+]
+RATINGS = [
+    (1, 10, 5.0), (1, 20, 4.0),
+    (2, 10, 4.0), (2, 30, 5.0), (2, 50, 2.0),
+    (3, 20, 5.0), (3, 40, 3.0),
+    (4, 30, 4.0), (4, 40, 5.0), (4, 50, 5.0),
+]
+
+
+def _lsh_buckets(index):
+    return [{code: rows.tolist() for shard in table.shards for code, rows in shard.items()} for table in index.tables]
+
+
+def test_feedback_delta_never_modifies_the_published_snapshot(tiny_movielens):
+    recommender = tiny_movielens.build(MLRecommender, RATINGS, MOVIES, user_index="lsh",
+                                       user_index_params={"n_tables": 4, "n_bits": 4})
+    recommender.apply_feedback("Adi", 40, 5)
+    published = recommender._snapshot
+    ratings = published.ratings
+    before = (ratings.n_users, ratings.nnz, ratings.col_sums.copy(), ratings.inv_norms.copy(),
+              ratings.user_row("user_Adi").toarray(), {user: dict(items) for user, items in published.user_ratings.items()},
+              {mood: ranking.tolist() for mood, ranking in published.popularity.rankings.items()},
+              _lsh_buckets(published.user_index), published.user_index.row_codes.array().tolist())
+
+    recommender.apply_feedback("Adi", 10, 1)
+    recommender.apply_feedback("Lejla", 20, 5)
+
+    current = recommender._snapshot
+    assert current is not published and current.version == published.version + 2
+    assert current.ratings.row_of("user_Lejla") == 5 and ratings.row_of("user_Lejla") is None
+    assert current.user_ratings["Adi"] == {40: 5, 10: 1}
+    after = (ratings.n_users, ratings.nnz, ratings.col_sums, ratings.inv_norms,
+             ratings.user_row("user_Adi").toarray(), published.user_ratings,
+             {mood: ranking.tolist() for mood, ranking in published.popularity.rankings.items()},
+             _lsh_buckets(published.user_index), published.user_index.row_codes.array().tolist())
+    for old, new in zip(before, after):
+        if isinstance(old, np.ndarray):
+            assert np.array_equal(old, new)
+        else:
+            assert old == new
+
+
+# Adi (feedback) = [5, 5, 0, 0, 0, 0] nad filmovima 10..60. Cosine prema Adi:
+# korisnik 1 ≈ 0.741, korisnik 3 ≈ 0.442, korisnik 2 ≈ 0.371, korisnik 4 = 0
+NEIGHBOR_MOVIES = MOVIES + [(60, "Scream (1996)", "Horror|Mystery")]
+NEIGHBOR_RATINGS = [
+    (1, 10, 5.0), (1, 20, 5.0), (1, 30, 4.0), (1, 40, 5.0),
+    (2, 10, 5.0), (2, 30, 5.0), (2, 40, 4.0), (2, 50, 5.0),
+    (3, 20, 4.0), (3, 60, 5.0),
+    (4, 40, 5.0), (4, 50, 4.0), (4, 60, 4.0),
+]
+
+
+def _neighbor_model(tiny_movielens, **kwargs):
+    tiny_movielens.add_feedback([("Adi", 10, 5, "happy"), ("Adi", 20, 5, "happy")])
+    return tiny_movielens.build(MLRecommender, NEIGHBOR_RATINGS, NEIGHBOR_MOVIES, **kwargs)
+
+
+def _collaborative(recommender, mood="neutral", count=10):
+    query = ("Adi", [10, 20], [], count, mood)
+    results = recommender._get_collaborative_batch([query], recommender._snapshot)[0]
+    return [(int(r["item_id"]), round(r["score"], 4)) for r in results]
+
+
+def test_collaborative_uses_only_the_n_nearest_neighbors_and_never_the_user_itself(tiny_movielens):
+    # Sam Adi (cosine 1) nije susjed: sa n_neighbors=1 ostaje korisnik 1
+    assert _collaborative(_neighbor_model(tiny_movielens, n_neighbors=1)) == [(40, 5.0), (30, 4.0)]
+    recommender = tiny_movielens.build(MLRecommender, NEIGHBOR_RATINGS, NEIGHBOR_MOVIES, n_neighbors=2)
+    assert _collaborative(recommender) == [(40, 5.0), (60, 5.0), (30, 4.0)]
+    # Mood filter prije top-k: samo Horror
+    assert _collaborative(recommender, mood="scared") == [(40, 5.0), (60, 5.0)]
+    assert _collaborative(recommender, count=1) == [(40, 5.0)]
+
+
+def test_collaborative_uniform_and_similarity_weighting(tiny_movielens):
+    uniform = _neighbor_model(tiny_movielens, n_neighbors=3)
+    assert _collaborative(uniform) == [(50, 5.0), (60, 5.0), (30, 4.5), (40, 4.5)]
+    # Bliži korisnik 1 (30: 4, 40: 5) vuče prosjek: 40 prestiže 30
+    weighted = tiny_movielens.build(MLRecommender, NEIGHBOR_RATINGS, NEIGHBOR_MOVIES, n_neighbors=3,
+                                    neighbor_weighting="similarity")
+    assert _collaborative(weighted) == [(50, 5.0), (60, 5.0), (40, 4.6667), (30, 4.3333)]
+
+
+def test_collaborative_ignores_neighbor_ratings_below_min_neighbor_rating(tiny_movielens):
+    strict = _neighbor_model(tiny_movielens, n_neighbors=3, min_neighbor_rating=5.0)
+    # 30 i 40 zadrže samo petice (korisnik 2 za 30, korisnik 1 za 40)
+    assert _collaborative(strict) == [(30, 5.0), (40, 5.0), (50, 5.0), (60, 5.0)]
+    lenient = tiny_movielens.build(MLRecommender, NEIGHBOR_RATINGS, NEIGHBOR_MOVIES, n_neighbors=4,
+                                   min_neighbor_rating=1.0)
+    # Korisnik 4 (cosine 0) ulazi kao četvrti susjed sa uniform težinom
+    assert _collaborative(lenient) == [(40, 4.6667), (30, 4.5), (50, 4.5), (60, 4.5)]
+
+
+def test_snapshot_saved_after_feedback_deltas_replays_nothing(tiny_movielens, monkeypatch, capsys):
+    monkeypatch.setattr(learner_impl, "SessionLocal", tiny_movielens.session_factory)
+    kwargs = dict(snapshot_dir="data/model_snapshot")
+    recommender = tiny_movielens.build(MLRecommender, RATINGS, MOVIES, **kwargs)
+    assert recommender.save_snapshot()
+    learner = DummyLearner(recommender=recommender)
+    for item_id, rating in ((40, 5), (10, 1)):
+        assert learner.learn({"name": "Adi", "mood": "happy", "item_id": str(item_id), "rating": rating})["status"] == "created"
+    assert recommender._snapshot.feedback_watermark == (2, 2)
+    assert recommender.save_snapshot()
+
+    capsys.readouterr()
+    restored = MLRecommender(**kwargs)
+    assert "replayed feedback: 0" in capsys.readouterr().out
+    assert restored.user_ratings == {"Adi": {40: 5, 10: 1}}
+    assert restored.recommend("Adi") == recommender.recommend("Adi")
+
+    # Feedback upisan nakon posljednjeg snapshot-a se ponavlja (samo on)
+    learner.learn({"name": "Adi", "mood": "sad", "item_id": "20", "rating": 4})
+    MLRecommender(**kwargs)
+    assert "replayed feedback: 1" in capsys.readouterr().out
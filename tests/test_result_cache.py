@@ -0,0 +1,58 @@
+import threading
+from src.infrastructure.result_cache import RecommendationCache
+
+
+def _compute(calls, results=None):
+    def compute():
+        calls.append(1)
+        return results or [{"item_id": "1", "title": "Heat (1995)", "score": 5.0}]
+    return compute
+
+
+def test_hits_are_keyed_by_mood_n_and_model_version():
+    calls = []
+    cache = RecommendationCache(max_entries=10, ttl=60)
+    first = cache.get("Adi", "happy", 10, 1, _compute(calls))
+    first.append("mutated")  # pozivalac dobija svoju listu
+    assert cache.get("Adi", "happy", 10, 1, _compute(calls)) == [{"item_id": "1", "title": "Heat (1995)", "score": 5.0}]
+    cache.get("Adi", "sad", 10, 1, _compute(calls))
+    cache.get("Adi", "happy", 5, 1, _compute(calls))
+    cache.get("Adi", "happy", 10, 2, _compute(calls))  # nova verzija modela
+    assert len(calls) == 4
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["size"], stats["users"]) == (1, 4, 4, 1)
+    assert stats["memory_bytes"] > 0
+
+
+def test_invalidate_drops_only_that_user_and_lru_evicts():
+    calls = []
+    cache = RecommendationCache(max_entries=3, ttl=60)
+    for user in ("a", "b"):
+        cache.get(user, "happy", 10, 1, _compute(calls))
+        cache.get(user, "sad", 10, 1, _compute(calls))
+    assert cache.get_stats()["evictions"] == 1  # ("a", "happy") izbačen
+    cache.invalidate("b")
+    assert cache.get_stats()["size"] == 1
+    cache.get("a", "sad", 10, 1, _compute(calls))
+    assert len(calls) == 4
+    cache.invalidate()
+    assert cache.get_stats()["memory_bytes"] == 0
+
+
+def test_compute_racing_an_invalidation_is_not_cached():
+    calls = []
+    cache = RecommendationCache(ttl=60)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(1)
+        return _compute(calls)()
+
+    worker = threading.Thread(target=cache.get, args=("a", "happy", 10, 1, slow))
+    worker.start()
+    started.wait(1)
+    cache.invalidate("a")  # feedback stigao dok se lista računala
+    release.set()
+    worker.join()
+    assert cache.get_stats()["size"] == 0
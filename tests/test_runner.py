@@ -0,0 +1,204 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.orm import sessionmaker
+from src.application import runner as runner_module
+from src.application.runner import BackgroundRunner
+from src.infrastructure.db import Base, EventModel, create_sqlite_engine
+
+
+class RecordingOrchestrator:
+    def __init__(self, fail_ids=()):
+        self.seen = []
+        self.fail_ids = set(fail_ids)
+
+    def tick(self, event):
+        self.seen.append(event['id'])
+        if event['id'] in self.fail_ids:
+            raise RuntimeError("boom")
+        return "Processed"
+
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'events.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(runner_module, "SessionLocal", factory)
+    db = factory()
+    start = datetime(2024, 1, 1)
+    db.add_all([
+        EventModel(id=f"e{i}", user_name="Adi", mood="happy", status="pending",
+                   timestamp=start + timedelta(seconds=i))
+        for i in reversed(range(5))
+    ])
+    db.commit()
+    db.close()
+    yield factory
+    engine.dispose()
+
+
+def _statuses(factory):
+    db = factory()
+    try:
+        return {event.id: event.status for event in db.query(EventModel).all()}
+    finally:
+        db.close()
+
+
+def test_tick_claims_batch_in_order_and_marks_in_bulk(session_factory):
+    orchestrator = RecordingOrchestrator(fail_ids={"e1"})
+    runner = BackgroundRunner(orchestrator, batch_size=3, max_attempts=2)
+
+    assert asyncio.run(runner.tick()) == "Processed"
+    assert orchestrator.seen == ["e0", "e1", "e2"]
+    assert runner._next_sleep("Processed") == 0.0  # pun batch: odmah sljedeći tick
+    statuses = _statuses(session_factory)
+    # e1 je pao → nazad u pending za retry
+    assert [statuses[f"e{i}"] for i in range(5)] == ["processed", "pending", "processed", "pending", "pending"]
+
+    asyncio.run(runner.tick())
+    assert orchestrator.seen[3:] == ["e1", "e3", "e4"]
+    assert _statuses(session_factory)["e1"] == "dead"  # drugi pokušaj, max_attempts=2
+    assert asyncio.run(runner.tick()) == "NoWork"
+    stats = runner.get_stats()
+    assert (stats["total_processed"], stats["total_failed"], stats["total_retried"], stats["total_dead"]) == (4, 2, 1, 1)
+
+
+def test_get_next_event_claims_one(session_factory):
+    runner = BackgroundRunner(RecordingOrchestrator())
+    event = runner.get_next_event()
+    assert event["id"] == "e0"
+    assert isinstance(event["timestamp"], datetime)
+    assert _statuses(session_factory)["e0"] == "processing"
+
+
+def test_enqueue_wakes_idle_runner(session_factory, monkeypatch, tmp_path):
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from src.application import event_service as event_service_module
+    from src.application.event_service import EventQueueService
+    from src.infrastructure.db import create_async_sqlite_engine
+    orchestrator = RecordingOrchestrator()
+    runner = BackgroundRunner(orchestrator, tick_interval=30.0)
+    service = EventQueueService(notify=runner.notify)
+
+    async def scenario():
+        async_engine = create_async_sqlite_engine(f"sqlite+aiosqlite:///{tmp_path / 'events.db'}")
+        monkeypatch.setattr(event_service_module, "AsyncSessionLocal",
+                            async_sessionmaker(async_engine, expire_on_commit=False))
+        task = asyncio.create_task(runner.run())
+        while runner.total_no_work == 0:  # isprazni fixture event-e, runner čeka
+            await asyncio.sleep(0.01)
+        # Async endpoint enqueue-a na event loop-u runner-a
+        result = await service.enqueue_event({"user_name": "Adi", "mood": "happy"})
+        await asyncio.wait_for(_until(lambda: result["event_id"] in orchestrator.seen), timeout=2.0)
+        stats = await service.get_queue_stats()
+        runner.stop()
+        await asyncio.wait_for(task, timeout=2.0)
+        await async_engine.dispose()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert runner.total_wakeups >= 1
+    assert _statuses(session_factory)[orchestrator.seen[-1]] == "processed"
+    assert stats["total"] == 6
+
+
+async def _until(condition):
+    while not condition():
+        await asyncio.sleep(0.005)
+
+
+class SlowOrchestrator(RecordingOrchestrator):
+    def tick(self, event):
+        import time
+        time.sleep(0.05)
+        return super().tick(event)
+
+
+def test_tick_runs_orchestrator_off_the_event_loop(session_factory):
+    orchestrator = SlowOrchestrator()
+    runner = BackgroundRunner(orchestrator, batch_size=5, max_concurrency=2)
+    heartbeats = []
+
+    async def heartbeat():
+        while True:
+            heartbeats.append(runner.in_flight)
+            await asyncio.sleep(0.005)
+
+    async def scenario():
+        beat = asyncio.create_task(heartbeat())
+        result = await runner.tick()
+        beat.cancel()
+        return result
+
+    assert asyncio.run(scenario()) == "Processed"
+    # Loop je slobodan dok orchestrator radi (blokirajući tick bi dao 1-2 otkucaja)
+    assert len(heartbeats) > 10
+    assert max(heartbeats) == 1  # svi event-i su istog korisnika → redom
+    assert orchestrator.seen == [f"e{i}" for i in range(5)]
+    runner.executor.shutdown()
+
+
+
+def test_in_flight_counts_lanes_and_returns_to_zero(session_factory):
+    db = session_factory()
+    db.add_all([EventModel(id=f"l{i}", user_name="Lejla", mood="sad", status="pending",
+                           timestamp=datetime(2024, 1, 1) + timedelta(seconds=i)) for i in range(5)])
+    db.commit()
+    db.close()
+    runner = BackgroundRunner(SlowOrchestrator(), batch_size=10, max_concurrency=2)
+    samples = []
+
+    async def sample():
+        while True:
+            samples.append(runner.in_flight)
+            await asyncio.sleep(0.005)
+
+    async def scenario():
+        beat = asyncio.create_task(sample())
+        await runner.tick()
+        beat.cancel()
+
+    asyncio.run(scenario())
+    # Dva korisnika → dva lanca paralelno; nakon tick-a nijedan nije u toku
+    assert max(samples) == 2
+    assert runner.get_stats()["in_flight"] == 0
+    runner.executor.shutdown()
+
+def _leases(factory):
+    db = factory()
+    try:
+        return {event.id: (event.status, event.worker_id, event.attempts) for event in db.query(EventModel).all()}
+    finally:
+        db.close()
+
+
+def test_expired_leases_are_reclaimed_then_dead_lettered(session_factory):
+    crashed = BackgroundRunner(RecordingOrchestrator(), worker_id="crashed", lease_seconds=-1, max_attempts=2)
+    assert [event["id"] for event in crashed.claim_events(2)] == ["e0", "e1"]
+    assert _leases(session_factory)["e0"] == ("processing", "crashed", 1)
+
+    # Lease je istekao: drugi runner preuzima e0, e1 ispred novijih event-a
+    survivor = BackgroundRunner(RecordingOrchestrator(), worker_id="survivor", lease_seconds=-1, max_attempts=2)
+    assert [event["id"] for event in survivor.claim_events(2)] == ["e0", "e1"]
+    assert survivor.total_reclaimed == 2
+    # Crashed runner se "probudi": ne smije pregaziti event-e koje više ne drži
+    crashed._mark_event_status(["e0", "e1"], "processed")
+    assert _leases(session_factory)["e0"] == ("processing", "survivor", 2)
+
+    # Drugi put istekao → nema više pokušaja
+    assert [event["id"] for event in survivor.claim_events(1)] == ["e2"]
+    leases = _leases(session_factory)
+    assert leases["e0"][0] == leases["e1"][0] == "dead"
+    assert survivor.total_dead == 2
+
+
+def test_heartbeat_renews_only_own_leases(session_factory):
+    runner = BackgroundRunner(RecordingOrchestrator(), worker_id="a", lease_seconds=60)
+    other = BackgroundRunner(RecordingOrchestrator(), worker_id="b", lease_seconds=60)
+    runner.claim_events(1)
+    other.claim_events(1)
+    assert runner.renew_leases(["e0", "e1"]) == 1
+    other.claim_events(5)
+    assert _leases(session_factory)["e0"][1] == "a"  # e0 nije istekao, ne preuzima se
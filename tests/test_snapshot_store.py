@@ -0,0 +1,26 @@
+import os
+import numpy as np
+from src.infrastructure.snapshot_store import SnapshotStore, source_fingerprint
+
+
+def test_save_and_load_memory_mapped(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots"), keep=2)
+    assert store.load() is None
+    for version in range(3):
+        store.save({"values": np.arange(5) + version, "titles": np.array(["a", "bb"])}, {"version": version})
+
+    arrays, manifest = store.load()
+    assert manifest["version"] == 2
+    assert isinstance(arrays["values"], np.memmap)
+    assert arrays["values"].tolist() == [2, 3, 4, 5, 6]
+    assert arrays["titles"].tolist() == ["a", "bb"]
+    versions = [entry for entry in os.listdir(tmp_path / "snapshots") if entry.startswith("v")]
+    assert len(versions) == 2
+
+
+def test_source_fingerprint_changes_with_file(tmp_path):
+    path = tmp_path / "ratings.csv"
+    path.write_text("userId,movieId,rating\n")
+    before = source_fingerprint([str(path)])
+    path.write_text("userId,movieId,rating\n1,1,5.0\n")
+    assert source_fingerprint([str(path)]) != before